@@ -0,0 +1,274 @@
+from BiliLoginBot import BiliLoginBot
+from AnimePageAccess import AnimePageAccess
+from EpisodeWorkerPool import EpisodeWorkerPool, CoinBudget
+from BiliHttpEngine import BiliHttpEngine
+from RunLedger import RunLedger
+from BotEvents import CoinChanged
+import glob
+import logging
+import os
+import threading
+
+
+class AccountSession:
+    def __init__(self, name, cookie_file, ledger_file):
+        """
+        单个账号的运行状态
+        :param name: 账号名称（同时用于cookie与账本文件名）
+        :param cookie_file: 该账号独立的cookie文件
+        :param ledger_file: 该账号独立的账本文件
+        """
+        self.name = name
+        self.cookie_file = cookie_file
+        self.ledger_file = ledger_file
+        self.account_id = name  # 登录后替换为DedeUserID
+        self.budget = None
+        self.ledger = None
+        self.http_engine = None
+        self.login_bot = None  # 准备阶段已登录的浏览器，执行时交给线程池继续使用
+        self.assigned = []  # 调度分配到的剧集索引
+        self.results = {}  # 剧集索引 -> 三连结果
+
+    @property
+    def ready(self):
+        return self.budget is not None
+
+    def capacity(self):
+        """按当前预算还能处理的剧集数"""
+        if not self.ready:
+            return 0
+        usable = self.budget.remaining - self.budget.reserve
+        return max(0, int(usable // max(1, self.budget.cost_per_episode)))
+
+    def release_login_bot(self):
+        """取出准备阶段的浏览器（所有权转移给调用方）"""
+        login_bot, self.login_bot = self.login_bot, None
+        return login_bot
+
+    def close(self):
+        login_bot = self.release_login_bot()
+        if login_bot is not None:
+            try:
+                login_bot.driver.quit()
+            except Exception:
+                pass
+        if self.http_engine is not None:
+            self.http_engine.close()
+        if self.ledger is not None:
+            self.ledger.close()
+
+
+class AccountOrchestrator:
+    def __init__(self, driver_path, accounts, cookie_dir="accounts", ledger_dir="ledgers",
+                 coin_record_url="https://account.bilibili.com/account/coin", reserve=4,
+                 workers_per_account=1, use_http_engine=True, lean=False, spa=False,
+                 headless=False, event_channel=None, index_cache=None, coins_per_episode=2, coinless=False):
+        """
+        多账号调度：每个账号独立的cookie、浏览器与账本，按实时硬币余额分配剧集并行执行
+        :param driver_path: ChromeDriver路径
+        :param accounts: 账号名称列表，cookie文件为 cookie_dir/<账号>.pkl
+        :param cookie_dir: 账号cookie文件目录
+        :param ledger_dir: 账号账本目录，每个账号一个SQLite文件
+        :param reserve: 每个账号保留的最低硬币数
+        :param workers_per_account: 每个账号并行的浏览器数量
+        :param use_http_engine: 是否优先通过HTTP接口三连
+        :param event_channel: 可选EventChannel，发布剧集进度与硬币变化
+        :param index_cache: 可选EpisodeIndexCache，索引有效时无需加载番剧页面
+        :param coins_per_episode: 每集计划投币数量 (1/2)
+        :param coinless: 硬币不足时是否仍分配剩余剧集（只点赞和收藏）
+        """
+        self.driver_path = driver_path
+        self.cookie_dir = cookie_dir
+        self.ledger_dir = ledger_dir
+        self.coin_record_url = coin_record_url
+        self.reserve = reserve
+        self.workers_per_account = workers_per_account
+        self.use_http_engine = use_http_engine
+        self.lean = lean
+        self.spa = spa
+        self.headless = headless
+        self.event_channel = event_channel
+        self.index_cache = index_cache
+        self.coins_per_episode = coins_per_episode
+        self.coinless = coinless
+        self.logger = logging.getLogger('account_orchestrator')
+        self.episode_urls = []
+        self._pools = []
+        self._pools_lock = threading.Lock()
+
+        os.makedirs(ledger_dir, exist_ok=True)
+        self.sessions = [
+            AccountSession(name, os.path.join(cookie_dir, f"{name}.pkl"),
+                           os.path.join(ledger_dir, f"run_ledger_{name}.db"))
+            for name in accounts
+        ]
+
+    @staticmethod
+    def discover_accounts(cookie_dir="accounts"):
+        """列出cookie目录中已保存的账号"""
+        return sorted(
+            os.path.splitext(os.path.basename(path))[0]
+            for path in glob.glob(os.path.join(cookie_dir, "*.pkl"))
+        )
+
+    # ------------------------------------------------------------------
+    # 准备：并行登录并读取硬币余额
+    # ------------------------------------------------------------------
+    def _new_bot(self):
+        return BiliLoginBot(self.driver_path, page_load_strategy="eager" if self.lean else "normal",
+                            headless=self.headless)
+
+    def _prepare_session(self, session, season_url, episodes_loaded):
+        login_bot = None
+        try:
+            login_bot = self._new_bot()
+            if not login_bot.login(session.cookie_file,
+                                   qrcode_screenshot=os.path.join(self.cookie_dir, f"{session.name}_qrcode.png")):
+                self.logger.error(f"账号 {session.name} 登录失败，跳过")
+                return
+            if not login_bot.get_user_coin(self.coin_record_url, timeout=15, retries=2):
+                self.logger.error(f"账号 {session.name} 获取硬币余额失败，跳过")
+                return
+
+            session.account_id = login_bot.get_account_id() or session.name
+            session.budget = CoinBudget(login_bot.coin, reserve=self.reserve, cost_per_episode=self.coins_per_episode)
+            session.ledger = RunLedger(session.ledger_file)
+            if self.use_http_engine:
+                session.http_engine = BiliHttpEngine(session.cookie_file)
+            self.logger.info(f"账号 {session.name} 已就绪，硬币余额: {login_bot.coin}")
+
+            # 剧集列表只需由第一个就绪的账号加载一次
+            if season_url and not episodes_loaded.is_set():
+                anime_access = AnimePageAccess(login_bot.driver, index_cache=self.index_cache,
+                                               lean=self.lean, spa=self.spa)
+                if anime_access.load_season_episodes(season_url) and not episodes_loaded.is_set():
+                    self.episode_urls = list(anime_access.episode_urls)
+                    episodes_loaded.set()
+
+            # 保留已登录的浏览器，执行阶段直接交给线程池，无需再次启动和登录
+            session.login_bot, login_bot = login_bot, None
+        except Exception as e:
+            self.logger.error(f"账号 {session.name} 初始化出错: {str(e)}")
+        finally:
+            if login_bot is not None:
+                try:
+                    login_bot.driver.quit()
+                except Exception:
+                    pass
+
+    def prepare(self, season_url):
+        """
+        并行登录所有账号、读取硬币余额并加载剧集列表
+        :param season_url: 番剧页面URL
+        :return: 就绪的账号数量
+        """
+        episodes_loaded = threading.Event()
+        threads = [
+            threading.Thread(target=self._prepare_session, args=(session, season_url, episodes_loaded),
+                             name=f"account-prepare-{session.name}", daemon=True)
+            for session in self.sessions
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        ready_count = sum(1 for session in self.sessions if session.ready)
+        if not self.episode_urls:
+            self.logger.error("未能获取剧集列表")
+            return 0
+        self.logger.info(f"{ready_count}/{len(self.sessions)} 个账号已就绪，共 {len(self.episode_urls)} 集")
+        return ready_count
+
+    # ------------------------------------------------------------------
+    # 调度
+    # ------------------------------------------------------------------
+    def schedule(self, episode_indices):
+        """
+        按硬币余额分配剧集：任一账号账本中已完成的剧集跳过，其余剧集依次分配给剩余容量最大的账号
+        :param episode_indices: 计划处理的剧集索引 (0-based)
+        :return: 账号名称 -> 分配的剧集索引列表
+        """
+        ready_sessions = [session for session in self.sessions if session.ready]
+        remaining = {session.name: session.capacity() for session in ready_sessions}
+        for session in ready_sessions:
+            session.assigned = []
+
+        done = set()
+        for session in ready_sessions:
+            pending = set(session.ledger.pending(session.account_id, self.episode_urls, episode_indices))
+            done.update(index for index in episode_indices if index not in pending)
+
+        unassigned = 0
+        for episode_index in episode_indices:
+            if not 0 <= episode_index < len(self.episode_urls) or episode_index in done:
+                continue
+            session = max(ready_sessions, key=lambda s: remaining[s.name], default=None)
+            if session is None or (remaining[session.name] <= 0 and not self.coinless):
+                unassigned += 1
+                continue
+            session.assigned.append(episode_index)
+            remaining[session.name] -= 1
+
+        for session in ready_sessions:
+            self.logger.info(f"账号 {session.name} 分配 {len(session.assigned)} 集，硬币余额: {session.budget.remaining}")
+        if unassigned:
+            self.logger.warning(f"硬币不足，{unassigned} 集未分配")
+        return {session.name: list(session.assigned) for session in ready_sessions}
+
+    # ------------------------------------------------------------------
+    # 执行
+    # ------------------------------------------------------------------
+    def stop(self):
+        """通知所有账号在当前剧集结束后停止"""
+        with self._pools_lock:
+            for worker_pool in self._pools:
+                worker_pool.stop()
+
+    def _run_session(self, session, should_continue):
+        worker_pool = EpisodeWorkerPool(
+            self.driver_path, session.cookie_file, self.episode_urls, session.budget,
+            workers=self.workers_per_account, http_engine=session.http_engine,
+            ledger=session.ledger, account=session.account_id, lean=self.lean, spa=self.spa,
+            event_channel=self.event_channel, coins_per_episode=self.coins_per_episode, coinless=self.coinless,
+            headless=self.headless
+        )
+        with self._pools_lock:
+            self._pools.append(worker_pool)
+        login_bot = session.release_login_bot()
+        try:
+            session.results = worker_pool.run(session.assigned, should_continue=should_continue,
+                                              login_bots=[login_bot] if login_bot is not None else None)
+        except Exception as e:
+            self.logger.error(f"账号 {session.name} 执行出错: {str(e)}")
+
+    def run(self, should_continue=None):
+        """
+        并行执行各账号已分配的剧集（需先调用schedule）
+        :param should_continue: 可选回调，返回False时停止分配新剧集
+        :return: 账号名称 -> {剧集索引: 三连结果}
+        """
+        active_sessions = [session for session in self.sessions if session.ready and session.assigned]
+        threads = [
+            threading.Thread(target=self._run_session, args=(session, should_continue),
+                             name=f"account-{session.name}", daemon=True)
+            for session in active_sessions
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        with self._pools_lock:
+            self._pools = []
+        if self.event_channel is not None:
+            self.event_channel.publish(CoinChanged(self.total_coins()))
+        return {session.name: dict(session.results) for session in active_sessions}
+
+    def total_coins(self):
+        """所有就绪账号的硬币余额之和"""
+        return sum(session.budget.remaining for session in self.sessions if session.ready)
+
+    def close(self):
+        for session in self.sessions:
+            session.close()
@@ -3,40 +3,119 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from BilibiliTripleAction import BilibiliTripleAction
+from EpisodeIndexCache import EpisodeIndexCache
+from DomWaiter import DomWaiter
+from SelectorRegistry import SelectorRegistry
+from RateLimiter import RateLimiter
+from BiliHttpEngine import BiliHttpEngine
+from concurrent.futures import ThreadPoolExecutor
 import time
 import logging
+import re
+import uuid
 
 class AnimePageAccess:
-    def __init__(self, driver):
+    # 精简导航模式下屏蔽的资源：视频分片、图片、弹幕、统计与广告
+    # 注意不能屏蔽 s1.hdslb.com/bfs/static 下的页面脚本与样式
+    LEAN_BLOCKED_URLS = [
+        "*bilivideo.com*", "*bilivideo.cn*", "*.m4s*", "*.flv*", "*.mp4*",
+        "*i0.hdslb.com/bfs/*", "*i1.hdslb.com/bfs/*", "*i2.hdslb.com/bfs/*",
+        "*.jpg*", "*.jpeg*", "*.png*", "*.gif*", "*.webp*", "*.avif*",
+        "*/x/v1/dm/*", "*/x/v2/dm/*", "*broadcast.chat.bilibili.com*",
+        "*data.bilibili.com*", "*cm.bilibili.com*", "*/x/click-interface/*",
+        "*/x/web-show/*", "*hm.baidu.com*"
+    ]
+
+    # 页面内切换剧集：标记当前工具栏为旧状态，再点击剧集列表中的链接（或调用Next.js路由）
+    SWITCH_EPISODE_SCRIPT = """
+        var epId = String(arguments[0]), url = arguments[1];
+        var pattern = new RegExp('/ep' + epId + '(?![0-9])');
+        var toolbar = document.querySelector('.toolbar-left');
+        if (!toolbar) return null;
+        toolbar.setAttribute('data-bot-stale', '1');
+        var links = document.querySelectorAll('a[href*="/ep' + epId + '"]');
+        for (var i = 0; i < links.length; i++) {
+            if (pattern.test(links[i].href)) {
+                links[i].click();
+                return 'click';
+            }
+        }
+        if (window.next && window.next.router && window.next.router.push) {
+            window.next.router.push(url);
+            return 'router';
+        }
+        toolbar.removeAttribute('data-bot-stale');
+        return null;
+    """
+
+    # 在指定名称的标签页中加载URL（不存在时新建），当前标签页保持不变
+    PREFETCH_SCRIPT = "window.open(arguments[0], arguments[1]); return true;"
+
+    def __init__(self, driver, index_cache=None, lean=False, spa=False, selectors=None,
+                 rate_limiter=None, account=None, pipeline=False):
         """
         初始化番剧页面访问类
         :param driver: WebDriver实例
+        :param index_cache: 可选EpisodeIndexCache，命中时无需加载番剧主页
+        :param lean: 精简导航模式：屏蔽媒体与第三方资源，只等待三连工具栏
+                     （建议配合 BiliLoginBot(page_load_strategy='eager') 使用）
+        :param spa: 页面内切换剧集，失败时回退到driver.get完整加载
+        :param selectors: 可选SelectorRegistry，默认使用共享注册表
+        :param rate_limiter: 可选RateLimiter，控制三连操作的节奏，默认使用共享限流器
+        :param account: 限流使用的账号标识
+        :param pipeline: 流水线模式：处理当前剧集时在另一个标签页预加载下一集，就绪后切换标签页
         """
         self.driver = driver
+        self.selectors = selectors or SelectorRegistry.shared()
+        self.rate_limiter = rate_limiter or RateLimiter.shared()
+        self.account = account
+        self.index_cache = index_cache
+        self.lean = lean
+        self._lean_enabled = False
+        self.spa = spa
+        self.pipeline = pipeline
+        # 标签页名称每次运行唯一：常驻浏览器中上次运行留下的同名窗口会被window.open复用，导致无法获得新句柄
+        tab_prefix = f"bili_tab_{uuid.uuid4().hex[:8]}"
+        self.tab_names = (f"{tab_prefix}_0", f"{tab_prefix}_1")
+        self._tabs = {}  # 标签页名称 -> 窗口句柄
+        self._active_tab = None
+        self._prefetched = None  # (剧集URL, 标签页名称)
+        self._lean_tabs = set()
+        self.waiter = DomWaiter(driver)
         self.logger = logging.getLogger('anime_access')
         self.episode_urls = []
+        self.episodes = []  # 剧集详细信息 [{url, ep_id, title}]，与episode_urls顺序一致
+        self.last_triple_result = None  # 最近一次三连结果 (1/0/-1)，未执行时为None
+        self.last_stage_durations = {}  # 最近一次处理剧集的各阶段耗时（秒）
+        self.last_coins_spent = 0  # 最近一次处理剧集实际消耗的硬币数
+        self.episode_status = {}  # 预检得到的三连状态 剧集索引 -> {like, coin, favorite}
+        self.prescanned_done = []  # 预检确认已三连的剧集索引
     
-    def navigate_and_verify_page(self, url, container_class="mediainfo_mediaInfoWrap__nCwhA", timeout=30):
+    def navigate_and_verify_page(self, url, container_class=None, timeout=30):
         """
         跳转页面并验证页面是否存在
         :param url: 要导航的URL
-        :param container_class: 验证页面存在的容器类名
+        :param container_class: 验证页面存在的容器类名，默认使用注册表中的'season_container'
         :param timeout: 超时时间（秒）
         :return: 如果页面存在返回True，否则False
         """
+        container_name = container_class or 'season_container'
         try:
             # 导航到指定URL
             self.driver.get(url)
             self.logger.info(f"已导航至: {url}")
             
-            # 等待容器出现（使用类选择器）
-            WebDriverWait(self.driver, timeout).until(
-                EC.presence_of_element_located((By.CLASS_NAME, container_class))
-            )
-            self.logger.info(f"检测到容器 {container_class}，页面验证成功")
+            # 等待容器出现
+            if container_class:
+                WebDriverWait(self.driver, timeout).until(
+                    EC.presence_of_element_located((By.CLASS_NAME, container_class))
+                )
+            else:
+                self.selectors.find(self.driver, 'season_container', timeout=timeout)
+            self.logger.info(f"检测到容器 {container_name}，页面验证成功")
             return True
         except TimeoutException:
-            self.logger.error(f"页面加载超时，未找到容器 {container_class}")
+            self.logger.error(f"页面加载超时，未找到容器 {container_name}")
             return False
         except NoSuchElementException:
             self.logger.error(f"页面元素定位失败: NoSuchElementException")
@@ -45,79 +124,126 @@ class AnimePageAccess:
             self.logger.error(f"导航并验证页面时出错: {str(e)}")
             return False
     
-    def get_all_episodes_urls(self, parent_class="numberList_wrapper___SI4W", 
-                         child_class="numberListItem_number_list_item__T2VKO", 
-                         timeout=15):
+    # 一次脚本调用提取全部剧集：优先读取页面内嵌的初始状态JSON，缺失时回退到DOM
+    EXTRACT_EPISODES_SCRIPT = """
+        var parentSelectors = arguments[0], childSelectors = arguments[1];
+        function normalize(item) {
+            var epId = item.ep_id || item.id || null;
+            var url = item.link || item.share_url || (epId ? 'https://www.bilibili.com/bangumi/play/ep' + epId : null);
+            return {url: url, ep_id: epId, title: item.show_title || item.long_title || item.title || ''};
+        }
+        function isEpisodeList(node) {
+            return Array.isArray(node) && node.length > 0 && node[0] && typeof node[0] === 'object'
+                && ('ep_id' in node[0] || ('id' in node[0] && ('link' in node[0] || 'share_url' in node[0])));
+        }
+        function findEpisodes(node, depth) {
+            if (!node || typeof node !== 'object' || depth > 15) return null;
+            if (Array.isArray(node)) {
+                for (var i = 0; i < node.length; i++) {
+                    var found = findEpisodes(node[i], depth + 1);
+                    if (found) return found;
+                }
+                return null;
+            }
+            var keys = ['epList', 'episodes'];
+            for (var k = 0; k < keys.length; k++) {
+                if (isEpisodeList(node[keys[k]])) return node[keys[k]];
+            }
+            for (var key in node) {
+                if (Object.prototype.hasOwnProperty.call(node, key)) {
+                    var result = findEpisodes(node[key], depth + 1);
+                    if (result) return result;
+                }
+            }
+            return null;
+        }
+        var list = findEpisodes(window.__INITIAL_STATE__, 0);
+        if (!list) {
+            var nextData = document.getElementById('__NEXT_DATA__');
+            if (nextData) {
+                try { list = findEpisodes(JSON.parse(nextData.textContent), 0); } catch (e) {}
+            }
+        }
+        if (list) {
+            return {source: 'state', episodes: list.map(normalize).filter(function(ep) { return ep.url; })};
+        }
+        // 按优先级依次尝试 父容器 x 子项 候选组合，返回命中的组合供统计
+        for (var p = 0; p < parentSelectors.length; p++) {
+            for (var c = 0; c < childSelectors.length; c++) {
+                var items = document.querySelectorAll(parentSelectors[p] + ' ' + childSelectors[c]);
+                if (!items.length) continue;
+                var episodes = [];
+                for (var i = 0; i < items.length; i++) {
+                    var a = items[i].querySelector('a');
+                    if (!a || !a.href) continue;
+                    var match = a.href.match(/\\/ep(\\d+)/);
+                    episodes.push({url: a.href, ep_id: match ? parseInt(match[1], 10) : null,
+                                   title: items[i].getAttribute('title') || ''});
+                }
+                return {source: 'dom', episodes: episodes, parent: parentSelectors[p], child: childSelectors[c]};
+            }
+        }
+        return {source: 'dom', episodes: []};
+    """
+
+    def extract_episodes(self, parent_class=None, child_class=None):
+        """
+        单次脚本调用提取剧集列表
+        :param parent_class: 父容器类名，默认使用注册表中'episode_list'的候选
+        :param child_class: 子容器类名，默认使用注册表中'episode_item'的候选
+        :return: (数据来源 'state'/'dom', 剧集字典列表 [{url, ep_id, title}])
         """
-        获取所有剧集URL
-        :param parent_class: 父容器类名
-        :param child_class: 子容器类名
+        parent_selectors = ['.' + parent_class] if parent_class else self.selectors.ranked_css('episode_list')
+        child_selectors = ['.' + child_class] if child_class else self.selectors.ranked_css('episode_item')
+        result = self.driver.execute_script(self.EXTRACT_EPISODES_SCRIPT, parent_selectors, child_selectors) or {}
+        
+        # DOM提取时记录命中的候选，失效的类名自动降级
+        if result.get('source') == 'dom' and result.get('episodes'):
+            if not parent_class:
+                self.selectors.record_css_match('episode_list', result.get('parent'))
+            if not child_class:
+                self.selectors.record_css_match('episode_item', result.get('child'))
+        return result.get('source'), result.get('episodes') or []
+
+    def get_all_episodes_urls(self, parent_class=None, child_class=None, timeout=15):
+        """
+        获取所有剧集URL（结果同时保存在 episode_urls 与 episodes 中）
+        :param parent_class: 父容器类名，默认使用注册表
+        :param child_class: 子容器类名，默认使用注册表
         :param timeout: 超时时间（秒）
-        :return: 所有剧集URL列表，如果失败则返回空列表
+        :return: 是否成功获取
         """
+        parent_name = parent_class or 'episode_list'
+        child_name = child_class or 'episode_item'
         try:
-            self.logger.info(f"在容器 {parent_class} 中查找所有剧集URL...")
-            
-            # 1. 等待父容器出现
-            parent_container = WebDriverWait(self.driver, timeout).until(
-                EC.presence_of_element_located((By.CLASS_NAME, parent_class))
-            )
-            self.logger.info(f"成功找到父容器: {parent_class}")
+            self.logger.info(f"在容器 {parent_name} 中查找所有剧集URL...")
             
-            # 2. 滚动到父容器（确保可见）
-            self.driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", parent_container)
-            self.logger.info("已滚动到父容器")
-            time.sleep(0.5)  # 等待滚动完成
+            # 1. 页面内嵌状态可用时无需等待列表渲染
+            source, episodes = self.extract_episodes(parent_class, child_class)
             
-            # 3. 查找所有子容器（使用更健壮的等待）
-            child_containers = WebDriverWait(parent_container, timeout).until(
-                lambda container: container.find_elements(By.CLASS_NAME, child_class)
-            )
-            
-            if not child_containers:
-                # 特殊情况：再次尝试查找（有时需要额外等待）
-                self.logger.warning("首次查找无结果，尝试再次查找...")
-                time.sleep(1)  # 额外等待1秒
-                child_containers = parent_container.find_elements(By.CLASS_NAME, child_class)
+            # 2. 否则等待父容器出现后从DOM提取
+            if not episodes:
+                if parent_class:
+                    WebDriverWait(self.driver, timeout).until(
+                        EC.presence_of_element_located((By.CLASS_NAME, parent_class))
+                    )
+                else:
+                    self.selectors.find(self.driver, 'episode_list', timeout=timeout)
+                self.logger.info(f"成功找到父容器: {parent_name}")
+                source, episodes = self.extract_episodes(parent_class, child_class)
             
-            if not child_containers:
-                self.logger.error(f"父容器中没有找到任何'{child_class}'子项")
+            if not episodes:
+                self.logger.error(f"父容器中没有找到任何'{child_name}'子项")
                 return False
             
-            # 4. 记录找到的子容器数量
-            total_episodes = len(child_containers)
-            self.logger.info(f"找到 {total_episodes} 个剧集")
-
-            # 6. 遍历所有子容器，获取每个URL
-            for idx, child_container in enumerate(child_containers):
-                try:
-                    # 7. 确保子容器可见（重点！）
-                    self.driver.execute_script(
-                        "arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", 
-                        child_container
-                    )
-                    time.sleep(0.1)  # 短暂等待滚动完成
-                    
-                    # 8. 查找<a>标签获取URL
-                    a_tag = child_container.find_element(By.TAG_NAME, "a")
-                    episode_url = a_tag.get_attribute("href")
-                    
-                    # 9. 记录详细信息
-                    #title = child_container.get_attribute("title")
-                    #self.logger.info(f"获取剧集 {idx+1}/{total_episodes} URL (标题: {title}): {episode_url}")
-
-                    self.episode_urls.append(episode_url)
-
-                except Exception as e:
-                    self.logger.error(f"获取第 {idx+1} 个剧集URL时出错: {str(e)}")
-                    continue  # 继续处理下一个
-            
-            # 10. 返回所有URL列表
-            self.logger.info(f"成功获取 {len(self.episode_urls)}/{total_episodes} 个剧集URL")
+            # 3. 保存剧集信息
+            self.episodes = episodes
+            self.episode_urls = [episode['url'] for episode in episodes]
+            self.logger.info(f"成功获取 {len(self.episode_urls)} 个剧集URL (来源: {source})")
             return True
 
         except TimeoutException:
-            self.logger.error(f"查找容器超时: {parent_class} 或 {child_class}")
+            self.logger.error(f"查找容器超时: {parent_name} 或 {child_name}")
             # 尝试截图辅助调试
             try:
                 self.driver.save_screenshot("error_find_containers.png")
@@ -129,14 +255,59 @@ class AnimePageAccess:
             self.logger.error(f"获取所有URL时出错: {str(e)}")
             return False
 
+    def load_season_episodes(self, season_url, parent_class=None, child_class=None, timeout=15):
+        """
+        获取番剧的剧集列表：优先读取本地索引，未命中时导航至番剧页面抓取并写入索引
+        :param season_url: 番剧页面URL
+        :return: 是否成功获取
+        """
+        season_id = EpisodeIndexCache.parse_season_id(season_url)
+        if self.index_cache is not None and season_id:
+            episodes = self.index_cache.get(season_id)
+            if episodes:
+                self.episodes = episodes
+                self.episode_urls = [episode['url'] for episode in episodes]
+                self.logger.info(f"使用本地剧集索引 {season_id}，共 {len(self.episode_urls)} 集")
+                return True
+
+        if not self.navigate_and_verify_page(season_url):
+            return False
+        if not self.get_all_episodes_urls(parent_class=parent_class, child_class=child_class, timeout=timeout):
+            return False
+
+        if self.index_cache is not None and season_id:
+            self.index_cache.put(season_id, self.episodes)
+        return True
+
+    def invalidate_season_episodes(self, season_url):
+        """使指定番剧的本地剧集索引失效"""
+        season_id = EpisodeIndexCache.parse_season_id(season_url)
+        if self.index_cache is not None and season_id:
+            self.index_cache.invalidate(season_id)
+
+    def enable_lean_profile(self):
+        """通过CDP屏蔽剧集页面中与三连无关的资源（对后续所有导航生效）"""
+        try:
+            self.driver.execute_cdp_cmd("Network.enable", {})
+            self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": self.LEAN_BLOCKED_URLS})
+            self._lean_enabled = True
+            self.logger.info(f"已启用精简导航，屏蔽 {len(self.LEAN_BLOCKED_URLS)} 类资源")
+        except Exception as e:
+            self.logger.warning(f"启用资源屏蔽失败，使用完整加载: {str(e)}")
+            self.lean = False
+
     def navigate_to_episode_page(self, episode_url, timeout=30):
         """
         跳转至剧集页面并覆盖当前页
         :param episode_url: 剧集URL
-        :param container_class: 验证页面存在的容器类名
         :param timeout: 超时时间（秒）
         :return: 如果导航并验证成功返回True，否则False
         """
+        if self.lean and not self._lean_enabled:
+            self.enable_lean_profile()
+        if self.lean:
+            return self._navigate_lean(episode_url, timeout)
+
         try:
             self.driver.get(episode_url)
             self.logger.info(f"已跳转至剧集页面: {episode_url}")
@@ -168,14 +339,256 @@ class AnimePageAccess:
         except Exception as e:
             self.logger.error(f"导航至剧集页面时出错: {str(e)}")
             return False
-    def process_specific_episode(self, episode_index, delay=1.0, triple_action=False):
+
+    @staticmethod
+    def _parse_ep_id(episode_url):
+        match = re.search(r'/ep(\d+)', episode_url or '')
+        return int(match.group(1)) if match else None
+
+    def switch_episode_in_page(self, episode_url, timeout=8):
+        """
+        在已加载的播放页内切换剧集（不重新加载整个页面）
+        :param episode_url: 目标剧集URL
+        :param timeout: 等待工具栏按新剧集重新渲染的超时时间（秒）
+        :return: 是否切换成功，失败时调用方应回退到完整导航
+        """
+        ep_id = self._parse_ep_id(episode_url)
+        if ep_id is None:
+            return False
+        try:
+            if '/bangumi/play/' not in (self.driver.current_url or ''):
+                return False
+            method = self.driver.execute_script(self.SWITCH_EPISODE_SCRIPT, ep_id, episode_url)
+            if not method:
+                self.logger.info(f"页面内未找到 ep{ep_id} 的入口，改为完整加载")
+                return False
+
+            # 地址已切换到新剧集，且旧工具栏已被替换
+            condition = (
+                f"/\\/ep{ep_id}(?![0-9])/.test(location.pathname) "
+                f"&& exists('.toolbar-left') && !exists('.toolbar-left[data-bot-stale]')"
+            )
+            if self.waiter.until(condition, timeout):
+                self.logger.info(f"已在页面内切换至剧集 ep{ep_id} (方式: {method})")
+                return True
+            self.logger.warning(f"页面内切换至 ep{ep_id} 后工具栏未重新渲染，改为完整加载")
+            return False
+        except Exception as e:
+            self.logger.warning(f"页面内切换剧集出错，改为完整加载: {str(e)}")
+            return False
+
+    def _navigate_lean(self, episode_url, timeout):
+        """精简导航：不等待播放器，三连工具栏可见即返回"""
+        try:
+            self.driver.get(episode_url)
+            self.logger.info(f"已跳转至剧集页面(精简模式): {episode_url}")
+            WebDriverWait(self.driver, timeout).until(
+                EC.visibility_of_element_located((By.CSS_SELECTOR, ".toolbar-left"))
+            )
+            return True
+        except TimeoutException:
+            self.logger.error("三连工具栏加载超时")
+            return False
+        except Exception as e:
+            self.logger.error(f"导航至剧集页面时出错: {str(e)}")
+            return False
+
+    def prefetch_episode(self, episode_url):
+        """
+        在备用标签页中预加载剧集（不切换当前标签页，页面加载与当前剧集的操作并行）
+        :param episode_url: 剧集URL
+        :return: 是否已开始预加载
+        """
+        try:
+            if self._active_tab is None:
+                self._active_tab = self.tab_names[0]
+                self.driver.execute_script("window.name = arguments[0];", self._active_tab)
+                self._tabs[self._active_tab] = self.driver.current_window_handle
+                if self._lean_enabled:
+                    self._lean_tabs.add(self._active_tab)
+            spare_tab = self.tab_names[1] if self._active_tab == self.tab_names[0] else self.tab_names[0]
+
+            if spare_tab not in self._tabs:
+                # 精简模式下先以空白页打开标签页：CDP资源屏蔽只作用于当前标签页，需在加载剧集前启用
+                known_handles = set(self.driver.window_handles)
+                self.driver.execute_script(self.PREFETCH_SCRIPT, "about:blank" if self.lean else episode_url,
+                                           spare_tab)
+                new_handles = [handle for handle in self.driver.window_handles if handle not in known_handles]
+                if not new_handles:
+                    self.logger.warning("未能打开预加载标签页，关闭流水线模式")
+                    self.pipeline = False
+                    return False
+                self._tabs[spare_tab] = new_handles[0]
+                if self.lean:
+                    self._enable_lean_on_tab(spare_tab)
+                    self.driver.execute_script(self.PREFETCH_SCRIPT, episode_url, spare_tab)
+            else:
+                self.driver.execute_script(self.PREFETCH_SCRIPT, episode_url, spare_tab)
+
+            self._prefetched = (episode_url, spare_tab)
+            self.logger.info(f"已在后台标签页预加载: {episode_url}")
+            return True
+        except Exception as e:
+            self.logger.warning(f"预加载剧集失败: {str(e)}")
+            self._prefetched = None
+            return False
+
+    def _enable_lean_on_tab(self, tab_name):
+        """切换到指定标签页启用资源屏蔽后切回当前标签页"""
+        if tab_name in self._lean_tabs:
+            return
+        self.driver.switch_to.window(self._tabs[tab_name])
+        try:
+            self.enable_lean_profile()
+            if self.lean:
+                self._lean_tabs.add(tab_name)
+        finally:
+            self.driver.switch_to.window(self._tabs[self._active_tab])
+
+    def _activate_prefetched(self, episode_url, timeout=10):
+        """
+        切换到已预加载目标剧集的标签页，等待三连工具栏就绪
+        :return: 是否可直接在该标签页操作，失败时调用方在当前标签页重新导航
+        """
+        if not self._prefetched or self._prefetched[0] != episode_url:
+            return False
+        tab_name = self._prefetched[1]
+        self._prefetched = None
+        try:
+            self.driver.switch_to.window(self._tabs[tab_name])
+            self._active_tab = tab_name
+            # CDP资源屏蔽只对当前标签页生效（预加载时通常已启用）
+            if self.lean and tab_name not in self._lean_tabs:
+                self.enable_lean_profile()
+                self._lean_tabs.add(tab_name)
+
+            ep_id = self._parse_ep_id(episode_url)
+            condition = f"/\\/ep{ep_id}(?![0-9])/.test(location.pathname) && exists('.toolbar-left')"
+            if self.waiter.until(condition, timeout):
+                self.logger.info(f"已切换至预加载的标签页: {episode_url}")
+                return True
+            self.logger.warning("预加载的标签页未就绪，改为重新导航")
+            return False
+        except Exception as e:
+            self.logger.warning(f"切换预加载标签页失败: {str(e)}")
+            return False
+
+    def close_spare_tab(self):
         """
-        处理指定剧集 (跳转 + 执行操作)
+        关闭流水线模式打开的备用标签页，只保留当前标签页（运行结束时调用，
+        连接常驻浏览器时避免每次运行遗留一个标签页）
+        :return: 是否关闭了标签页
+        """
+        spare_handles = [handle for name, handle in self._tabs.items() if name != self._active_tab]
+        self._prefetched = None
+        if not spare_handles:
+            return False
+        try:
+            active_handle = self._tabs.get(self._active_tab)
+            for handle in spare_handles:
+                if handle in self.driver.window_handles:
+                    self.driver.switch_to.window(handle)
+                    self.driver.close()
+            if active_handle is not None:
+                self.driver.switch_to.window(active_handle)
+            self._tabs = {name: handle for name, handle in self._tabs.items() if name == self._active_tab}
+            self._lean_tabs &= set(self._tabs)
+            self.logger.info("已关闭预加载标签页")
+            return True
+        except Exception as e:
+            self.logger.warning(f"关闭预加载标签页失败: {str(e)}")
+            return False
+
+    def prescan_episodes(self, episode_indices, http_engine=None, api_base=BiliHttpEngine.API_BASE, max_workers=8):
+        """
+        批量预检剧集的三连状态：剧集aid由一次季度接口得到，点赞/投币/收藏状态并发查询，
+        已三连的剧集无需加载页面
+        :param episode_indices: 待检查的剧集索引
+        :param http_engine: 可选BiliHttpEngine，未提供时使用浏览器当前cookie临时创建
+        :param api_base: 临时创建引擎时使用的接口根地址
+        :param max_workers: 并发查询数量
+        :return: 仍需操作的剧集索引（保持原顺序），状态查询失败的剧集视为需要操作
+        """
+        episode_indices = [index for index in episode_indices if 0 <= index < len(self.episode_urls)]
+        self.episode_status = {}
+        self.prescanned_done = []
+        if not episode_indices:
+            return []
+
+        engine = http_engine
+        if engine is None:
+            try:
+                engine = BiliHttpEngine(cookies=self.driver.get_cookies(), api_base=api_base, pool_size=max_workers)
+            except Exception as e:
+                self.logger.warning(f"无法创建预检引擎，跳过预检: {str(e)}")
+                return episode_indices
+
+        def fetch_relation(aid):
+            # 单集查询失败只影响该集，不中断整个预检
+            try:
+                return engine.get_relation(aid)
+            except Exception as e:
+                self.logger.warning(f"预检稿件 av{aid} 失败: {str(e)}")
+                return None
+
+        start_time = time.time()
+        try:
+            # 同一季度的aid在首次查询后缓存，其余剧集无需额外请求
+            aids = {}
+            for index in episode_indices:
+                try:
+                    ep_id = engine.parse_ep_id(self.episode_urls[index])
+                    aid = engine.get_episode_aid(ep_id) if ep_id is not None else None
+                except Exception as e:
+                    self.logger.warning(f"获取第 {index+1} 集aid失败，该集按需要操作处理: {str(e)}")
+                    continue
+                if aid is not None:
+                    aids[index] = aid
+
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                relations = dict(zip(aids, executor.map(fetch_relation, aids.values())))
+        except Exception as e:
+            self.logger.warning(f"预检三连状态失败，全部剧集按需要操作处理: {str(e)}")
+            return episode_indices
+        finally:
+            if http_engine is None:
+                engine.close()
+
+        pending = []
+        for index in episode_indices:
+            relation = relations.get(index)
+            if relation is None:
+                pending.append(index)
+                continue
+            status = {
+                'like': bool(relation.get('like')),
+                'coin': relation.get('coin', 0),
+                'favorite': bool(relation.get('favorite'))
+            }
+            self.episode_status[index] = status
+            if status['like'] and status['coin'] > 0 and status['favorite']:
+                self.prescanned_done.append(index)
+            else:
+                pending.append(index)
+
+        self.logger.info(f"预检 {len(episode_indices)} 集耗时 {time.time()-start_time:.2f}秒: "
+                         f"已三连 {len(self.prescanned_done)} 集，待处理 {len(pending)} 集")
+        return pending
+
+    def process_specific_episode(self, episode_index, triple_action=False, http_engine=None, next_index=None,
+                                 coins=BilibiliTripleAction.DEFAULT_COINS):
+        """
+        处理指定剧集 (跳转 + 执行操作)，操作节奏由限流器控制，不再使用固定延迟
         :param episode_index: 剧集索引 (0-based)
-        :param delay: 操作后延迟 (秒)
-        :param like_function: 点赞函数 (可选)
+        :param triple_action: 是否执行一键三连
+        :param http_engine: 可选BiliHttpEngine，优先通过接口三连，失败时回退到浏览器操作
+        :param next_index: 下一个要处理的剧集索引，流水线模式下在操作当前剧集前开始预加载
+        :param coins: 本集投币数量 (0/1/2)，由CoinPlanner决定，0表示只点赞和收藏
         :return: 是否成功处理
         """
+        self.last_triple_result = None
+        self.last_stage_durations = {}
+        self.last_coins_spent = 0
         try:
             self.logger.info(f"开始处理第 {episode_index+1} 集...")
             
@@ -193,34 +606,56 @@ class AnimePageAccess:
             target_url = self.episode_urls[episode_index]
             self.logger.info(f"目标URL: {target_url}")
             
-            # 导航到剧集页面
-            if not self.navigate_to_episode_page(target_url):
+            # 优先使用HTTP引擎，无需加载页面
+            if triple_action and http_engine is not None:
+                stage_start = time.time()
+                triple_result = http_engine.check_and_operate(target_url, coins=coins)
+                self.last_stage_durations['http'] = time.time() - stage_start
+                self.last_coins_spent = http_engine.last_coins_spent
+                if triple_result in (0, 1):
+                    self.last_triple_result = triple_result
+                    self.logger.info(f"第 {episode_index+1} 集通过接口处理完成")
+                    return True
+                self.logger.warning("接口三连失败，回退到浏览器操作")
+            
+            # 导航到剧集页面（SPA模式下优先在页面内切换）
+            stage_start = time.time()
+            navigated = (
+                self._activate_prefetched(target_url)
+                or (self.spa and self.switch_episode_in_page(target_url))
+                or self.navigate_to_episode_page(target_url)
+            )
+            self.last_stage_durations['navigate'] = time.time() - stage_start
+            if not navigated:
                 self.logger.error(f"跳转到第 {episode_index+1} 集失败")
                 return False
             
             self.logger.info(f"成功进入第 {episode_index+1} 集页面")
             
-            # 添加短暂等待确保页面加载
-            time.sleep(0.5)
+            # 流水线模式：下一集在后台标签页加载，与本集的三连操作并行（接口三连时无需预加载）
+            if (self.pipeline and http_engine is None and next_index is not None
+                    and 0 <= next_index < len(self.episode_urls)):
+                self.prefetch_episode(self.episode_urls[next_index])
             
             # 执行一键三连操作
+            stage_start = time.time()
             if triple_action:
                 # 创建操作实例
-                triple_operator = BilibiliTripleAction(self.driver)
+                triple_operator = BilibiliTripleAction(self.driver, selectors=self.selectors,
+                                                       rate_limiter=self.rate_limiter, account=self.account,
+                                                       coins=coins)
                 
                 # 使用长按方式
                 triple_result = triple_operator.check_and_operate()
+                self.last_triple_result = triple_result
+                self.last_coins_spent += triple_operator.coins_spent
                 if triple_result == 1:
                     self.logger.info("成功执行一键三连操作")
                 elif triple_result == 0:
                     self.logger.info("该剧集已三连，无需操作")
                 else:
                     self.logger.warning("一键三连操作失败")
-            
-            # 添加操作后延迟
-            if delay > 0:
-                self.logger.info(f"等待 {delay} 秒...")
-                time.sleep(delay)
+                self.last_stage_durations['triple'] = time.time() - stage_start
             
             self.logger.info(f"第 {episode_index+1} 集处理完成")
             return True
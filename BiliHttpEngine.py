@@ -0,0 +1,329 @@
+import http.client
+import json
+import logging
+import pickle
+import re
+import select
+import threading
+from urllib.parse import urlencode, urlsplit
+from RateLimiter import RateLimiter
+
+
+class BiliHttpEngine:
+    """
+    无浏览器的三连引擎：复用保存的登录cookie，通过长连接HTTP接口完成点赞/投币/收藏
+    check_and_operate 与 BilibiliTripleAction 保持相同的返回约定 (1/0/-1)
+    """
+
+    API_BASE = "https://api.bilibili.com"
+    USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
+
+    # 接口返回码：已点赞 / 投币已达上限 视为已完成
+    CODE_ALREADY_LIKED = 65006
+    CODE_COIN_LIMIT = 34005
+    # 风控/请求过于频繁的返回码（-412 请求被拦截，-509 请求过于频繁，34004 投币间隔太短）
+    THROTTLE_CODES = (-412, -509, 34004)
+
+    def __init__(self, cookie_file="bili_cookies.pkl", api_base=API_BASE, timeout=10, pool_size=4, cookies=None,
+                 rate_limiter=None):
+        """
+        :param cookie_file: BiliLoginBot.save_cookies 保存的cookie文件
+        :param cookies: 可选，直接传入selenium格式的cookie列表（如driver.get_cookies()），此时忽略cookie_file
+        :param api_base: 接口根地址（可替换为本地模拟服务器）
+        :param timeout: 单次请求超时（秒）
+        :param pool_size: 连接池保留的空闲长连接数量
+        :param rate_limiter: 可选RateLimiter，默认使用共享限流器（与浏览器操作共用同一账号的令牌桶）
+        """
+        self.logger = logging.getLogger('bili_http_engine')
+        self.api_base = api_base.rstrip('/')
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self._idle_connections = []
+        self._pool_lock = threading.Lock()
+        self._episode_cache = {}
+        self._folder_id = None
+        self._local = threading.local()  # 各线程最近一次操作的返回码与实际消耗的硬币数
+        self.rate_limiter = rate_limiter or RateLimiter.shared()
+
+        if cookies is not None:
+            self.cookies = {cookie['name']: cookie['value'] for cookie in cookies}
+        else:
+            self.cookies = self._load_cookies(cookie_file)
+        self.csrf = self.cookies.get('bili_jct', '')
+        self.mid = self.cookies.get('DedeUserID', '')
+
+    def _load_cookies(self, cookie_file):
+        """读取selenium格式的cookie文件，转换为 name -> value 字典"""
+        try:
+            with open(cookie_file, 'rb') as file:
+                cookies = pickle.load(file)
+            return {cookie['name']: cookie['value'] for cookie in cookies}
+        except Exception as e:
+            self.logger.error(f"加载cookies失败: {str(e)}")
+            return {}
+
+    # ------------------------------------------------------------------
+    # 连接池
+    # ------------------------------------------------------------------
+    def _new_connection(self):
+        parts = urlsplit(self.api_base)
+        if parts.scheme == 'https':
+            return http.client.HTTPSConnection(parts.netloc, timeout=self.timeout)
+        return http.client.HTTPConnection(parts.netloc, timeout=self.timeout)
+
+    @staticmethod
+    def _is_stale(connection):
+        """空闲连接上出现可读数据（通常是服务器关闭连接产生的EOF）说明该长连接已不可用"""
+        if connection.sock is None:
+            return True
+        try:
+            readable, _, _ = select.select([connection.sock], [], [], 0)
+        except (OSError, ValueError):
+            return True
+        return bool(readable)
+
+    def _acquire_connection(self):
+        """
+        取出一个空闲长连接，已被服务器关闭的连接直接丢弃
+        :return: (连接, 是否为复用的长连接)
+        """
+        while True:
+            with self._pool_lock:
+                if not self._idle_connections:
+                    break
+                connection = self._idle_connections.pop()
+            if not self._is_stale(connection):
+                return connection, True
+            connection.close()
+        return self._new_connection(), False
+
+    def _release_connection(self, connection):
+        with self._pool_lock:
+            if len(self._idle_connections) < self.pool_size:
+                self._idle_connections.append(connection)
+                return
+        connection.close()
+
+    def close(self):
+        """关闭连接池中的所有长连接"""
+        with self._pool_lock:
+            connections, self._idle_connections = self._idle_connections, []
+        for connection in connections:
+            connection.close()
+
+    def _request(self, method, path, params=None, data=None, referer="https://www.bilibili.com"):
+        """
+        发送请求并解析JSON
+        :return: 接口返回的JSON字典，失败返回None
+        """
+        base_path = urlsplit(self.api_base).path
+        url = base_path + path
+        if params:
+            url += '?' + urlencode(params)
+
+        headers = {
+            'User-Agent': self.USER_AGENT,
+            'Referer': referer,
+            'Origin': 'https://www.bilibili.com',
+            'Cookie': '; '.join(f"{name}={value}" for name, value in self.cookies.items()),
+            'Connection': 'keep-alive',
+        }
+        body = None
+        if data is not None:
+            body = urlencode(data)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+
+        # 复用的长连接可能在检查之后才被服务器关闭，仅在确定请求未被处理时用新连接重试一次
+        for attempt in range(2):
+            connection, reused = self._acquire_connection()
+            sent = False
+            try:
+                connection.request(method, url, body=body, headers=headers)
+                sent = True
+                response = connection.getresponse()
+                payload = response.read()
+                if response.will_close:
+                    connection.close()
+                else:
+                    self._release_connection(connection)
+                if response.status == 412:
+                    # 风控拦截时返回的是HTML页面，统一转换为限流返回码
+                    return {'code': -412, 'message': 'request blocked'}
+                return json.loads(payload.decode('utf-8'))
+            except (http.client.HTTPException, ConnectionError, OSError) as e:
+                connection.close()
+                if attempt == 0 and self._can_retry(method, reused, sent, e):
+                    self.logger.debug(f"长连接已失效，使用新连接重试: {method} {path}")
+                    continue
+                self.logger.error(f"请求失败: {method} {path} - {str(e)}")
+                return None
+            except ValueError as e:
+                connection.close()
+                self.logger.error(f"响应解析失败: {method} {path} - {str(e)}")
+                return None
+        return None
+
+    @staticmethod
+    def _can_retry(method, reused, sent, error):
+        """
+        请求失败后是否可以安全重试
+        只有复用的长连接才可能是失效连接；写入时连接已断开说明服务器未收到请求，
+        GET在收到任何响应前被断开也可以重发，POST一旦发出就不再重试，避免重复点赞/投币/收藏
+        """
+        if not reused:
+            return False
+        if not sent:
+            return isinstance(error, (BrokenPipeError, ConnectionResetError))
+        return method == 'GET' and isinstance(error, http.client.RemoteDisconnected)
+
+    # ------------------------------------------------------------------
+    # 接口封装
+    # ------------------------------------------------------------------
+    @staticmethod
+    def parse_ep_id(episode_url):
+        """从剧集URL中解析ep_id"""
+        match = re.search(r'/ep(\d+)', episode_url or '')
+        return int(match.group(1)) if match else None
+
+    def get_nav_info(self):
+        """
+        查询导航接口（登录状态、用户ID、硬币余额等）
+        :return: 接口data字典，失败返回None
+        """
+        result = self._request('GET', '/x/web-interface/nav')
+        if not result or 'data' not in result:
+            return None
+        return result['data']
+
+    def is_logged_in(self):
+        """通过导航接口确认登录状态"""
+        nav_info = self.get_nav_info()
+        return bool(nav_info and nav_info.get('isLogin'))
+
+    def get_episode_aid(self, ep_id):
+        """查询剧集对应的稿件aid（带缓存）"""
+        if ep_id in self._episode_cache:
+            return self._episode_cache[ep_id]
+
+        result = self._request('GET', '/pgc/view/web/season', params={'ep_id': ep_id})
+        if not result or result.get('code') != 0:
+            self.logger.error(f"获取剧集信息失败: ep{ep_id}")
+            return None
+
+        # 番剧下架或地区限制时result可能为null
+        for episode in (result.get('result') or {}).get('episodes') or []:
+            self._episode_cache[episode.get('id')] = episode.get('aid')
+        return self._episode_cache.get(ep_id)
+
+    def get_relation(self, aid):
+        """查询稿件的点赞/投币/收藏状态"""
+        result = self._request('GET', '/x/web-interface/archive/relation', params={'aid': aid})
+        if not result or result.get('code') != 0:
+            return None
+        return result.get('data')
+
+    def get_default_folder_id(self):
+        """获取默认收藏夹ID（带缓存）"""
+        if self._folder_id is not None:
+            return self._folder_id
+
+        result = self._request('GET', '/x/v3/fav/folder/created/list-all', params={'up_mid': self.mid, 'type': 2})
+        try:
+            self._folder_id = result['data']['list'][0]['id']
+        except (TypeError, KeyError, IndexError):
+            self.logger.error("获取默认收藏夹失败")
+        return self._folder_id
+
+    def _paced_post(self, action, path, data, referer, ok_codes):
+        """
+        经限流器发送操作请求：成功时提高速率，被限流时退避，其他失败连续达到阈值时退避
+        :return: 返回码是否属于ok_codes
+        """
+        self.rate_limiter.acquire(self.mid, action)
+        result = self._request('POST', path, data=data, referer=referer)
+        code = result.get('code') if result else None
+        self._local.last_code = code
+        if code in self.THROTTLE_CODES:
+            self.rate_limiter.on_throttle(self.mid, action)
+            return False
+        if code in ok_codes:
+            self.rate_limiter.on_success(self.mid, action)
+            return True
+        self.rate_limiter.on_failure(self.mid, action)
+        return False
+
+    def like(self, aid, referer):
+        return self._paced_post('like', '/x/web-interface/archive/like',
+                                {'aid': aid, 'like': 1, 'csrf': self.csrf}, referer,
+                                (0, self.CODE_ALREADY_LIKED))
+
+    def add_coin(self, aid, referer, multiply=2):
+        return self._paced_post('coin', '/x/web-interface/coin/add',
+                                {'aid': aid, 'multiply': multiply, 'select_like': 0, 'csrf': self.csrf}, referer,
+                                (0, self.CODE_COIN_LIMIT))
+
+    def add_favorite(self, aid, referer):
+        folder_id = self.get_default_folder_id()
+        if folder_id is None:
+            return False
+        return self._paced_post('favorite', '/x/v3/fav/resource/deal',
+                                {'rid': aid, 'type': 2, 'add_media_ids': folder_id,
+                                 'del_media_ids': '', 'csrf': self.csrf}, referer,
+                                (0,))
+
+    @property
+    def last_coins_spent(self):
+        """当前线程最近一次check_and_operate实际消耗的硬币数"""
+        return getattr(self._local, 'coins_spent', 0)
+
+    def check_and_operate(self, episode_url, coins=2):
+        """
+        主操作逻辑（HTTP版本）
+        :param episode_url: 剧集URL
+        :param coins: 本集投币数量 (0/1/2)，0表示只点赞和收藏
+        :return: 1 完成三连 / 0 已三连 / -1 失败（调用方可回退到浏览器操作）
+        """
+        self._local.coins_spent = 0
+        try:
+            ep_id = self.parse_ep_id(episode_url)
+            if ep_id is None:
+                self.logger.error(f"无法从URL解析ep_id: {episode_url}")
+                return -1
+
+            aid = self.get_episode_aid(ep_id)
+            if aid is None:
+                return -1
+
+            relation = self.get_relation(aid)
+            if relation is None:
+                self.logger.error(f"查询三连状态失败: ep{ep_id}")
+                return -1
+
+            liked = bool(relation.get('like'))
+            coined = relation.get('coin', 0) > 0 or coins <= 0
+            favorited = bool(relation.get('favorite'))
+            if liked and coined and favorited:
+                self.logger.info(f"ep{ep_id} 已三连，无需操作")
+                return 0
+
+            results = []
+            if not liked:
+                results.append(self.like(aid, episode_url))
+            if not coined:
+                coin_result = self.add_coin(aid, episode_url, multiply=coins)
+                # 投币已达上限(34005)时不消耗硬币
+                if coin_result and self._local.last_code == 0:
+                    self._local.coins_spent = coins
+                results.append(coin_result)
+            if not favorited:
+                results.append(self.add_favorite(aid, episode_url))
+
+            if all(results):
+                self.logger.info(f"ep{ep_id} 三连操作成功完成")
+                return 1
+
+            self.logger.warning(f"ep{ep_id} 三连操作存在失败步骤")
+            return -1
+        except Exception as e:
+            self.logger.error(f"HTTP三连操作过程中出错: {str(e)}")
+            return -1
@@ -6,19 +6,65 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 import logging
 import pickle
+import os
 import time
+from BiliHttpEngine import BiliHttpEngine
+from SelectorRegistry import SelectorRegistry
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger('bilibili_bot')
 
 class BiliLoginBot:
-    def __init__(self, driver_path):
-        """初始化浏览器驱动"""
-        self.service = ChromeService(executable_path=driver_path)
+    LOGIN_URL = "https://passport.bilibili.com/login"
+    HOME_URL = "https://www.bilibili.com"
+
+    def __init__(self, driver_path=None, page_load_strategy="normal", selectors=None, headless=False,
+                 login_url=LOGIN_URL, home_url=HOME_URL, api_base=BiliHttpEngine.API_BASE, driver=None,
+                 debugger_address=None):
+        """
+        初始化浏览器驱动
+        :param driver_path: ChromeDriver路径，为None时由Selenium自动查找
+        :param page_load_strategy: 页面加载策略 (normal/eager)，eager在DOM就绪后即返回，不等待视频等资源
+        :param selectors: 可选SelectorRegistry，默认使用共享注册表
+        :param headless: 是否以无界面模式运行（服务器环境）
+        :param login_url: 登录页面地址（可替换为本地模拟站点）
+        :param home_url: 主站首页地址
+        :param api_base: 接口根地址
+        :param driver: 可选，直接使用已创建的WebDriver（如ReplayWebDriver），不再启动Chrome
+        :param debugger_address: 可选，连接已运行的常驻浏览器（BrowserDaemon.debugger_address），
+                                 不再启动Chrome，关闭时只断开连接、保留浏览器
+        """
+        self.selectors = selectors or SelectorRegistry.shared()
+        self.headless = headless
+        self.login_url = login_url
+        self.home_url = home_url
+        self.api_base = api_base
         self.coin = 0  # 初始化硬币数量为0
+        self.nav_info = None  # 最近一次会话校验返回的账号信息
+        self.cookie_file = None  # 最近一次登录使用的cookie文件
+        self.attached = debugger_address is not None  # 是否连接到常驻浏览器
+        
+        if driver is not None:
+            # 外部驱动自行管理浏览器进程，无需ChromeDriver服务与启动选项
+            self.service = None
+            self.options = None
+            self.driver = driver
+            logger.info("使用外部提供的浏览器驱动")
+            return
+        
+        self.service = ChromeService(executable_path=driver_path)
         # 配置浏览器选项
         self.options = webdriver.ChromeOptions()
+        self.options.page_load_strategy = page_load_strategy
+        
+        if self.attached:
+            # 浏览器由BrowserDaemon启动（已带反检测参数），连接时不能再设置启动相关的实验选项
+            self.options.debugger_address = debugger_address
+            self.driver = webdriver.Chrome(service=self.service, options=self.options)
+            logger.info(f"已连接常驻浏览器: {debugger_address}")
+            return
+        
         self._setup_options()
         
         # 初始化浏览器驱动
@@ -52,8 +98,11 @@ class BiliLoginBot:
         self.options.add_argument("--disable-extensions")
         self.options.add_argument("--disable-notifications")
         
-        # 保持窗口不自动关闭
-        self.options.add_experimental_option("detach", True)
+        if self.headless:
+            self.options.add_argument("--headless=new")
+        else:
+            # 保持窗口不自动关闭
+            self.options.add_experimental_option("detach", True)
         
         # 使用最新的用户代理
         self.options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36")
@@ -67,7 +116,7 @@ class BiliLoginBot:
         logger.info("打开B站登录页面...")
         try:
             # 使用指定登录页面URL
-            self.driver.get("https://passport.bilibili.com/login")
+            self.driver.get(self.login_url)
             logger.info("登录页面已加载")
             
             # 确保二维码区域存在
@@ -106,7 +155,7 @@ class BiliLoginBot:
             
             # 确认是否进入主站
             try:
-                self.driver.get("https://www.bilibili.com")
+                self.driver.get(self.home_url)
                 WebDriverWait(self.driver, 15).until(
                     EC.presence_of_element_located((By.CSS_SELECTOR, ".v-img"))
                 )
@@ -129,14 +178,59 @@ class BiliLoginBot:
         except NoSuchElementException:
             return False
     
-    def get_user_coin(self, coin_record_url="https://account.bilibili.com/account/coin", timeout=15, retries=3):
+    def get_account_id(self):
+        """获取当前登录账号的用户ID（优先取会话校验得到的mid，其次DedeUserID cookie），未登录返回None"""
+        if self.nav_info and self.nav_info.get('mid'):
+            return str(self.nav_info['mid'])
+        try:
+            cookie = self.driver.get_cookie("DedeUserID")
+            return cookie['value'] if cookie else None
+        except Exception as e:
+            logger.error(f"获取账号ID失败: {str(e)}")
+            return None
+    
+    def get_coin_from_api(self, use_cached=True):
         """
-        获取用户硬币余额（改进版）
+        通过账号接口一次性读取硬币余额（无需加载页面）
+        :param use_cached: 是否直接使用会话校验时已获取的账号信息（其中包含硬币余额）
+        :return: 是否成功 (硬币值存储在self.coin属性中)
+        """
+        nav_info = self.nav_info if use_cached else None
+        if not nav_info or not nav_info.get('isLogin') or nav_info.get('money') is None:
+            # 快速登录通过CDP写入cookie且未加载页面，浏览器中读不到B站cookie，优先使用cookie文件
+            if self.cookie_file and os.path.exists(self.cookie_file):
+                http_engine = BiliHttpEngine(self.cookie_file, api_base=self.api_base)
+            else:
+                http_engine = BiliHttpEngine(cookies=self.driver.get_cookies(), api_base=self.api_base)
+            try:
+                nav_info = http_engine.get_nav_info()
+            finally:
+                http_engine.close()
+        
+        if not nav_info or not nav_info.get('isLogin') or nav_info.get('money') is None:
+            logger.warning("接口未返回硬币余额，改为读取硬币记录页面")
+            return False
+        self.nav_info = nav_info
+        self.coin = float(nav_info['money'])
+        logger.info(f"通过接口获取硬币余额: {self.coin}")
+        return True
+    
+    def get_user_coin(self, coin_record_url="https://account.bilibili.com/account/coin", timeout=15, retries=3,
+                      use_cached=True):
+        """
+        获取用户硬币余额（改进版：优先接口读取，失败时读取硬币记录页面）
         :param coin_record_url: 硬币记录页面URL
         :param timeout: 超时时间（秒）
         :param retries: 重试次数
+        :param use_cached: 是否使用登录时会话校验已返回的余额，需要最新余额时传False
         :return: 操作是否成功 (硬币值存储在self.coin属性中)
         """
+        try:
+            if self.get_coin_from_api(use_cached=use_cached):
+                return True
+        except Exception as e:
+            logger.warning(f"接口读取硬币余额出错: {str(e)}")
+        
         attempt = 0
         while attempt < retries:
             try:
@@ -156,28 +250,14 @@ class BiliLoginBot:
                     logger.warning("检测到未登录状态，尝试重新登录")
                     return False
                 
-                # 4. 使用更健壮的元素定位方式
-                # 尝试多种可能的元素定位策略
+                # 4. 通过选择器注册表定位（同时尝试全部候选，按历史命中率排序）
                 coin_value = None
-                selectors = [
-                    (By.CSS_SELECTOR, ".coin-index-title i.coin-num"),  # 原始选择器
-                    (By.CSS_SELECTOR, ".coin-num"),                     # 备用选择器1
-                    (By.CSS_SELECTOR, ".coin-info .num"),               # 备用选择器2
-                    (By.XPATH, "//div[contains(@class, 'coin-index-title')]//i[contains(@class, 'coin-num')]"),
-                    (By.XPATH, "//div[contains(text(), '硬币')]/following-sibling::div//i")
-                ]
-                
-                for selector in selectors:
-                    try:
-                        coin_element = WebDriverWait(self.driver, 5).until(
-                            EC.visibility_of_element_located(selector)
-                        )
-                        coin_value = coin_element.text
-                        logger.info(f"使用选择器 {selector} 获取到硬币余额文本: '{coin_value}'")
-                        if coin_value.strip():
-                            break
-                    except:
-                        continue
+                try:
+                    coin_element = self.selectors.find(self.driver, 'coin_balance', timeout=timeout, visible=True)
+                    coin_value = coin_element.text.strip()
+                    logger.info(f"获取到硬币余额文本: '{coin_value}'")
+                except TimeoutException:
+                    pass
                 
                 if not coin_value:
                     logger.error("所有硬币元素定位策略均失败")
@@ -240,7 +320,7 @@ class BiliLoginBot:
         """加载保存的cookies"""
         try:
             # 1. 打开网站首页（设置域名）
-            self.driver.get("https://www.bilibili.com")
+            self.driver.get(self.home_url)
             
             # 2. 加载保存的cookies
             with open(filename, 'rb') as file:
@@ -255,11 +335,138 @@ class BiliLoginBot:
             logger.error(f"加载cookies失败: {str(e)}")
             return False
     
-    def close_browser(self):
-        """关闭浏览器（用户确认后关闭）"""
-        logger.info("浏览器将在用户确认后关闭")
-        input("按Enter键关闭浏览器...")
+    @staticmethod
+    def _to_cdp_cookie(cookie):
+        """将selenium格式的cookie转换为CDP Network.setCookies参数"""
+        cdp_cookie = {
+            'name': cookie['name'],
+            'value': cookie['value'],
+            'domain': cookie.get('domain', '.bilibili.com'),
+            'path': cookie.get('path', '/'),
+            'secure': cookie.get('secure', False),
+            'httpOnly': cookie.get('httpOnly', False),
+        }
+        if 'expiry' in cookie:
+            cdp_cookie['expires'] = cookie['expiry']
+        if cookie.get('sameSite') in ('Strict', 'Lax', 'None'):
+            cdp_cookie['sameSite'] = cookie['sameSite']
+        return cdp_cookie
+
+    def load_cookies_fast(self, filename="bili_cookies.pkl"):
+        """
+        快速加载cookies：本地检查SESSDATA有效期，通过一次CDP调用批量写入（无需打开首页）
+        :param filename: cookie文件路径
+        :return: 是否加载成功
+        """
+        try:
+            with open(filename, 'rb') as file:
+                cookies = pickle.load(file)
+            
+            # 1. 本地检查登录凭证是否过期
+            sessdata = next((cookie for cookie in cookies if cookie['name'] == 'SESSDATA'), None)
+            if sessdata is None:
+                logger.warning("cookie中缺少SESSDATA，需要重新登录")
+                return False
+            if sessdata.get('expiry') and sessdata['expiry'] <= time.time():
+                logger.warning("SESSDATA已过期，需要重新登录")
+                return False
+            
+            # 2. 批量写入全部cookie
+            self.driver.execute_cdp_cmd(
+                "Network.setCookies",
+                {"cookies": [self._to_cdp_cookie(cookie) for cookie in cookies]}
+            )
+            logger.info(f"已快速加载登录状态: {filename} ({len(cookies)} 个cookie)")
+            return True
+        except Exception as e:
+            logger.error(f"快速加载cookies失败: {str(e)}")
+            return False
+
+    def verify_session(self, filename="bili_cookies.pkl"):
+        """
+        通过一次轻量接口调用确认会话有效（不加载任何页面）
+        :param filename: cookie文件路径
+        :return: 是否已登录
+        """
+        http_engine = BiliHttpEngine(filename, api_base=self.api_base)
+        try:
+            self.nav_info = http_engine.get_nav_info()
+        finally:
+            http_engine.close()
+        
+        if self.nav_info and self.nav_info.get('isLogin'):
+            logger.info(f"会话有效，已登录用户：{self.nav_info.get('uname')}")
+            return True
+        logger.warning("会话校验失败，cookie已失效")
+        return False
+
+    def login_with_qrcode(self, cookie_file="bili_cookies.pkl", qrcode_screenshot=None):
+        """
+        扫码登录并保存cookies
+        :param cookie_file: 登录成功后保存cookie的文件
+        :param qrcode_screenshot: 可选，保存二维码截图的路径（无界面运行时用于扫码）
+        :return: 是否登录成功
+        """
+        if not self.open_login_page():
+            return False
+        if qrcode_screenshot:
+            try:
+                self.driver.save_screenshot(qrcode_screenshot)
+                logger.info(f"已保存登录二维码截图: {qrcode_screenshot}")
+            except Exception as e:
+                logger.warning(f"保存二维码截图失败: {str(e)}")
+        logger.info("请使用手机B站APP扫描二维码")
+        if not self.wait_for_qrcode_scan():
+            return False
+        logger.info("扫码成功！请在手机上选择登录选项并确认")
+        if not self.wait_for_login_confirmation():
+            logger.error("用户未完成确认操作")
+            return False
+        self.save_cookies(cookie_file)
+        return True
+
+    def login(self, cookie_file="bili_cookies.pkl", qrcode_screenshot=None):
+        """
+        完整登录流程：cookie快速校验 -> 加载cookie并检查页面 -> 扫码登录
+        :param cookie_file: cookie文件路径
+        :param qrcode_screenshot: 可选，需要扫码时保存二维码截图的路径
+        :return: 是否已登录
+        """
+        self.cookie_file = cookie_file
+        if not os.path.exists(cookie_file):
+            logger.info("未找到cookie文件，需要扫码登录")
+            return self.login_with_qrcode(cookie_file, qrcode_screenshot)
+        
+        # 快速路径：本地检查有效期 + 一次接口校验，无需打开首页
+        if self.load_cookies_fast(cookie_file) and self.verify_session(cookie_file):
+            logger.info("Cookie快速校验成功！跳过扫码流程")
+            return True
+        
+        logger.info("检测到cookie文件，尝试加载登录状态...")
+        if not self.load_cookies(cookie_file):
+            logger.error("加载cookie失败，需要重新扫码登录")
+            return self.login_with_qrcode(cookie_file, qrcode_screenshot)
+        if self.is_logged_in():
+            logger.info("Cookie登录成功！跳过扫码流程")
+            return True
+        
+        logger.warning("Cookie登录失败，需要重新扫码登录")
+        return self.login_with_qrcode(cookie_file, qrcode_screenshot)
+
+    def close_browser(self, confirm=False):
+        """
+        关闭浏览器；连接常驻浏览器时只结束ChromeDriver，浏览器保持预热供下次运行使用
+        :param confirm: 是否等待用户按Enter后再关闭（仅用于交互式调试，工作线程中不要使用）
+        """
+        if confirm:
+            logger.info("浏览器将在用户确认后关闭")
+            input("按Enter键关闭浏览器...")
         try:
+            if self.attached:
+                if self.service is not None:
+                    self.service.stop()
+                logger.info("已断开常驻浏览器连接")
+                return True
             self.driver.quit()
             logger.info("浏览器已关闭")
             return True
@@ -1,167 +1,481 @@
 import time
+import json
 import logging
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import WebDriverException
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from DomWaiter import DomWaiter, DOM_HELPERS_SCRIPT
+from SelectorRegistry import SelectorRegistry
+from RateLimiter import RateLimiter
+from BiliHttpEngine import BiliHttpEngine
 
 class BilibiliTripleAction:
-    def __init__(self, driver):
+    # 按钮ID -> 状态快照中的字段名
+    BUTTON_KEYS = {
+        'like_info': 'like',
+        'ogv_weslie_tool_coin_info': 'coin',
+        'ogv_weslie_tool_favorite_info': 'favorite'
+    }
+
+    # 操作接口路径 -> 操作类型
+    ACTION_ENDPOINTS = {
+        '/x/web-interface/archive/like': 'like',
+        '/x/web-interface/coin/add': 'coin',
+        '/x/v3/fav/resource/deal': 'favorite',
+        '/medialist/gateway/coll/resource/deal': 'favorite'
+    }
+
+    # 视为操作已生效的接口返回码（重复点赞/投币已达上限也算成功）
+    ACTION_OK_CODES = {
+        'like': (0, BiliHttpEngine.CODE_ALREADY_LIKED),
+        'coin': (0, BiliHttpEngine.CODE_COIN_LIMIT),
+        'favorite': (0,)
+    }
+
+    # 包装页面的fetch/XMLHttpRequest，把三连接口的响应码按顺序写入window.__biliActionLog，
+    # 并更新根元素的data-bili-action属性唤醒事件等待（重复执行时不会重复安装）
+    ACTION_HOOK_SCRIPT = """
+        (function(endpoints) {
+            if (window.__biliActionHook) return;
+            window.__biliActionHook = true;
+            window.__biliActionLog = window.__biliActionLog || [];
+            function match(url) {
+                url = String(url || '');
+                for (var path in endpoints) {
+                    if (url.indexOf(path) !== -1) return endpoints[path];
+                }
+                return null;
+            }
+            function record(action, status, body) {
+                var code = null;
+                try { code = JSON.parse(body).code; } catch (e) {}
+                var log = window.__biliActionLog;
+                log.push({action: action, code: code === undefined ? null : code, status: status, time: Date.now()});
+                document.documentElement.setAttribute('data-bili-action', String(log.length));
+            }
+            var originalFetch = window.fetch;
+            if (originalFetch) {
+                window.fetch = function(input) {
+                    var action = match(input && input.url ? input.url : input);
+                    var promise = originalFetch.apply(this, arguments);
+                    if (action) {
+                        promise.then(function(response) {
+                            response.clone().text().then(function(body) { record(action, response.status, body); },
+                                                         function() { record(action, response.status, ''); });
+                        }, function() { record(action, 0, ''); });
+                    }
+                    return promise;
+                };
+            }
+            var originalOpen = XMLHttpRequest.prototype.open;
+            var originalSend = XMLHttpRequest.prototype.send;
+            XMLHttpRequest.prototype.open = function(method, url) {
+                this.__biliAction = match(url);
+                return originalOpen.apply(this, arguments);
+            };
+            XMLHttpRequest.prototype.send = function() {
+                var xhr = this;
+                if (xhr.__biliAction) {
+                    xhr.addEventListener('loadend', function() {
+                        var body = '';
+                        try {
+                            body = (xhr.responseType === '' || xhr.responseType === 'text')
+                                ? xhr.responseText : JSON.stringify(xhr.response);
+                        } catch (e) {}
+                        record(xhr.__biliAction, xhr.status, body);
+                    });
+                }
+                return originalSend.apply(this, arguments);
+            };
+        })(%s);
+    """ % json.dumps(ACTION_ENDPOINTS)
+
+    # 单次往返获取工具栏三连状态及弹窗可见性（弹窗选择器由注册表提供），
+    # 同时安装接口响应钩子并返回当前日志位置，作为本集操作结果的起点
+    TOOLBAR_STATE_SCRIPT = DOM_HELPERS_SCRIPT + """
+        var actionSeq = null;
+        try {
+            """ + ACTION_HOOK_SCRIPT + """
+            actionSeq = window.__biliActionLog.length;
+        } catch (e) {}
+        return {
+            action_seq: actionSeq,
+            ready: !!document.querySelector('.toolbar-left'),
+            like: isOn('like_info'),
+            coin: isOn('ogv_weslie_tool_coin_info'),
+            favorite: isOn('ogv_weslie_tool_favorite_info'),
+            coin_dialog: isVisible(arguments[0]),
+            favorite_dialog: isVisible(arguments[1])
+        };
+    """
+
+    # 按优先级依次尝试候选选择器，点击第一个存在的元素并返回命中的选择器
+    CLICK_FIRST_SCRIPT = """
+        var selectors = arguments[0];
+        for (var i = 0; i < selectors.length; i++) {
+            var el = document.querySelector(selectors[i]);
+            if (el) { el.click(); return selectors[i]; }
+        }
+        return null;
+    """
+
+    # 投币弹窗默认选中的硬币数
+    DEFAULT_COINS = 2
+
+    def __init__(self, driver, deadlines=None, selectors=None, rate_limiter=None, account=None, coins=DEFAULT_COINS):
+        """
+        :param driver: WebDriver实例
+        :param deadlines: 可选，覆盖DomWaiter各步骤的截止时间（秒）
+        :param selectors: 可选SelectorRegistry，默认使用共享注册表
+        :param rate_limiter: 可选RateLimiter，默认使用共享限流器
+        :param account: 限流使用的账号标识
+        :param coins: 本集投币数量 (0/1/2)，0表示只点赞和收藏
+        """
         self.driver = driver
         self.logger = logging.getLogger('bili_triple_action')
+        self.last_state = None  # 最近一次工具栏状态快照
+        self.waiter = DomWaiter(driver, deadlines)
+        self.selectors = selectors or SelectorRegistry.shared()
+        self.rate_limiter = rate_limiter or RateLimiter.shared()
+        self.account = account
+        self.coins = coins
+        self.action_seq = None  # 本集操作开始前的接口日志位置，None表示钩子不可用
+        self.action_results = {}  # 操作类型 -> {code, status, confirmed, source}
+        self.conditions = self._build_conditions()
+
+    def _build_conditions(self):
+        """状态快照字段 -> 等价的页面内判断表达式（供事件驱动等待使用）"""
+        return {
+            'ready': "exists('.toolbar-left')",
+            'like': "isOn('like_info')",
+            'coin': "isOn('ogv_weslie_tool_coin_info')",
+            'favorite': "isOn('ogv_weslie_tool_favorite_info')",
+            'coin_dialog': f"isVisible({json.dumps(self.selectors.css_union('coin_dialog'))})",
+            'favorite_dialog': f"isVisible({json.dumps(self.selectors.css_union('favorite_dialog'))})"
+        }
     
-        
-    def is_triple_active(self):
-        """使用组合选择器一次性检查三连状态"""
+    def get_toolbar_state(self):
+        """
+        一次execute_script获取工具栏状态快照
+        :return: 包含 ready/like/coin/favorite/coin_dialog/favorite_dialog 的字典，失败返回None
+        """
         try:
-            combined_selector = (
-                ".toolbar-left > span#like_info.on, "
-                ".toolbar-left > span#ogv_weslie_tool_coin_info.on, "
-                ".toolbar-left > span#ogv_weslie_tool_favorite_info.on"
-            )
-            
-            # 单次等待替代多次等待
-            elements = WebDriverWait(self.driver, 3.5).until(
-                EC.presence_of_all_elements_located((By.CSS_SELECTOR, combined_selector))
+            self.last_state = self.driver.execute_script(
+                self.TOOLBAR_STATE_SCRIPT,
+                self.selectors.css_union('coin_dialog'),
+                self.selectors.css_union('favorite_dialog')
             )
-            return len(elements) == 3
-        except TimeoutException:
-            return False
+            return self.last_state
         except Exception as e:
-            self.logger.error(f"检查三连状态出错: {str(e)}")
+            self.logger.error(f"获取工具栏状态出错: {str(e)}")
+            return None
+
+    def wait_for_toolbar_state(self, timeout=None):
+        """
+        等待工具栏渲染后返回状态快照（工具栏已存在时立即返回，不因按钮未激活而等待超时）
+        :param timeout: 工具栏未出现时的最长等待时间（秒），默认使用'toolbar'步骤截止时间
+        :return: 状态快照，超时返回None
+        """
+        state = self.get_toolbar_state()
+        if state and state.get('ready'):
+            return state
+        if timeout is None:
+            timeout = self.waiter.deadlines['toolbar']
+        if not self.waiter.until(self.conditions['ready'], timeout):
+            return None
+        return self.get_toolbar_state()
+
+    def wait_for_state(self, key, expected=True, timeout=5):
+        """
+        等待状态快照中的指定字段达到期望值（DOM变化时立即判断）
+        :param key: 快照字段名 (like/coin/favorite/coin_dialog/favorite_dialog)
+        :param timeout: 超时时间（秒）
+        :return: 是否在超时前达到期望值
+        """
+        condition = self.conditions[key]
+        if not expected:
+            condition = f"!({condition})"
+        return self.waiter.until(condition, timeout)
+
+    def is_triple_active(self, state=None):
+        """
+        根据状态快照检查三连状态
+        :param state: 可选的状态快照，未提供时重新获取
+        """
+        if state is None:
+            state = self.wait_for_toolbar_state()
+        if not state:
             return False
+        return all(state.get(action) for action in self.required_actions)
+
+    @property
+    def required_actions(self):
+        """本集需要完成的操作（计划不投币时只需点赞和收藏）"""
+        if self.coins <= 0:
+            return ('like', 'favorite')
+        return ('like', 'coin', 'favorite')
+
+    @property
+    def coins_spent(self):
+        """本集实际消耗的硬币数（投币已达上限或操作前已投币时为0）"""
+        result = self.action_results.get('coin')
+        if not result or not result['confirmed'] or result['source'] in ('state', 'skipped'):
+            return 0
+        if result['source'] == 'network' and result['code'] != 0:
+            return 0
+        return self.coins
+    
+    def wait_for_triple_active(self):
+        """等待需要的按钮均激活，状态更新后立即返回（截止时间为'verify'步骤）"""
+        verify_condition = " && ".join(
+            self.conditions[key] for key in self.required_actions
+        )
+        return self.waiter.step('verify', verify_condition)
     
-    def is_active(self, element_name):
+    def is_active(self, element_name, state=None):
         """
         检查按钮是否处于激活状态（有'on'类）
         :param element_name: 按钮名称 (like/coin/favorite)
+        :param state: 可选的状态快照，未提供时重新获取
         """
-        selectors = {
-            'like': "#like_info.on",
-            'coin': "#ogv_weslie_tool_coin_info.on",
-            'favorite': "#ogv_weslie_tool_favorite_info.on"
-        }
-        
-        try:
-            element = self.driver.find_element(By.CSS_SELECTOR, selectors[element_name])
+        if state is None:
+            state = self.get_toolbar_state() or {}
+        if state.get(element_name):
             self.logger.info(f"{element_name}按钮已处于激活状态")
             return True
-        except:
-            self.logger.info(f"{element_name}按钮未激活，需要操作")
-            return False
+        self.logger.info(f"{element_name}按钮未激活，需要操作")
+        return False
         
-    def is_button_active(self, element_id):
+    def is_button_active(self, element_id, state=None):
         """
         检查按钮是否处于激活状态（是否包含'on'类）
         :param element_id: 按钮ID
+        :param state: 可选的状态快照，未提供时重新获取
         :return: 是否激活
         """
-        try:
-            element = self.driver.find_element(By.ID, element_id)
-            return 'on' in element.get_attribute('class')
-        except:
-            return False
+        if state is None:
+            state = self.get_toolbar_state() or {}
+        return bool(state.get(self.BUTTON_KEYS.get(element_id)))
             
-    def safe_js_click(self, css_selector):
+    def safe_js_click(self, css_selector, wait_step=None, wait_condition=None):
         """
         安全的JavaScript点击（规避点击问题）
         :param css_selector: CSS选择器
+        :param wait_step: 可选，点击后等待的步骤名称（决定截止时间）
+        :param wait_condition: 可选，点击生效的页面判断表达式，成立后立即返回
         :return: 是否成功
         """
         try:
-            element = WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, css_selector))
+            # 元素已存在时一次往返完成定位与点击
+            clicked = self.driver.execute_script(
+                "var el = document.querySelector(arguments[0]); if (!el) return false; el.click(); return true;",
+                css_selector
             )
-            self.driver.execute_script("arguments[0].click();", element)
-            time.sleep(0.5)  # 等待操作生效
-            return True
+            if not clicked:
+                element = WebDriverWait(self.driver, 10).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, css_selector))
+                )
+                self.driver.execute_script("arguments[0].click();", element)
         except Exception as e:
             self.logger.error(f"点击元素失败: {css_selector} - {str(e)}")
             return False
 
-    def handle_like(self):
+        return self._wait_after_click(css_selector, wait_step, wait_condition)
+
+    def click_registered(self, name, wait_step=None, wait_condition=None, timeout=5):
+        """
+        点击注册表中的逻辑元素：按命中率依次尝试候选选择器，并记录命中统计
+        :param name: SelectorRegistry中的逻辑元素名称
+        :param timeout: 元素尚未出现时的最长等待时间（秒）
+        :return: 是否成功
+        """
+        candidates = self.selectors.ranked_css(name)
+        start_time = time.time()
+        try:
+            matched = self.driver.execute_script(self.CLICK_FIRST_SCRIPT, candidates)
+            if not matched and self.waiter.until(f"exists({json.dumps(', '.join(candidates))})", timeout):
+                matched = self.driver.execute_script(self.CLICK_FIRST_SCRIPT, candidates)
+        except Exception as e:
+            self.logger.error(f"点击元素失败: {name} - {str(e)}")
+            return False
+
+        self.selectors.record_css_match(name, matched, time.time() - start_time)
+        if not matched:
+            self.logger.error(f"点击元素失败: {name} 的所有候选选择器均未匹配")
+            return False
+        return self._wait_after_click(name, wait_step, wait_condition)
+
+    def _wait_after_click(self, label, wait_step, wait_condition):
+        """等待点击生效"""
+        if wait_condition and not self.waiter.step(wait_step, wait_condition):
+            self.logger.warning(f"点击后页面未按预期更新: {label}")
+            return False
+        return True
+
+    def _confirm_condition(self, action):
+        """
+        操作生效的等待条件：钩子可用时以收到接口响应为准（成功或失败都立即返回），按钮激活作为兜底
+        :param action: 操作类型 (like/coin/favorite)
+        """
+        if self.action_seq is None:
+            return self.conditions[action]
+        return f"{self.conditions[action]} || actionSince('{action}', {int(self.action_seq)}) !== null"
+
+    def _confirm_action(self, action, clicked):
+        """
+        根据接口响应确定操作结果并记录返回码；未捕获到响应时以点击后的页面状态为准
+        :param action: 操作类型 (like/coin/favorite)
+        :param clicked: 点击及等待的结果
+        :return: 操作是否生效
+        """
+        if self.action_seq is None:
+            return clicked
+        try:
+            entry = self.driver.execute_script(
+                DOM_HELPERS_SCRIPT + "return actionSince(arguments[0], arguments[1]);",
+                action, self.action_seq
+            )
+        except Exception as e:
+            self.logger.warning(f"读取{action}接口响应失败: {str(e)}")
+            entry = None
+
+        if not entry:
+            self.action_results[action] = {'code': None, 'status': None, 'confirmed': clicked, 'source': 'dom'}
+            return clicked
+
+        code = entry.get('code')
+        confirmed = code in self.ACTION_OK_CODES[action]
+        self.action_results[action] = {'code': code, 'status': entry.get('status'),
+                                       'confirmed': confirmed, 'source': 'network'}
+        if confirmed:
+            self.logger.info(f"{action}接口确认成功 (code={code})")
+        else:
+            self.logger.warning(f"{action}接口返回失败 (code={code}, status={entry.get('status')})")
+        return confirmed
+
+    def _dialog_confirm_condition(self, action):
+        """弹窗确认后的等待条件：钩子不可用时弹窗关闭也视为完成"""
+        if self.action_seq is None:
+            return f"{self.conditions[action]} || !{self.conditions[action + '_dialog']}"
+        return self._confirm_condition(action)
+
+    def handle_like(self, state=None):
         """处理点赞操作（无弹窗）"""
-        if self.is_button_active("like_info"):
+        if self.is_button_active("like_info", state):
             self.logger.info("点赞已激活，无需操作")
             return True
             
-        return self.safe_js_click("#like_info")
+        clicked = self.safe_js_click("#like_info", 'like', self._confirm_condition('like'))
+        return self._confirm_action('like', clicked)
     
-    def handle_coin(self):
+    def handle_coin(self, state=None):
         """处理投币操作（带弹窗）"""
-        if self.is_button_active("ogv_weslie_tool_coin_info"):
+        if self.is_button_active("ogv_weslie_tool_coin_info", state):
             self.logger.info("投币已激活，无需操作")
             return True
+        if self.coins <= 0:
+            self.logger.info("本集计划不投币，跳过")
+            return True
             
-        # 1. 点击投币按钮
-        if not self.safe_js_click("#ogv_weslie_tool_coin_info"):
-            return False
-        
-        # 2. 等待投币弹窗出现（图1）
-        try:
-            WebDriverWait(self.driver, 5).until(
-                EC.visibility_of_element_located((By.CSS_SELECTOR, ".dialogcoin_coin_operated__KhIb2"))
-            )
-            self.logger.info("投币弹窗已显示")
-        except:
+        # 1. 点击投币按钮并等待投币弹窗出现（图1）
+        if not self.safe_js_click("#ogv_weslie_tool_coin_info", 'coin_dialog', self.conditions['coin_dialog']):
             self.logger.error("投币弹窗未显示，操作失败")
             return False
+        self.logger.info("投币弹窗已显示")
+
+        # 计划数量与弹窗默认值不同时先选择硬币数，选择失败则放弃投币，避免多花硬币
+        if self.coins != self.DEFAULT_COINS and not self.click_registered(f'coin_choice_{self.coins}', timeout=2):
+            self.logger.error(f"选择投币数量 {self.coins} 失败")
+            return False
         
-        # 4. 点击确定按钮
-        return self.safe_js_click(".dialogcoin_coin_btn__be9sU")
+        # 2. 点击确定按钮，等待接口响应（钩子不可用时等待弹窗关闭或投币状态激活）
+        clicked = self.click_registered('coin_confirm', 'coin_confirm', self._dialog_confirm_condition('coin'))
+        return self._confirm_action('coin', clicked)
     
-    def handle_favorite(self):
+    def handle_favorite(self, state=None):
         """处理收藏操作（带弹窗，需要选择默认收藏夹）"""
-        if self.is_button_active("ogv_weslie_tool_favorite_info"):
+        if self.is_button_active("ogv_weslie_tool_favorite_info", state):
             self.logger.info("收藏已激活，无需操作")
             return True
             
-        # 1. 点击收藏按钮
-        if not self.safe_js_click("#ogv_weslie_tool_favorite_info"):
-            return False
-        
-        # 2. 等待收藏弹窗出现（图2）
-        try:
-            WebDriverWait(self.driver, 4).until(
-                EC.visibility_of_element_located((By.CSS_SELECTOR, ".DialogCollect_content__lBPfq"))
-            )
-            self.logger.info("收藏弹窗已显示")
-        except:
+        # 1. 点击收藏按钮并等待收藏弹窗出现（图2）
+        if not self.safe_js_click("#ogv_weslie_tool_favorite_info", 'favorite_dialog',
+                                  self.conditions['favorite_dialog']):
             self.logger.error("收藏弹窗未显示，操作失败")
             return False
+        self.logger.info("收藏弹窗已显示")
         
         # 3. 选择默认收藏夹（图2）
         # 使用更精确的选择器定位第一个收藏夹
         # 图片中显示的结构是第一个li内的label和checkbox
-        try:
-            self.safe_js_click(".DialogCollect_groupList__msAqc li:first-child label")
-        except:
+        if not self.click_registered('favorite_group_first'):
             self.logger.error("选择默认收藏夹失败")
             return False
 
-        return self.safe_js_click(".DialogCollect_btn__VErcg")
+        clicked = self.click_registered('favorite_confirm', 'favorite_confirm',
+                                        self._dialog_confirm_condition('favorite'))
+        return self._confirm_action('favorite', clicked)
+
+    def _paced(self, action, handler, state):
+        """
+        经限流器执行单个操作：已激活的按钮不消耗令牌；接口返回风控码时立即退避，
+        元素超时、状态校验失败等其他失败连续达到阈值时才退避，单次页面缓慢不影响速率
+        :param action: 操作类型 (like/coin/favorite)
+        :param handler: 对应的handle_*方法
+        :param state: 工具栏状态快照
+        """
+        if state and state.get(action):
+            self.action_results[action] = {'code': None, 'status': None, 'confirmed': True, 'source': 'state'}
+            return handler(state)
+        if action not in self.required_actions:
+            self.action_results[action] = {'code': None, 'status': None, 'confirmed': True, 'source': 'skipped'}
+            return True
+        self.rate_limiter.acquire(self.account, action)
+        result = handler(state)
+        code = self.action_results.get(action, {}).get('code')
+        if result:
+            self.rate_limiter.on_success(self.account, action)
+        elif code in BiliHttpEngine.THROTTLE_CODES:
+            self.rate_limiter.on_throttle(self.account, action)
+        else:
+            self.rate_limiter.on_failure(self.account, action)
+        return result
+
+    def is_network_confirmed(self):
+        """三个操作是否都已由接口响应确认（或操作前已激活）"""
+        if self.action_seq is None:
+            return False
+        for action in ('like', 'coin', 'favorite'):
+            result = self.action_results.get(action)
+            if not result or result['source'] == 'dom' or not result['confirmed']:
+                return False
+        return True
 
     def perform_triple_action(self):
         """执行完整的一键三连操作"""
         results = []
         
+        # 一次获取三个按钮的初始状态，各步骤共享该快照；快照同时给出接口日志的起点
+        state = self.wait_for_toolbar_state()
+        self.action_seq = state.get('action_seq') if state else None
+        self.action_results = {}
+        
         # 点赞
-        like_result = self.handle_like()
+        like_result = self._paced('like', self.handle_like, state)
         results.append(like_result)
         if not like_result:
             self.logger.error("点赞操作失败")
         
-        # 投币（等待点赞操作完成）
-        time.sleep(1)
-        coin_result = self.handle_coin()
+        # 投币（由限流器控制与上一操作的间隔）
+        coin_result = self._paced('coin', self.handle_coin, state)
         results.append(coin_result)
         if not coin_result:
             self.logger.error("投币操作失败")
         
-        # 收藏（等待投币操作完成）
-        time.sleep(1)
-        favorite_result = self.handle_favorite()
+        # 收藏
+        favorite_result = self._paced('favorite', self.handle_favorite, state)
         results.append(favorite_result)
         if not favorite_result:
             self.logger.error("收藏操作失败")
@@ -192,7 +506,8 @@ class BilibiliTripleAction:
                 
                 try:
                     if method():
-                        if self.is_triple_active():
+                        # 接口已确认全部操作时无需再等待按钮状态
+                        if self.is_network_confirmed() or self.wait_for_triple_active():
                             self.logger.info("三连操作成功")
                             return True
                         else:
@@ -201,9 +516,6 @@ class BilibiliTripleAction:
                         self.logger.warning("方法执行失败")
                 except Exception as e:
                     self.logger.error(f"执行方法时出错: {str(e)}")
-                
-                # 尝试间短暂等待
-                time.sleep(0.7)
 
         return False
     
@@ -265,10 +577,8 @@ class BilibiliTripleAction:
                 
             # 执行三连操作
             if self.smart_triple_action():
-                time.sleep(2)  # 等待状态更新
-                
-                # 验证结果
-                if self.is_triple_active():
+                # 验证结果：接口响应已确认时直接返回，否则等待三个按钮均激活
+                if self.is_network_confirmed() or self.wait_for_triple_active():
                     self.logger.info("成功完成三连操作")
                     return 1
                 else:
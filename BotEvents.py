@@ -0,0 +1,81 @@
+from collections import namedtuple
+import queue
+import time
+
+# 工作线程 -> 界面 的事件类型
+StatusChanged = namedtuple('StatusChanged', ['text'])
+CoinChanged = namedtuple('CoinChanged', ['balance'])
+RunStarted = namedtuple('RunStarted', ['total_episodes'])
+EpisodeStarted = namedtuple('EpisodeStarted', ['episode_index'])
+# result: 三连结果 (1/0/-1，未执行为None)；stages: 阶段名 -> 耗时（秒）
+EpisodeFinished = namedtuple('EpisodeFinished', ['episode_index', 'result', 'duration', 'stages'])
+RunFinished = namedtuple('RunFinished', ['status'])
+
+
+class EventChannel:
+    def __init__(self):
+        """线程安全的事件通道：工作线程发布，界面线程批量取出处理"""
+        self._queue = queue.Queue()
+
+    def publish(self, event):
+        self._queue.put(event)
+
+    def drain(self, max_events=None):
+        """
+        取出已发布的事件（不阻塞）
+        :param max_events: 单次最多取出的事件数，None表示全部
+        :return: 事件列表
+        """
+        events = []
+        while max_events is None or len(events) < max_events:
+            try:
+                events.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return events
+
+
+class ThroughputTracker:
+    def __init__(self):
+        """根据剧集事件统计吞吐量与剩余时间"""
+        self.reset(0)
+
+    def reset(self, total_episodes):
+        self.total_episodes = total_episodes
+        self.finished = 0
+        self.total_duration = 0.0
+        self.stage_totals = {}
+        self.started_at = time.time()
+
+    def on_event(self, event):
+        if isinstance(event, RunStarted):
+            self.reset(event.total_episodes)
+        elif isinstance(event, EpisodeFinished):
+            self.finished += 1
+            self.total_duration += event.duration
+            for stage, seconds in (event.stages or {}).items():
+                self.stage_totals[stage] = self.stage_totals.get(stage, 0.0) + seconds
+
+    @property
+    def episodes_per_minute(self):
+        elapsed = time.time() - self.started_at
+        return self.finished * 60.0 / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def mean_seconds_per_episode(self):
+        return self.total_duration / self.finished if self.finished else 0.0
+
+    @property
+    def eta_seconds(self):
+        """按当前吞吐量估算剩余剧集所需时间，尚无数据时返回None"""
+        rate = self.episodes_per_minute
+        if not rate:
+            return None
+        remaining = max(0, self.total_episodes - self.finished)
+        return remaining * 60.0 / rate
+
+    def mean_stage_seconds(self):
+        """各阶段的平均耗时"""
+        if not self.finished:
+            return {}
+        return {stage: total / self.finished for stage, total in self.stage_totals.items()}
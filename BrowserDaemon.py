@@ -0,0 +1,191 @@
+"""
+常驻浏览器：使用持久化的用户目录启动Chrome并开启远程调试端口，
+每次运行通过 debuggerAddress 连接，省去浏览器冷启动与反检测配置，运行结束后浏览器保持预热
+
+用法:
+    python BrowserDaemon.py start [--port 9222] [--profile chrome_profile] [--headless]
+    python BrowserDaemon.py status
+    python BrowserDaemon.py stop
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+
+logger = logging.getLogger('browser_daemon')
+
+
+class BrowserDaemon:
+    DEFAULT_PORT = 9222
+    PID_FILE = "daemon.pid"
+
+    # 未指定Chrome路径时依次查找
+    CHROME_CANDIDATES = [
+        "C:/Program Files/Google/Chrome/Application/chrome.exe",
+        "C:/Program Files (x86)/Google/Chrome/Application/chrome.exe",
+        "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
+        "google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome",
+    ]
+
+    USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
+
+    def __init__(self, chrome_path=None, profile_dir="chrome_profile", port=DEFAULT_PORT, host="127.0.0.1",
+                 headless=False):
+        """
+        :param chrome_path: Chrome可执行文件路径，为None时自动查找
+        :param profile_dir: 持久化用户目录（保存登录cookie与缓存，多次运行共享）
+        :param port: 远程调试端口
+        :param host: 远程调试地址
+        :param headless: 是否以无界面模式启动
+        """
+        self.chrome_path = chrome_path
+        self.profile_dir = os.path.abspath(profile_dir)
+        self.port = port
+        self.host = host
+        self.headless = headless
+        self.process = None
+
+    @property
+    def debugger_address(self):
+        """传给 ChromeOptions.debugger_address / BiliLoginBot(debugger_address=...) 的地址"""
+        return f"{self.host}:{self.port}"
+
+    @property
+    def pid_file(self):
+        return os.path.join(self.profile_dir, self.PID_FILE)
+
+    def find_chrome(self):
+        """查找Chrome可执行文件"""
+        candidates = [self.chrome_path] if self.chrome_path else self.CHROME_CANDIDATES
+        for candidate in candidates:
+            if os.path.isfile(candidate):
+                return candidate
+            found = shutil.which(candidate)
+            if found:
+                return found
+        return None
+
+    def version_info(self, timeout=1.0):
+        """
+        查询远程调试端口的版本信息
+        :return: /json/version 返回的字典，浏览器未运行时返回None
+        """
+        try:
+            with urllib.request.urlopen(f"http://{self.debugger_address}/json/version", timeout=timeout) as response:
+                return json.loads(response.read().decode('utf-8'))
+        except (OSError, ValueError):
+            return None
+
+    def is_running(self):
+        return self.version_info() is not None
+
+    def _command(self, chrome):
+        command = [
+            chrome,
+            f"--remote-debugging-port={self.port}",
+            f"--user-data-dir={self.profile_dir}",
+            # 不经ChromeDriver启动，navigator.webdriver本身为false，无需再注入反检测脚本
+            "--disable-blink-features=AutomationControlled",
+            "--no-first-run",
+            "--no-default-browser-check",
+            "--disable-notifications",
+            "--disable-dev-shm-usage",
+            "--window-size=1200,800",
+            f"--user-agent={self.USER_AGENT}",
+        ]
+        if self.headless:
+            command.append("--headless=new")
+        command.append("about:blank")
+        return command
+
+    def start(self, timeout=20):
+        """
+        启动常驻浏览器（已在运行时直接返回）
+        :param timeout: 等待调试端口就绪的最长时间（秒）
+        :return: 调试端口是否可用
+        """
+        if self.is_running():
+            logger.info(f"常驻浏览器已在运行: {self.debugger_address}")
+            return True
+
+        chrome = self.find_chrome()
+        if chrome is None:
+            logger.error("未找到Chrome可执行文件，请指定chrome_path")
+            return False
+
+        os.makedirs(self.profile_dir, exist_ok=True)
+        # 脱离当前进程组，运行结束或界面退出后浏览器继续保持预热
+        popen_kwargs = {'stdout': subprocess.DEVNULL, 'stderr': subprocess.DEVNULL}
+        if os.name == 'nt':
+            popen_kwargs['creationflags'] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            popen_kwargs['start_new_session'] = True
+        self.process = subprocess.Popen(self._command(chrome), **popen_kwargs)
+        with open(self.pid_file, 'w', encoding='utf-8') as file:
+            file.write(str(self.process.pid))
+
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.is_running():
+                logger.info(f"常驻浏览器已启动: {self.debugger_address} (用户目录: {self.profile_dir})")
+                return True
+            if self.process.poll() is not None:
+                logger.error(f"Chrome启动后立即退出，返回码: {self.process.returncode}")
+                return False
+            time.sleep(0.2)
+        logger.error(f"等待调试端口就绪超时: {self.debugger_address}")
+        return False
+
+    def stop(self):
+        """结束常驻浏览器（按用户目录中记录的进程号）"""
+        try:
+            with open(self.pid_file, 'r', encoding='utf-8') as file:
+                pid = int(file.read().strip())
+        except (OSError, ValueError):
+            logger.warning("未找到常驻浏览器的进程记录")
+            return False
+        try:
+            os.kill(pid, signal.SIGTERM)
+            logger.info(f"已结束常驻浏览器进程: {pid}")
+            return True
+        except OSError as e:
+            logger.warning(f"结束常驻浏览器进程失败: {str(e)}")
+            return False
+        finally:
+            try:
+                os.remove(self.pid_file)
+            except OSError:
+                pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="B站三连机器人常驻浏览器")
+    parser.add_argument("action", choices=("start", "stop", "status"))
+    parser.add_argument("--chrome-path", default=None, help="Chrome可执行文件路径，默认自动查找")
+    parser.add_argument("--profile", default="chrome_profile", help="持久化用户目录")
+    parser.add_argument("--port", type=int, default=BrowserDaemon.DEFAULT_PORT, help="远程调试端口")
+    parser.add_argument("--headless", action="store_true", help="无界面模式")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    daemon = BrowserDaemon(args.chrome_path, profile_dir=args.profile, port=args.port, headless=args.headless)
+    if args.action == "start":
+        return 0 if daemon.start() else 1
+    if args.action == "stop":
+        return 0 if daemon.stop() else 1
+    info = daemon.version_info()
+    if info is None:
+        print(f"常驻浏览器未运行: {daemon.debugger_address}")
+        return 1
+    print(f"常驻浏览器运行中: {daemon.debugger_address} ({info.get('Browser')})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
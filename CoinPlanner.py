@@ -0,0 +1,152 @@
+import logging
+import threading
+
+
+class CoinPlanner:
+    # 单个稿件最多可投的硬币数
+    MAX_COINS_PER_EPISODE = 2
+
+    def __init__(self, balance, episode_indices, reserve=4, coins_per_episode=2, episode_status=None,
+                 coinless=False):
+        """
+        执行前按实时余额为待处理剧集分配硬币，并根据每集的实际结果增量调整后续计划
+        :param balance: 当前硬币余额（get_user_coin 获取的实时值）
+        :param episode_indices: 待处理的剧集索引（按处理顺序）
+        :param reserve: 保留的最低硬币数
+        :param coins_per_episode: 每集计划投币数量 (1/2)
+        :param episode_status: 可选，AnimePageAccess.prescan_episodes 得到的三连状态，已投币的剧集不再分配硬币
+        :param coinless: 硬币不足时是否仍处理剩余剧集（只点赞和收藏），否则跳过这些剧集
+        """
+        self.balance = balance
+        self.reserve = reserve
+        self.coins_per_episode = max(0, min(coins_per_episode, self.MAX_COINS_PER_EPISODE))
+        self.episode_status = dict(episode_status or {})
+        self.coinless = coinless
+        self.logger = logging.getLogger('coin_planner')
+        self.episode_indices = list(dict.fromkeys(episode_indices))
+        self.allocations = {}  # 剧集索引 -> 计划投币数（0表示只点赞和收藏）
+        self.unaffordable = []  # 余额不足而不处理的剧集索引
+        self.results = {}  # 剧集索引 -> (三连结果, 实际消耗的硬币数)
+        self.reserved = {}  # 并行处理中的剧集索引 -> 已预占的硬币数
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)  # 结算或余额变化时唤醒等待领取剧集的线程
+        self._replan()
+
+    def _needed_coins(self, episode_index):
+        """剧集仍需投的硬币数（预检显示已投币时为0）"""
+        status = self.episode_status.get(episode_index) or {}
+        if status.get('coin', 0) > 0:
+            return 0
+        return self.coins_per_episode
+
+    def _replan(self):
+        """按当前余额为未处理的剧集重新分配硬币（余额不足一集的计划时投出剩余的零头）"""
+        spendable = int(self.balance - self.reserve)
+        self.allocations = {}
+        self.unaffordable = []
+        for episode_index in self.episode_indices:
+            if episode_index in self.results or episode_index in self.reserved:
+                continue
+            needed = self._needed_coins(episode_index)
+            coins = min(needed, max(0, spendable))
+            spendable -= coins
+            if needed > 0 and coins == 0 and not self.coinless:
+                self.unaffordable.append(episode_index)
+                continue
+            self.allocations[episode_index] = coins
+
+    def pending(self):
+        """
+        计划中尚未处理的剧集
+        :return: 剧集索引列表（保持处理顺序）
+        """
+        with self._lock:
+            return [index for index in self.episode_indices if index in self.allocations]
+
+    def coins_for(self, episode_index):
+        """剧集的计划投币数，不在计划中时返回0"""
+        with self._lock:
+            return self.allocations.get(episode_index, 0)
+
+    def reserve_coins(self, episode_index):
+        """
+        并行处理时预占剧集的计划硬币：先从余额中扣除，其他线程的计划不会重复使用这些硬币，
+        处理完成后由record按实际消耗退还差额
+        :param episode_index: 剧集索引
+        :return: 预占的硬币数，剧集不在计划中（余额不足）时返回None
+        """
+        with self._lock:
+            if episode_index not in self.allocations:
+                return None
+            return self._reserve(episode_index)
+
+    def _reserve(self, episode_index):
+        """预占剧集的计划硬币（调用方持有锁）"""
+        coins = self.allocations[episode_index]
+        self.reserved[episode_index] = coins
+        self.balance -= coins
+        self._replan()
+        return coins
+
+    def claim_next(self, should_stop=None):
+        """
+        并行处理时领取下一集并预占硬币；计划为空但仍有剧集在处理时等待其结算，
+        退还的硬币可能使此前余额不足的剧集重新可以处理
+        :param should_stop: 可选回调，返回True时不再领取（等待期间定期检查）
+        :return: (剧集索引, 预占的硬币数)，没有可处理的剧集或已停止时返回None
+        """
+        with self._changed:
+            while True:
+                if should_stop is not None and should_stop():
+                    return None
+                for episode_index in self.episode_indices:
+                    if episode_index in self.allocations:
+                        return episode_index, self._reserve(episode_index)
+                if not self.reserved:
+                    return None
+                self._changed.wait(timeout=1.0)
+
+    def record(self, episode_index, result, coins_spent):
+        """
+        记录一集的实际结果并重新规划剩余剧集
+        :param result: 三连结果 (1/0/-1/None)
+        :param coins_spent: 实际消耗的硬币数
+        :return: 本集计划的硬币是否满足所需（否则账本中不应记为已完成）
+        """
+        with self._lock:
+            if episode_index in self.reserved:
+                # 预占的硬币已从余额扣除，只退还未实际消耗的部分
+                planned = self.reserved.pop(episode_index)
+                self.balance += planned
+            else:
+                planned = self.allocations.get(episode_index, 0)
+            self.results[episode_index] = (result, coins_spent)
+            self.balance -= coins_spent
+            if coins_spent != planned:
+                self.logger.info(f"第 {episode_index+1} 集计划投币 {planned}，实际消耗 {coins_spent}，重新规划")
+            self._replan()
+            self._changed.notify_all()
+            return planned >= self._needed_coins(episode_index)
+
+    def sync_balance(self, balance):
+        """以实时余额校正计划（如重新读取硬币页面后）"""
+        with self._lock:
+            self.balance = balance
+            self._replan()
+            self._changed.notify_all()
+
+    @property
+    def remaining(self):
+        with self._lock:
+            return self.balance
+
+    def summary(self):
+        """计划概况：投币/只点赞收藏/不处理的剧集数与计划消耗的硬币数"""
+        with self._lock:
+            return {
+                'balance': self.balance,
+                'coined': sum(1 for coins in self.allocations.values() if coins > 0),
+                'like_and_favorite_only': sum(1 for coins in self.allocations.values() if coins == 0),
+                'unaffordable': len(self.unaffordable),
+                'planned_coins': sum(self.allocations.values()),
+            }
@@ -0,0 +1,130 @@
+import time
+import logging
+import threading
+import weakref
+
+# 页面内通用判断函数，供等待条件与状态探测脚本共用
+DOM_HELPERS_SCRIPT = """
+    function exists(selector) {
+        return !!document.querySelector(selector);
+    }
+    function isOn(id) {
+        var el = document.getElementById(id);
+        return !!(el && el.classList.contains('on'));
+    }
+    function isVisible(selector) {
+        var el = document.querySelector(selector);
+        if (!el || el.getClientRects().length === 0) return false;
+        var style = window.getComputedStyle(el);
+        return style.visibility !== 'hidden' && style.display !== 'none';
+    }
+    function actionSince(action, seq) {
+        var log = window.__biliActionLog || [];
+        for (var i = log.length - 1; i >= seq; i--) {
+            if (log[i].action === action) return log[i];
+        }
+        return null;
+    }
+"""
+
+# 基于MutationObserver的异步等待：条件满足立即返回，超时返回最后一次判断结果
+_WAIT_SCRIPT_TEMPLATE = DOM_HELPERS_SCRIPT + """
+    var timeoutMs = arguments[0];
+    var done = arguments[arguments.length - 1];
+    function check() {
+        try { return !!(%s); } catch (e) { return false; }
+    }
+    if (check()) { done(true); return; }
+    var finished = false;
+    var observer = new MutationObserver(function() {
+        if (!finished && check()) finish(true);
+    });
+    var timer = setTimeout(function() { finish(check()); }, timeoutMs);
+    function finish(result) {
+        finished = true;
+        observer.disconnect();
+        clearTimeout(timer);
+        done(result);
+    }
+    // data-bili-action 由操作接口响应钩子更新，使接口返回也能立即唤醒等待
+    observer.observe(document.documentElement, {
+        subtree: true, childList: true, attributes: true, attributeFilter: ['class', 'style', 'data-bili-action']
+    });
+"""
+
+# 异步脚本超时是整个驱动的设置，按驱动记录已设置的值：同一驱动上的多个DomWaiter
+# （页面访问与每集的三连操作）共用该记录，不会因各自缓存的值不同而使较长的等待超时
+_script_timeouts = weakref.WeakKeyDictionary()
+_script_timeouts_lock = threading.Lock()
+
+
+class DomWaiter:
+    # 各操作步骤的默认截止时间（秒）
+    DEFAULT_DEADLINES = {
+        'toolbar': 3.5,
+        'like': 3,
+        'coin_dialog': 5,
+        'coin_confirm': 5,
+        'favorite_dialog': 4,
+        'favorite_confirm': 5,
+        'verify': 3
+    }
+
+    def __init__(self, driver, deadlines=None):
+        """
+        事件驱动的页面等待：DOM变化时立即判断条件，替代固定sleep
+        :param driver: WebDriver实例
+        :param deadlines: 可选，覆盖各步骤的截止时间
+        """
+        self.driver = driver
+        self.logger = logging.getLogger('dom_waiter')
+        self.deadlines = dict(self.DEFAULT_DEADLINES)
+        if deadlines:
+            self.deadlines.update(deadlines)
+
+    def _ensure_script_timeout(self, timeout):
+        """异步脚本超时需大于等待时间，仅在驱动当前的设置不足时调整以减少往返"""
+        required = timeout + 2
+        with _script_timeouts_lock:
+            current = _script_timeouts.get(self.driver)
+            if current is not None and current >= required:
+                return
+            self.driver.set_script_timeout(required)
+            _script_timeouts[self.driver] = required
+
+    def until(self, condition_js, timeout):
+        """
+        等待页面条件成立
+        :param condition_js: JS布尔表达式，可使用 exists/isOn/isVisible/actionSince
+        :param timeout: 超时时间（秒）
+        :return: 条件是否在超时前成立
+        """
+        try:
+            self._ensure_script_timeout(timeout)
+            script = _WAIT_SCRIPT_TEMPLATE % condition_js
+            return bool(self.driver.execute_async_script(script, int(timeout * 1000)))
+        except Exception as e:
+            self.logger.warning(f"事件等待失败，改为轮询: {str(e)}")
+            return self._poll(condition_js, timeout)
+
+    def _poll(self, condition_js, timeout, poll_frequency=0.2):
+        """不支持异步脚本时的轮询回退"""
+        script = DOM_HELPERS_SCRIPT + "return !!(%s);" % condition_js
+        deadline = time.time() + timeout
+        while True:
+            try:
+                if self.driver.execute_script(script):
+                    return True
+            except Exception:
+                pass
+            if time.time() >= deadline:
+                return False
+            time.sleep(poll_frequency)
+
+    def step(self, step_name, condition_js):
+        """按步骤名称使用对应截止时间等待"""
+        timeout = self.deadlines.get(step_name, 5)
+        start_time = time.time()
+        result = self.until(condition_js, timeout)
+        self.logger.debug(f"步骤 {step_name} 等待 {time.time()-start_time:.2f}秒，结果: {result}")
+        return result
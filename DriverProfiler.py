@@ -0,0 +1,271 @@
+from selenium.webdriver.support.ui import WebDriverWait
+from DomWaiter import DomWaiter
+from collections import namedtuple
+import contextlib
+import logging
+import math
+import sys
+import threading
+import time
+
+# kind: command 一次WebDriver往返 / wait 显式等待 / sleep 固定休眠
+ProfileRecord = namedtuple('ProfileRecord', ['kind', 'name', 'duration', 'stage', 'episode'])
+
+
+def percentile(values, fraction):
+    """最近秩法计算分位数：第 ceil(fraction*n) 个值（benchmark 与往返分析共用）"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    # 先舍去浮点误差（如 0.7*90 = 62.99999999999999），避免秩被多算或少算一位
+    rank = math.ceil(round(fraction * len(ordered), 9))
+    return ordered[min(len(ordered), max(1, rank)) - 1]
+
+
+def _summary(durations):
+    return {
+        'count': len(durations),
+        'total': round(sum(durations), 4),
+        'p50': round(percentile(durations, 0.5), 4),
+        'p95': round(percentile(durations, 0.95), 4),
+    }
+
+
+class DriverProfiler:
+    """
+    WebDriver命令分析器（按需启用）：记录每次往返的命令名、耗时与所属阶段，
+    同时统计显式等待与固定sleep的耗时，按剧集汇总并检查每个阶段的往返次数预算；
+    time.sleep与显式等待是进程级替换，只记录被分析的线程（默认为调用install的线程），
+    避免模拟站点等其他线程的休眠混入统计
+    """
+
+    # 调用栈中的函数名 -> 阶段名（由内向外匹配第一个）
+    STAGE_FUNCTIONS = {
+        'login': 'login',
+        'get_user_coin': 'coin_balance',
+        'load_season_episodes': 'season',
+        'navigate_to_episode_page': 'navigate',
+        'switch_episode_in_page': 'navigate',
+        'get_toolbar_state': 'state',
+        'wait_for_toolbar_state': 'state',
+        'is_triple_active': 'state',
+        'handle_like': 'like',
+        'handle_coin': 'coin',
+        'handle_favorite': 'favorite',
+        'wait_for_triple_active': 'verify',
+        'process_specific_episode': 'episode',
+    }
+
+    _active = None
+    _active_lock = threading.Lock()
+
+    def __init__(self, driver, budgets=None):
+        """
+        :param driver: 要分析的WebDriver实例
+        :param budgets: 可选，阶段名 -> 每集允许的最大往返次数
+        """
+        self.driver = driver
+        self.budgets = dict(budgets or {})
+        self.logger = logging.getLogger('driver_profiler')
+        self.records = []
+        self._records_lock = threading.Lock()
+        self._local = threading.local()
+        self._originals = {}
+        self._thread_ids = set()  # 记录等待与sleep的线程
+
+    # ------------------------------------------------------------------
+    # 安装与卸载
+    # ------------------------------------------------------------------
+    def install(self):
+        """包装driver.execute，并在分析期间接管time.sleep与显式等待（当前线程加入分析范围）"""
+        with self._active_lock:
+            if DriverProfiler._active is not None:
+                raise RuntimeError("已有DriverProfiler处于启用状态")
+            DriverProfiler._active = self
+
+        self.add_thread()
+        original_execute = self.driver.execute
+        self._originals = {
+            'execute': original_execute,
+            'sleep': time.sleep,
+            'webdriver_wait_until': WebDriverWait.until,
+            'dom_waiter_until': DomWaiter.until,
+        }
+
+        def execute(driver_command, params=None):
+            start_time = time.perf_counter()
+            try:
+                return original_execute(driver_command, params)
+            finally:
+                self._record('command', driver_command, time.perf_counter() - start_time)
+
+        self.driver.execute = execute
+        time.sleep = self._wrap_sleep(self._originals['sleep'])
+        WebDriverWait.until = self._wrap_wait(self._originals['webdriver_wait_until'], 'WebDriverWait')
+        DomWaiter.until = self._wrap_wait(self._originals['dom_waiter_until'], 'DomWaiter')
+        return self
+
+    def add_thread(self, thread_id=None):
+        """
+        将线程加入分析范围（如驱动同一浏览器的工作线程）
+        :param thread_id: 线程标识（threading.get_ident()），默认为当前线程
+        """
+        self._thread_ids.add(thread_id if thread_id is not None else threading.get_ident())
+
+    def _profiled(self):
+        return threading.get_ident() in self._thread_ids
+
+    def uninstall(self):
+        if not self._originals:
+            return
+        self.driver.__dict__.pop('execute', None)
+        time.sleep = self._originals['sleep']
+        WebDriverWait.until = self._originals['webdriver_wait_until']
+        DomWaiter.until = self._originals['dom_waiter_until']
+        self._originals = {}
+        with self._active_lock:
+            DriverProfiler._active = None
+
+    def __enter__(self):
+        return self.install()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.uninstall()
+
+    def _wrap_wait(self, original, name):
+        profiler = self
+
+        def until(waiter, *args, **kwargs):
+            if not profiler._profiled():
+                return original(waiter, *args, **kwargs)
+            # 嵌套等待（如DomWaiter回退轮询）只记录最外层
+            depth = getattr(profiler._local, 'wait_depth', 0)
+            profiler._local.wait_depth = depth + 1
+            start_time = time.perf_counter()
+            try:
+                return original(waiter, *args, **kwargs)
+            finally:
+                profiler._local.wait_depth = depth
+                if depth == 0:
+                    profiler._record('wait', name, time.perf_counter() - start_time)
+        return until
+
+    def _wrap_sleep(self, original):
+        def sleep(seconds):
+            if not self._profiled():
+                return original(seconds)
+            start_time = time.perf_counter()
+            try:
+                return original(seconds)
+            finally:
+                # 等待内部的轮询间隔计入等待，不单独计为sleep
+                if not getattr(self._local, 'wait_depth', 0):
+                    caller = sys._getframe(1).f_code.co_name
+                    self._record('sleep', caller, time.perf_counter() - start_time)
+        return sleep
+
+    # ------------------------------------------------------------------
+    # 阶段与剧集
+    # ------------------------------------------------------------------
+    @contextlib.contextmanager
+    def stage(self, name):
+        """显式指定阶段（优先于按调用栈推断）"""
+        stack = self._stage_stack()
+        stack.append(name)
+        try:
+            yield
+        finally:
+            stack.pop()
+
+    @contextlib.contextmanager
+    def episode(self, episode_index):
+        """将期间的记录归属到指定剧集"""
+        previous = getattr(self._local, 'episode', None)
+        self._local.episode = episode_index
+        try:
+            yield
+        finally:
+            self._local.episode = previous
+
+    def _stage_stack(self):
+        if not hasattr(self._local, 'stages'):
+            self._local.stages = []
+        return self._local.stages
+
+    def _current_stage(self):
+        stack = self._stage_stack()
+        if stack:
+            return stack[-1]
+        frame = sys._getframe(3)
+        depth = 0
+        while frame is not None and depth < 40:
+            stage = self.STAGE_FUNCTIONS.get(frame.f_code.co_name)
+            if stage:
+                return stage
+            frame = frame.f_back
+            depth += 1
+        return 'other'
+
+    def _record(self, kind, name, duration):
+        record = ProfileRecord(kind, name, duration, self._current_stage(), getattr(self._local, 'episode', None))
+        with self._records_lock:
+            self.records.append(record)
+
+    # ------------------------------------------------------------------
+    # 报告
+    # ------------------------------------------------------------------
+    def round_trips_per_episode(self):
+        """剧集索引 -> {阶段名: 往返次数}"""
+        with self._records_lock:
+            records = list(self.records)
+        per_episode = {}
+        for record in records:
+            if record.kind == 'command' and record.episode is not None:
+                stages = per_episode.setdefault(record.episode, {})
+                stages[record.stage] = stages.get(record.stage, 0) + 1
+        return per_episode
+
+    def budget_violations(self):
+        """
+        检查每集各阶段的往返次数是否超出预算
+        :return: [{episode, stage, round_trips, budget}]
+        """
+        violations = []
+        for episode_index, stages in sorted(self.round_trips_per_episode().items()):
+            for stage, budget in self.budgets.items():
+                round_trips = stages.get(stage, 0)
+                if round_trips > budget:
+                    violations.append({'episode': episode_index, 'stage': stage,
+                                       'round_trips': round_trips, 'budget': budget})
+        return violations
+
+    def report(self):
+        """汇总：按命令、按阶段的往返次数与延迟分位数，等待/sleep总耗时，每集往返次数及预算检查"""
+        with self._records_lock:
+            records = list(self.records)
+
+        def grouped(kind, key):
+            groups = {}
+            for record in records:
+                if record.kind == kind:
+                    groups.setdefault(getattr(record, key), []).append(record.duration)
+            return {name: _summary(durations) for name, durations in sorted(groups.items())}
+
+        per_episode = self.round_trips_per_episode()
+        episode_totals = [sum(stages.values()) for stages in per_episode.values()]
+        violations = self.budget_violations()
+        return {
+            'round_trips': sum(1 for record in records if record.kind == 'command'),
+            'by_command': grouped('command', 'name'),
+            'by_stage': grouped('command', 'stage'),
+            'wait_seconds': round(sum(record.duration for record in records if record.kind == 'wait'), 4),
+            'sleep_seconds': round(sum(record.duration for record in records if record.kind == 'sleep'), 4),
+            'waits': grouped('wait', 'stage'),
+            'sleeps': grouped('sleep', 'name'),
+            'round_trips_per_episode': {
+                'mean': round(sum(episode_totals) / len(episode_totals), 2) if episode_totals else 0.0,
+                'episodes': {str(index): stages for index, stages in sorted(per_episode.items())},
+            },
+            'budgets': dict(self.budgets),
+            'budget_violations': violations,
+        }
@@ -0,0 +1,84 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+
+class EpisodeIndexCache:
+    def __init__(self, cache_file="episode_index.json", ttl=24 * 3600):
+        """
+        番剧剧集列表的本地持久化索引
+        :param cache_file: 索引文件路径
+        :param ttl: 索引有效期（秒），过期后需重新抓取
+        """
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.logger = logging.getLogger('episode_index')
+        self._lock = threading.Lock()
+        self._data = self._load()
+
+    @staticmethod
+    def parse_season_id(season_url):
+        """从番剧URL解析季度ID，例如 ss28747"""
+        match = re.search(r'/(ss\d+)', season_url or '')
+        return match.group(1) if match else None
+
+    def _load(self):
+        if not os.path.exists(self.cache_file):
+            return {}
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except Exception as e:
+            self.logger.warning(f"剧集索引文件读取失败，将重新建立: {str(e)}")
+            return {}
+
+    def _save(self):
+        # 先写临时文件再替换，避免中断时留下损坏的索引
+        temp_file = self.cache_file + ".tmp"
+        with open(temp_file, 'w', encoding='utf-8') as file:
+            json.dump(self._data, file, ensure_ascii=False, indent=2)
+        os.replace(temp_file, self.cache_file)
+
+    def get(self, season_id):
+        """
+        读取季度的剧集列表
+        :return: 剧集字典列表 [{url, ep_id, title}]，不存在或已过期返回None
+        """
+        with self._lock:
+            entry = self._data.get(season_id)
+        if not entry:
+            return None
+        age = time.time() - entry.get('updated_at', 0)
+        if age > self.ttl:
+            self.logger.info(f"剧集索引 {season_id} 已过期 ({age:.0f}秒)")
+            return None
+        return entry.get('episodes') or None
+
+    def put(self, season_id, episodes):
+        """保存季度的剧集列表"""
+        with self._lock:
+            self._data[season_id] = {'updated_at': time.time(), 'episodes': list(episodes)}
+            try:
+                self._save()
+                self.logger.info(f"已保存剧集索引 {season_id}，共 {len(episodes)} 集")
+            except Exception as e:
+                self.logger.error(f"保存剧集索引失败: {str(e)}")
+
+    def invalidate(self, season_id=None):
+        """
+        使索引失效
+        :param season_id: 指定季度ID，为None时清空全部索引
+        """
+        with self._lock:
+            if season_id is None:
+                self._data = {}
+            else:
+                self._data.pop(season_id, None)
+            try:
+                self._save()
+            except Exception as e:
+                self.logger.error(f"保存剧集索引失败: {str(e)}")
+        self.logger.info(f"剧集索引已失效: {season_id or '全部'}")
@@ -0,0 +1,195 @@
+from BiliLoginBot import BiliLoginBot
+from AnimePageAccess import AnimePageAccess
+from BotEvents import EpisodeStarted, EpisodeFinished, CoinChanged
+from CoinPlanner import CoinPlanner
+import threading
+import time
+import logging
+
+
+class CoinBudget:
+    def __init__(self, balance, reserve=4, cost_per_episode=2):
+        """
+        账号的硬币预算（余额与保留数），每次运行由CoinPlanner按剧集分配，结束后写回实际余额
+        :param balance: 当前硬币余额
+        :param reserve: 保留的最低硬币数
+        :param cost_per_episode: 每集预计消耗的硬币数（用于估算可处理的剧集数）
+        """
+        self.balance = balance
+        self.reserve = reserve
+        self.cost_per_episode = cost_per_episode
+        self._lock = threading.Lock()
+
+    @property
+    def remaining(self):
+        with self._lock:
+            return self.balance
+
+
+class EpisodeWorkerPool:
+    def __init__(self, driver_path, cookie_file, episode_urls, budget, workers=3, http_engine=None,
+                 ledger=None, account=None, lean=False, spa=False,
+                 event_channel=None, coins_per_episode=2, coinless=False, episode_status=None, headless=False):
+        """
+        多浏览器并行处理剧集
+        :param driver_path: ChromeDriver路径
+        :param cookie_file: BiliLoginBot.save_cookies保存的cookie文件
+        :param episode_urls: 已获取的全部剧集URL列表
+        :param budget: 共享的CoinBudget实例
+        :param workers: 浏览器实例数量
+        :param http_engine: 可选BiliHttpEngine，各工作线程共享
+        :param ledger: 可选RunLedger，记录每集结果
+        :param account: 账本中使用的账号标识
+        :param lean: 是否使用精简导航（eager加载 + 资源屏蔽）
+        :param spa: 是否在页面内切换剧集
+        :param event_channel: 可选EventChannel，发布剧集进度与硬币变化
+        :param coins_per_episode: 每集计划投币数量 (1/2)
+        :param coinless: 硬币不足时是否仍处理剩余剧集（只点赞和收藏）
+        :param episode_status: 可选，预检得到的三连状态，已投币的剧集不再分配硬币
+        :param headless: 工作线程新启动的浏览器是否使用无界面模式（服务器环境）
+        """
+        self.driver_path = driver_path
+        self.cookie_file = cookie_file
+        self.episode_urls = list(episode_urls)
+        self.budget = budget
+        self.workers = workers
+        self.http_engine = http_engine
+        self.ledger = ledger
+        self.account = account
+        self.lean = lean
+        self.spa = spa
+        self.event_channel = event_channel
+        self.coins_per_episode = coins_per_episode
+        self.coinless = coinless
+        self.episode_status = dict(episode_status or {})
+        self.headless = headless
+        self.planner = None  # 最近一次run使用的CoinPlanner
+        self.logger = logging.getLogger('worker_pool')
+        self.results = {}  # 剧集索引 -> 三连结果 (1/0/-1)
+        self._results_lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        """通知所有工作线程在当前剧集结束后退出"""
+        self._stop_event.set()
+
+    def run(self, episode_indices, should_continue=None, login_bots=None, borrowed_bot=None):
+        """
+        将剧集分配给多个浏览器并行执行
+        :param episode_indices: 要处理的剧集索引 (0-based)
+        :param should_continue: 可选回调，返回False时停止分配新剧集
+        :param login_bots: 可选，已登录的BiliLoginBot列表，依次交给工作线程使用，无需再启动浏览器
+                           （浏览器由线程池负责关闭）
+        :param borrowed_bot: 可选，调用方已登录且继续持有的BiliLoginBot，由第一个工作线程使用，线程池不会关闭它
+        :return: 剧集索引 -> 三连结果 的字典
+        """
+        login_bots = list(login_bots or [])
+        # 各线程通过同一个计划预占硬币，按实际消耗退还差额
+        self.planner = CoinPlanner(self.budget.remaining, episode_indices, reserve=self.budget.reserve,
+                                   coins_per_episode=self.coins_per_episode,
+                                   episode_status=self.episode_status, coinless=self.coinless)
+        # 工作线程依次向计划领取剧集（不预先分配），退还的硬币使余额不足的剧集可在运行中重新领取
+        planned_count = len(self.planner.pending())
+        if not planned_count:
+            self.logger.info("没有需要处理的剧集，不启动浏览器")
+            for login_bot in login_bots:
+                self._quit(login_bot)
+            return {}
+
+        # 已登录的浏览器优先使用，(浏览器, 是否由线程池关闭)
+        bots = ([(borrowed_bot, False)] if borrowed_bot is not None else []) + [(bot, True) for bot in login_bots]
+        worker_count = min(self.workers, planned_count)
+        self.logger.info(f"启动 {worker_count} 个浏览器处理 {planned_count} 集，剩余硬币预算: {self.budget.remaining}")
+        # 多余的已登录浏览器用不上，直接关闭
+        for login_bot, owned in bots[worker_count:]:
+            if owned:
+                self._quit(login_bot)
+
+        threads = []
+        for worker_id in range(worker_count):
+            login_bot, owned = bots[worker_id] if worker_id < len(bots) else (None, True)
+            thread = threading.Thread(
+                target=self._worker,
+                args=(worker_id, should_continue, login_bot, owned),
+                name=f"episode-worker-{worker_id}",
+                daemon=True
+            )
+            thread.start()
+            threads.append(thread)
+
+        for thread in threads:
+            thread.join()
+
+        self.budget.balance = self.planner.remaining
+        skipped = [index for index in self.planner.episode_indices
+                   if index not in self.planner.results]
+        if skipped:
+            self.logger.info(f"硬币不足或已停止，剩余 {len(skipped)} 集未处理")
+        self.logger.info(f"并行处理完成，共处理 {len(self.results)} 集，剩余硬币预算: {self.budget.remaining}")
+        return dict(self.results)
+
+    def _publish(self, event):
+        if self.event_channel is not None:
+            self.event_channel.publish(event)
+
+    @staticmethod
+    def _quit(login_bot):
+        try:
+            login_bot.driver.quit()
+        except Exception:
+            pass
+
+    def _worker(self, worker_id, should_continue, login_bot=None, owned=True):
+        """
+        单个工作线程：独立浏览器 + 共享登录状态（login_bot为已登录的浏览器时直接使用）
+        :param owned: 结束时是否关闭浏览器（调用方借出的浏览器为False）
+        """
+        try:
+            if login_bot is None:
+                login_bot = BiliLoginBot(self.driver_path, page_load_strategy="eager" if self.lean else "normal",
+                                         headless=self.headless)
+                if not login_bot.load_cookies_fast(self.cookie_file):
+                    self.logger.error(f"工作线程 {worker_id} 加载cookie失败，退出")
+                    return
+
+            anime_access = AnimePageAccess(login_bot.driver, lean=self.lean, spa=self.spa, account=self.account)
+            anime_access.episode_urls = list(self.episode_urls)
+
+            def should_stop():
+                return self._stop_event.is_set() or (should_continue is not None and not should_continue())
+
+            while True:
+                claim = self.planner.claim_next(should_stop=should_stop)
+                if claim is None:
+                    if should_stop():
+                        self.logger.info(f"工作线程 {worker_id} 收到停止信号")
+                    break
+                episode_index, coins = claim
+
+                self._publish(EpisodeStarted(episode_index))
+                episode_start = time.time()
+                try:
+                    anime_access.process_specific_episode(episode_index, triple_action=True,
+                                                          http_engine=self.http_engine, coins=coins)
+                except Exception:
+                    # 结果未知：按预占的硬币已全部消耗结算，避免其他线程一直等待该集结算
+                    self.planner.record(episode_index, None, coins)
+                    raise
+                triple_result = anime_access.last_triple_result
+                # 按实际消耗结算预占的硬币（已三连或失败的剧集全额退还）
+                fully_coined = self.planner.record(episode_index, triple_result, anime_access.last_coins_spent)
+
+                with self._results_lock:
+                    self.results[episode_index] = triple_result
+                self._publish(EpisodeFinished(
+                    episode_index, triple_result, time.time() - episode_start, anime_access.last_stage_durations
+                ))
+                self._publish(CoinChanged(self.planner.remaining))
+                if self.ledger is not None:
+                    self.ledger.record(self.account, self.episode_urls[episode_index], triple_result,
+                                       partial=not fully_coined)
+        except Exception as e:
+            self.logger.error(f"工作线程 {worker_id} 出错: {str(e)}")
+        finally:
+            if login_bot is not None and owned:
+                self._quit(login_bot)
@@ -0,0 +1,44 @@
+import collections
+import logging
+import threading
+
+
+class RingBufferHandler(logging.Handler):
+    def __init__(self, capacity=5000, level=logging.INFO):
+        """
+        线程安全的有界日志缓冲：工作线程只追加记录，GUI线程批量取出并格式化
+        :param capacity: 缓冲容量，超出时丢弃最旧的记录
+        :param level: 处理器级别，低于该级别的记录在格式化之前即被过滤
+        """
+        super().__init__(level)
+        self._buffer = collections.deque(maxlen=capacity)
+        self._buffer_lock = threading.Lock()
+        self.dropped = 0  # 因缓冲已满被丢弃的记录数
+
+    def emit(self, record):
+        # 仅保存记录本身，格式化推迟到GUI线程取出时进行
+        with self._buffer_lock:
+            if len(self._buffer) == self._buffer.maxlen:
+                self.dropped += 1
+            self._buffer.append(record)
+
+    def drain(self, max_records=None):
+        """
+        取出缓冲中的记录并格式化
+        :param max_records: 单次最多取出的记录数，None表示全部
+        :return: 格式化后的日志行列表
+        """
+        with self._buffer_lock:
+            count = len(self._buffer) if max_records is None else min(max_records, len(self._buffer))
+            records = [self._buffer.popleft() for _ in range(count)]
+
+        lines = []
+        for record in records:
+            # 级别可能在记录入队后被调高
+            if record.levelno < self.level:
+                continue
+            try:
+                lines.append(self.format(record))
+            except Exception:
+                self.handleError(record)
+        return lines
@@ -0,0 +1,467 @@
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+import html
+import json
+import logging
+import random
+import re
+import threading
+import time
+
+
+# 播放页模板：与线上页面保持相同的DOM约定（工具栏按钮ID、CSS Module类名、弹窗结构）
+_PLAY_PAGE_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>%(title)s_番剧_bilibili_哔哩哔哩</title>
+<style>
+  .dialog { display: none; } .dialog.show { display: block; }
+  .toolbar-left span { display: inline-block; margin: 4px; padding: 4px; cursor: pointer; }
+  .toolbar-left span.on { color: #00a1d6; }
+</style></head>
+<body>
+<div class="mediainfo_mediaInfoWrap__nCwhA">%(season_title)s</div>
+<div class="bpx-player-video-wrap"></div>
+<div id="toolbar-root"></div>
+<div class="numberList_wrapper___SI4W">%(episode_items)s</div>
+<div class="dialogcoin_coin_operated__KhIb2 dialog">
+  <div class="dialogcoin_coin_list__Qm3Rt">
+    <div class="dialogcoin_coin_item__Yp2Wd" data-multiply="1">1硬币</div>
+    <div class="dialogcoin_coin_item__Yp2Wd selected" data-multiply="2">2硬币</div>
+  </div>
+  <div class="dialogcoin_coin_btn__be9sU">确定</div>
+</div>
+<div class="DialogCollect_content__lBPfq dialog">
+  <ul class="DialogCollect_groupList__msAqc"><li><label><input type="checkbox">默认收藏夹</label></li></ul>
+  <div class="DialogCollect_btn__VErcg">确定</div>
+</div>
+<script>
+window.__playinfo__ = {};
+%(initial_state)s
+var MOCK = %(config)s;
+function getCookie(name) {
+  var match = document.cookie.match(new RegExp('(?:^|; )' + name + '=([^;]*)'));
+  return match ? match[1] : '';
+}
+function api(method, path, data) {
+  var options = {method: method, credentials: 'include'};
+  if (data) {
+    data.csrf = getCookie('bili_jct');
+    options.headers = {'Content-Type': 'application/x-www-form-urlencoded'};
+    options.body = new URLSearchParams(data).toString();
+  }
+  return fetch(path, options).then(function(r) { return r.json(); }).catch(function() { return {code: -1}; });
+}
+function $(selector) { return document.querySelector(selector); }
+function renderToolbar(relation) {
+  var bar = document.createElement('div');
+  bar.className = 'toolbar-left';
+  bar.innerHTML =
+    '<span id="like_info" class="' + (relation.like ? 'on' : '') + '">点赞</span>' +
+    '<span id="ogv_weslie_tool_coin_info" class="' + (relation.coin > 0 ? 'on' : '') + '">投币</span>' +
+    '<span id="ogv_weslie_tool_favorite_info" class="' + (relation.favorite ? 'on' : '') + '">收藏</span>';
+  var old = $('.toolbar-left');
+  if (old) { old.replaceWith(bar); } else { document.getElementById('toolbar-root').appendChild(bar); }
+  $('#like_info').addEventListener('click', function() {
+    var el = this;
+    api('POST', '/x/web-interface/archive/like', {aid: MOCK.aid, like: 1}).then(function(r) {
+      if (r.code === 0 || r.code === 65006) el.classList.add('on');
+    });
+  });
+  $('#ogv_weslie_tool_coin_info').addEventListener('click', function() {
+    $('.dialogcoin_coin_operated__KhIb2').classList.add('show');
+  });
+  $('#ogv_weslie_tool_favorite_info').addEventListener('click', function() {
+    $('.DialogCollect_content__lBPfq').classList.add('show');
+  });
+}
+function selectCoinItem(item) {
+  document.querySelectorAll('.dialogcoin_coin_item__Yp2Wd').forEach(function(el) { el.classList.remove('selected'); });
+  item.classList.add('selected');
+}
+document.querySelectorAll('.dialogcoin_coin_item__Yp2Wd').forEach(function(item) {
+  item.addEventListener('click', function() { selectCoinItem(item); });
+});
+$('.dialogcoin_coin_btn__be9sU').addEventListener('click', function() {
+  var multiply = $('.dialogcoin_coin_item__Yp2Wd.selected').getAttribute('data-multiply');
+  api('POST', '/x/web-interface/coin/add', {aid: MOCK.aid, multiply: multiply, select_like: 0}).then(function(r) {
+    if (r.code === 0 || r.code === 34005) $('#ogv_weslie_tool_coin_info').classList.add('on');
+    $('.dialogcoin_coin_operated__KhIb2').classList.remove('show');
+    // 弹窗关闭后恢复默认的2硬币
+    selectCoinItem(document.querySelectorAll('.dialogcoin_coin_item__Yp2Wd')[1]);
+  });
+});
+$('.DialogCollect_btn__VErcg').addEventListener('click', function() {
+  var data = {rid: MOCK.aid, type: 2, add_media_ids: MOCK.folderId, del_media_ids: ''};
+  api('POST', '/x/v3/fav/resource/deal', data).then(function(r) {
+    if (r.code === 0) $('#ogv_weslie_tool_favorite_info').classList.add('on');
+    $('.DialogCollect_content__lBPfq').classList.remove('show');
+  });
+});
+function loadEpisode(relation) {
+  setTimeout(function() { renderToolbar(relation); }, MOCK.renderDelay);
+}
+// 页面内切换剧集：更新地址后按新剧集重新渲染工具栏
+document.querySelectorAll('.numberList_wrapper___SI4W a').forEach(function(a) {
+  a.addEventListener('click', function(event) {
+    event.preventDefault();
+    history.pushState({}, '', a.getAttribute('href'));
+    MOCK.aid = parseInt(a.getAttribute('data-aid'), 10);
+    api('GET', '/x/web-interface/archive/relation?aid=' + MOCK.aid).then(function(r) { loadEpisode(r.data || {}); });
+  });
+});
+loadEpisode(MOCK.relation);
+</script>
+</body></html>
+"""
+
+_LOGIN_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>哔哩哔哩 (゜-゜)つロ 干杯~-bilibili 登录</title></head>
+<body>
+<div class="login-scan__qrcode" style="width:160px;height:160px;background:#ccc">二维码</div>
+<div class="qrcode__tip" style="display:none">扫码成功，请在手机上确认</div>
+<script>
+setTimeout(function() { document.querySelector('.qrcode__tip').style.display = 'block'; }, %(scan_delay)d);
+setTimeout(function() {
+  fetch('/mock/confirm-login', {method: 'POST', credentials: 'include'}).then(function() {
+    var img = document.createElement('img');
+    img.className = 'v-img';
+    img.alt = %(uname)s;
+    document.body.appendChild(img);
+  });
+}, %(confirm_delay)d);
+</script>
+</body></html>
+"""
+
+
+class MockBiliSite:
+    """
+    本地模拟的B站站点：登录二维码页、硬币记录页、番剧播放页与三连相关接口
+    用于在不访问线上站点的情况下端到端测量与回归测试，支持注入延迟与失败
+    """
+
+    SESSION_TOKEN = "mock-sessdata"
+    CSRF_TOKEN = "mock-csrf"
+    MID = "10001"
+    UNAME = "mock_user"
+
+    def __init__(self, host="127.0.0.1", port=0, episodes=12, coin=100.0, season_id=28747,
+                 latency=0.0, jitter=0.0, render_delay=0.05, throttle_rate=0.0, failure_rate=0.0,
+                 scan_delay=0.5, confirm_delay=1.0, embed_state=False, seed=None):
+        """
+        :param host: 监听地址
+        :param port: 监听端口，0表示自动分配
+        :param episodes: 番剧集数
+        :param coin: 账号初始硬币余额
+        :param season_id: 番剧ID（页面地址为 /bangumi/play/ss<season_id>）
+        :param latency: 每个请求的固定延迟（秒）
+        :param jitter: 在固定延迟上叠加的随机延迟上限（秒）
+        :param render_delay: 播放页工具栏在客户端渲染的延迟（秒）
+        :param throttle_rate: 三连操作接口返回风控拦截 (HTTP 412) 的概率
+        :param failure_rate: 三连操作接口返回错误码的概率
+        :param scan_delay: 登录页打开后模拟扫码成功的延迟（秒）
+        :param confirm_delay: 登录页打开后模拟手机确认登录的延迟（秒）
+        :param embed_state: 播放页是否内嵌 __INITIAL_STATE__ 剧集数据
+        :param seed: 随机数种子（失败注入可复现）
+        """
+        self.host = host
+        self.port = port
+        self.season_id = season_id
+        self.latency = latency
+        self.jitter = jitter
+        self.render_delay = render_delay
+        self.throttle_rate = throttle_rate
+        self.failure_rate = failure_rate
+        self.scan_delay = scan_delay
+        self.confirm_delay = confirm_delay
+        self.embed_state = embed_state
+        self.folder_id = 1000001
+        self.money = float(coin)
+        self.logger = logging.getLogger('mock_bili_site')
+        self.request_counts = {}  # 请求路径 -> 次数
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+        # 剧集：ep_id 与 aid 均为连续编号
+        self.episodes = [
+            {'id': 300000 + i, 'aid': 800000 + i, 'title': str(i + 1), 'long_title': f"第{i + 1}话"}
+            for i in range(episodes)
+        ]
+        self._episode_by_id = {episode['id']: episode for episode in self.episodes}
+        self.relations = {episode['aid']: {'like': False, 'coin': 0, 'favorite': False} for episode in self.episodes}
+
+    # ------------------------------------------------------------------
+    # 启动与地址
+    # ------------------------------------------------------------------
+    def start(self):
+        """在后台线程中启动服务器"""
+        self._server = ThreadingHTTPServer((self.host, self.port), self._make_handler())
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-bili-site", daemon=True)
+        self._thread.start()
+        self.logger.info(f"模拟站点已启动: {self.base_url}")
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def url(self, path):
+        return self.base_url + path
+
+    @property
+    def login_url(self):
+        return self.url("/login")
+
+    @property
+    def coin_record_url(self):
+        return self.url("/account/coin")
+
+    @property
+    def season_url(self):
+        return self.url(f"/bangumi/play/ss{self.season_id}")
+
+    def episode_url(self, index):
+        return self.url(f"/bangumi/play/ep{self.episodes[index]['id']}")
+
+    def fixture_cookies(self, expires_in=86400):
+        """已登录状态的cookie（selenium格式，可直接pickle为cookie文件）"""
+        expiry = int(time.time() + expires_in)
+        return [
+            {'name': name, 'value': value, 'domain': self.host, 'path': '/', 'secure': False,
+             'httpOnly': name == 'SESSDATA', 'expiry': expiry}
+            for name, value in (('SESSDATA', self.SESSION_TOKEN), ('bili_jct', self.CSRF_TOKEN),
+                                ('DedeUserID', self.MID))
+        ]
+
+    def reset_relations(self):
+        """清除所有剧集的三连状态"""
+        with self._lock:
+            for relation in self.relations.values():
+                relation.update({'like': False, 'coin': 0, 'favorite': False})
+
+    # ------------------------------------------------------------------
+    # 页面
+    # ------------------------------------------------------------------
+    def _play_page(self, episode):
+        with self._lock:
+            relation = dict(self.relations[episode['aid']])
+        items = "".join(
+            f'<div class="numberListItem_number_list_item__T2VKO" title="{html.escape(item["long_title"])}">'
+            f'<a href="/bangumi/play/ep{item["id"]}" data-aid="{item["aid"]}">{item["title"]}</a></div>'
+            for item in self.episodes
+        )
+        initial_state = ""
+        if self.embed_state:
+            ep_list = [{'ep_id': item['id'], 'link': self.url(f"/bangumi/play/ep{item['id']}"),
+                        'title': item['title'], 'long_title': item['long_title']} for item in self.episodes]
+            initial_state = f"window.__INITIAL_STATE__ = {json.dumps({'epList': ep_list})};"
+        config = {'aid': episode['aid'], 'folderId': self.folder_id, 'relation': relation,
+                  'renderDelay': int(self.render_delay * 1000)}
+        return _PLAY_PAGE_TEMPLATE % {
+            'title': html.escape(episode['long_title']),
+            'season_title': f"模拟番剧 ss{self.season_id}",
+            'episode_items': items,
+            'initial_state': initial_state,
+            'config': json.dumps(config),
+        }
+
+    def _login_page(self):
+        return _LOGIN_PAGE % {
+            'scan_delay': int(self.scan_delay * 1000),
+            'confirm_delay': int(self.confirm_delay * 1000),
+            'uname': json.dumps(self.UNAME),
+        }
+
+    def _home_page(self, logged_in):
+        avatar = f'<img class="v-img" alt="{self.UNAME}">' if logged_in else ''
+        return f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>哔哩哔哩</title></head><body>{avatar}</body></html>'
+
+    def _coin_page(self):
+        with self._lock:
+            money = self.money
+        return (
+            '<!DOCTYPE html><html><head><meta charset="utf-8"><title>我的硬币</title></head><body>'
+            f'<div class="coin-index-title">当前硬币 <i class="coin-num">{money:.1f}</i></div>'
+            '</body></html>'
+        )
+
+    # ------------------------------------------------------------------
+    # 接口
+    # ------------------------------------------------------------------
+    def _inject_failure(self):
+        """按配置的概率返回 'throttle' / 'failure' / None"""
+        roll = self._random.random()
+        if roll < self.throttle_rate:
+            return 'throttle'
+        if roll < self.throttle_rate + self.failure_rate:
+            return 'failure'
+        return None
+
+    def _api(self, method, path, query, form, logged_in):
+        """
+        处理接口请求
+        :return: (HTTP状态码, JSON字典)
+        """
+        if path == '/x/web-interface/nav':
+            if not logged_in:
+                return 200, {'code': -101, 'message': '账号未登录', 'data': {'isLogin': False}}
+            with self._lock:
+                money = self.money
+            return 200, {'code': 0, 'data': {'isLogin': True, 'uname': self.UNAME, 'mid': int(self.MID),
+                                             'money': money}}
+
+        if path == '/pgc/view/web/season':
+            return 200, {'code': 0, 'result': {'season_id': self.season_id, 'episodes': [
+                {'id': item['id'], 'aid': item['aid'], 'title': item['title'], 'long_title': item['long_title'],
+                 'link': self.url(f"/bangumi/play/ep{item['id']}")} for item in self.episodes
+            ]}}
+
+        if not logged_in:
+            return 200, {'code': -101, 'message': '账号未登录'}
+
+        if path == '/x/web-interface/archive/relation':
+            aid = int(query.get('aid', ['0'])[0])
+            with self._lock:
+                relation = self.relations.get(aid)
+                return 200, ({'code': 0, 'data': dict(relation)} if relation else {'code': -404, 'message': '啥都木有'})
+
+        if path == '/x/v3/fav/folder/created/list-all':
+            return 200, {'code': 0, 'data': {'count': 1, 'list': [{'id': self.folder_id, 'title': '默认收藏夹'}]}}
+
+        if method != 'POST':
+            return 404, {'code': -404, 'message': '啥都木有'}
+
+        # 三连操作接口：按配置注入风控与失败
+        injected = self._inject_failure()
+        if injected == 'throttle':
+            return 412, None
+        if injected == 'failure':
+            return 200, {'code': -500, 'message': '服务器错误'}
+        if form.get('csrf') != self.CSRF_TOKEN:
+            return 200, {'code': -111, 'message': 'csrf 校验失败'}
+
+        aid = int(form.get('aid') or form.get('rid') or 0)
+        with self._lock:
+            relation = self.relations.get(aid)
+            if relation is None:
+                return 200, {'code': -404, 'message': '啥都木有'}
+            if path == '/x/web-interface/archive/like':
+                if relation['like']:
+                    return 200, {'code': 65006, 'message': '已赞过'}
+                relation['like'] = True
+                return 200, {'code': 0}
+            if path == '/x/web-interface/coin/add':
+                multiply = int(form.get('multiply', 1))
+                if relation['coin'] + multiply > 2:
+                    return 200, {'code': 34005, 'message': '超过投币上限啦~'}
+                if self.money < multiply:
+                    return 200, {'code': -104, 'message': '硬币不足'}
+                relation['coin'] += multiply
+                self.money -= multiply
+                return 200, {'code': 0, 'data': {'like': False}}
+            if path == '/x/v3/fav/resource/deal':
+                relation['favorite'] = True
+                return 200, {'code': 0}
+        return 404, {'code': -404, 'message': '啥都木有'}
+
+    # ------------------------------------------------------------------
+    # 请求处理
+    # ------------------------------------------------------------------
+    def _make_handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                site.logger.debug(format % args)
+
+            def _cookies(self):
+                cookies = {}
+                for part in (self.headers.get('Cookie') or '').split(';'):
+                    if '=' in part:
+                        name, value = part.strip().split('=', 1)
+                        cookies[name] = value
+                return cookies
+
+            def _send(self, status, body, content_type='text/html; charset=utf-8', headers=None):
+                payload = body.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(payload)))
+                for name, value in (headers or []):
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _handle(self, method):
+                parts = urlsplit(self.path)
+                path = parts.path
+                with site._lock:
+                    site.request_counts[path] = site.request_counts.get(path, 0) + 1
+                delay = site.latency + (site._random.random() * site.jitter if site.jitter else 0.0)
+                if delay > 0:
+                    time.sleep(delay)
+
+                form = {}
+                if method == 'POST':
+                    length = int(self.headers.get('Content-Length') or 0)
+                    raw = self.rfile.read(length).decode('utf-8') if length else ''
+                    form = {key: values[0] for key, values in parse_qs(raw).items()}
+                logged_in = self._cookies().get('SESSDATA') == site.SESSION_TOKEN
+
+                if path == '/mock/confirm-login':
+                    cookies = [('SESSDATA', site.SESSION_TOKEN), ('bili_jct', site.CSRF_TOKEN), ('DedeUserID', site.MID)]
+                    self._send(200, '{"code": 0}', 'application/json',
+                               [('Set-Cookie', f"{name}={value}; Path=/; Max-Age=86400") for name, value in cookies])
+                    return
+                if path.startswith('/x/') or path.startswith('/pgc/'):
+                    status, result = site._api(method, path, parse_qs(parts.query), form, logged_in)
+                    if result is None:
+                        self._send(status, '<html><body>request blocked</body></html>')
+                    else:
+                        self._send(status, json.dumps(result, ensure_ascii=False), 'application/json; charset=utf-8')
+                    return
+                if path in ('/login', '/login/'):
+                    self._send(200, site._login_page())
+                    return
+                if path == '/account/coin':
+                    self._send(200, site._coin_page())
+                    return
+                if path == '/':
+                    self._send(200, site._home_page(logged_in))
+                    return
+
+                match = re.match(r'^/bangumi/play/(ss|ep)(\d+)$', path)
+                if match:
+                    if match.group(1) == 'ss':
+                        episode = site.episodes[0] if int(match.group(2)) == site.season_id else None
+                    else:
+                        episode = site._episode_by_id.get(int(match.group(2)))
+                    if episode is not None:
+                        self._send(200, site._play_page(episode))
+                        return
+                self._send(404, '<html><body>404</body></html>')
+
+            def do_GET(self):
+                self._handle('GET')
+
+            def do_POST(self):
+                self._handle('POST')
+
+        return Handler
@@ -0,0 +1,170 @@
+import logging
+import threading
+import time
+
+
+class AdaptiveTokenBucket:
+    def __init__(self, rate=1.0, burst=1, min_rate=0.05, max_rate=4.0, increase=0.1,
+                 backoff_factor=0.5, base_cooldown=2.0, max_cooldown=120.0, failure_threshold=3):
+        """
+        自适应令牌桶：操作成功时加性提高速率，被限流时乘性降低速率并指数退避
+        :param rate: 初始速率（次/秒）
+        :param burst: 桶容量（允许的突发次数）
+        :param min_rate: 最低速率
+        :param max_rate: 最高速率
+        :param increase: 每次成功后增加的速率
+        :param backoff_factor: 每次限流后速率乘以的系数
+        :param base_cooldown: 首次限流后的冷却时间（秒），连续限流时翻倍
+        :param max_cooldown: 冷却时间上限（秒）
+        :param failure_threshold: 连续多少次非限流失败（如状态校验失败）后按限流退避，单次页面缓慢不影响速率
+        """
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.backoff_factor = backoff_factor
+        self.base_cooldown = base_cooldown
+        self.max_cooldown = max_cooldown
+        self.tokens = float(burst)
+        self.failures = 0  # 连续限流次数
+        self.failure_threshold = failure_threshold
+        self.failed_checks = 0  # 连续的非限流失败次数（如状态校验失败），成功或退避后清零
+        self.cooldown_until = 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self):
+        """
+        预占一个令牌（不阻塞）
+        :return: 调用方需要等待的秒数
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            # 令牌可以透支，透支部分按当前速率折算为等待时间，保证并发调用依次排队
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(wait, self.cooldown_until - now)
+
+    def acquire(self):
+        """等待直到可以执行下一次操作，返回实际等待的秒数"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return max(wait, 0.0)
+
+    def on_success(self):
+        with self._lock:
+            self.failures = 0
+            self.failed_checks = 0
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_failure(self):
+        """
+        操作失败但并非限流（元素超时、状态未更新、普通错误码）：计数，连续达到failure_threshold次时退避
+        :return: 本次冷却时间（秒），未退避时为0
+        """
+        with self._lock:
+            self.failed_checks += 1
+            if self.failed_checks < self.failure_threshold:
+                return 0.0
+            self.failed_checks = 0
+            return self._back_off()
+
+    def on_throttle(self):
+        """
+        被限流：降低速率并进入冷却
+        :return: 本次冷却时间（秒）
+        """
+        with self._lock:
+            return self._back_off()
+
+    def _back_off(self):
+        """降低速率并进入冷却，连续退避时冷却时间翻倍（调用方持有锁）"""
+        now = time.monotonic()
+        self._refill(now)
+        self.failures += 1
+        self.rate = max(self.min_rate, self.rate * self.backoff_factor)
+        cooldown = min(self.max_cooldown, self.base_cooldown * 2 ** (self.failures - 1))
+        self.cooldown_until = max(self.cooldown_until, now + cooldown)
+        self.tokens = min(self.tokens, 0.0)
+        return cooldown
+
+
+class RateLimiter:
+    # 操作类型 -> 令牌桶参数（投币更容易触发风控，初始速率更低）
+    DEFAULT_SETTINGS = {
+        'like': {'rate': 1.0, 'burst': 2},
+        'coin': {'rate': 0.5, 'burst': 1},
+        'favorite': {'rate': 1.0, 'burst': 2},
+    }
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, settings=None):
+        """
+        按 (账号, 操作类型) 分别限速的共享限流器，同一账号的多个工作线程共用同一组令牌桶
+        :param settings: 可选，覆盖各操作类型的令牌桶参数
+        """
+        self.logger = logging.getLogger('rate_limiter')
+        self.settings = {action: dict(params) for action, params in self.DEFAULT_SETTINGS.items()}
+        if settings:
+            for action, params in settings.items():
+                self.settings.setdefault(action, {}).update(params)
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls):
+        """进程内共享的默认限流器"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def bucket(self, account, action):
+        key = (account or 'default', action)
+        with self._lock:
+            if key not in self._buckets:
+                self._buckets[key] = AdaptiveTokenBucket(**self.settings.get(action, {}))
+            return self._buckets[key]
+
+    def acquire(self, account, action):
+        """
+        等待 (账号, 操作) 的下一个令牌
+        :return: 实际等待的秒数
+        """
+        waited = self.bucket(account, action).acquire()
+        if waited > 0:
+            self.logger.debug(f"{account} {action} 限速等待 {waited:.2f} 秒")
+        return waited
+
+    def on_success(self, account, action):
+        self.bucket(account, action).on_success()
+
+    def on_failure(self, account, action):
+        """记录非限流原因的失败，连续失败达到阈值时退避"""
+        bucket = self.bucket(account, action)
+        cooldown = bucket.on_failure()
+        if cooldown > 0:
+            self.logger.warning(f"{account} {action} 连续 {bucket.failure_threshold} 次操作失败，"
+                                f"速率降至 {bucket.rate:.2f}/秒，冷却 {cooldown:.1f} 秒")
+        else:
+            self.logger.debug(f"{account} {action} 操作失败（非限流），连续 {bucket.failed_checks} 次")
+
+    def on_throttle(self, account, action):
+        """记录限流，速率减半并指数退避"""
+        bucket = self.bucket(account, action)
+        cooldown = bucket.on_throttle()
+        self.logger.warning(f"{account} {action} 触发限流，速率降至 {bucket.rate:.2f}/秒，冷却 {cooldown:.1f} 秒")
+
+    def rates(self):
+        """当前各 (账号, 操作) 的速率（次/秒）"""
+        with self._lock:
+            return {key: bucket.rate for key, bucket in self._buckets.items()}
@@ -0,0 +1,209 @@
+from selenium import webdriver
+from selenium.webdriver.remote.webdriver import WebDriver as RemoteWebDriver
+import json
+import logging
+import threading
+import time
+
+TRACE_VERSION = 1
+
+
+def _strip_session(params):
+    """去掉会话ID，使不同会话录制的命令可以互相匹配"""
+    if not params:
+        return {}
+    return {key: value for key, value in params.items() if key != 'sessionId'}
+
+
+def _params_key(command, params):
+    return command + '|' + json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def _loose_key(command, params):
+    """忽略易变参数（脚本参数、URL等）的匹配键：脚本按源码、CDP按命令名、查找按定位方式"""
+    if 'script' in params:
+        return command + '|' + params['script']
+    if 'cmd' in params:
+        return command + '|' + params['cmd']
+    if 'using' in params:
+        return command + '|' + params['using'] + '|' + str(params.get('value'))
+    return command
+
+
+class RecordingExecutor:
+    def __init__(self, executor, recorder):
+        """包装driver.command_executor，转发命令的同时记录参数与原始响应"""
+        self._executor = executor
+        self._recorder = recorder
+
+    def execute(self, command, params):
+        start_time = time.perf_counter()
+        response = self._executor.execute(command, params)
+        self._recorder.record(command, params, response, time.perf_counter() - start_time)
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self._executor, name)
+
+
+class CommandRecorder:
+    def __init__(self, driver):
+        """
+        录制真实浏览器会话的命令/响应轨迹
+        :param driver: 已启动的WebDriver实例（录制从调用start()之后开始）
+        """
+        self.driver = driver
+        self.logger = logging.getLogger('command_recorder')
+        self.commands = []
+        self._lock = threading.Lock()
+        self._original_executor = None
+
+    def start(self):
+        self._original_executor = self.driver.command_executor
+        self.driver.command_executor = RecordingExecutor(self._original_executor, self)
+        return self
+
+    def stop(self):
+        if self._original_executor is not None:
+            self.driver.command_executor = self._original_executor
+            self._original_executor = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def record(self, command, params, response, duration):
+        entry = {
+            'command': command,
+            'params': _strip_session(params),
+            'response': response,
+            'duration': round(duration, 6),
+        }
+        with self._lock:
+            self.commands.append(entry)
+
+    def save(self, trace_file):
+        """保存轨迹文件（JSON）"""
+        with self._lock:
+            commands = list(self.commands)
+        trace = {
+            'version': TRACE_VERSION,
+            'capabilities': self.driver.capabilities,
+            'commands': commands,
+        }
+        with open(trace_file, 'w', encoding='utf-8') as file:
+            json.dump(trace, file, ensure_ascii=False, default=str)
+        self.logger.info(f"已保存 {len(commands)} 条命令轨迹: {trace_file}")
+
+
+class ReplayExecutor:
+    # 轨迹中没有录制时直接返回空结果的命令
+    NEUTRAL_COMMANDS = ('quit', 'close', 'setTimeouts', 'deleteSession')
+
+    def __init__(self, trace, mode='keyed', latency_scale=0.0):
+        """
+        按录制的轨迹应答命令，不启动浏览器
+        :param trace: load_trace 读取的轨迹字典
+        :param mode: 'strict' 严格按录制顺序应答，命令不一致时报错；
+                     'keyed' 按 命令+参数 查找（找不到时依次放宽为脚本源码/定位方式、命令名），同一键的多个响应循环使用，
+                     可用一集的轨迹模拟任意多集
+        :param latency_scale: 按录制耗时的倍数休眠（0表示以进程内速度应答）
+        """
+        if mode not in ('strict', 'keyed'):
+            raise ValueError(f"不支持的回放模式: {mode}")
+        self.trace = trace
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.commands = trace.get('commands', [])
+        self.served = 0
+        self.misses = 0
+        self._cursor = 0
+        self._by_key = {}
+        self._by_loose_key = {}
+        self._by_command = {}
+        self._positions = {}
+        self._lock = threading.Lock()
+        for entry in self.commands:
+            self._by_key.setdefault(_params_key(entry['command'], entry['params']), []).append(entry)
+            self._by_loose_key.setdefault(_loose_key(entry['command'], entry['params']), []).append(entry)
+            self._by_command.setdefault(entry['command'], []).append(entry)
+
+    def _next(self, bucket_key, entries):
+        position = self._positions.get(bucket_key, 0)
+        self._positions[bucket_key] = position + 1
+        return entries[position % len(entries)]
+
+    def _lookup(self, command, params):
+        if self.mode == 'strict':
+            if command in self.NEUTRAL_COMMANDS and (self._cursor >= len(self.commands)
+                                                     or self.commands[self._cursor]['command'] != command):
+                # 录制时未包含的退出/超时设置命令不占用轨迹位置
+                return None
+            if self._cursor >= len(self.commands):
+                raise RuntimeError(f"回放轨迹已结束，无法应答命令: {command}")
+            entry = self.commands[self._cursor]
+            if entry['command'] != command:
+                raise RuntimeError(f"回放命令不一致: 期望 {entry['command']}，实际 {command} (位置 {self._cursor})")
+            self._cursor += 1
+            return entry
+
+        key = _params_key(command, params)
+        if key in self._by_key:
+            return self._next(('exact', key), self._by_key[key])
+        self.misses += 1
+        loose_key = _loose_key(command, params)
+        if loose_key in self._by_loose_key:
+            return self._next(('loose', loose_key), self._by_loose_key[loose_key])
+        if command in self._by_command:
+            return self._next(('command', command), self._by_command[command])
+        return None
+
+    def execute(self, command, params):
+        if command == 'newSession':
+            return {'value': {'sessionId': 'replay-session',
+                              'capabilities': self.trace.get('capabilities') or {}}}
+
+        with self._lock:
+            entry = self._lookup(command, _strip_session(params))
+            self.served += 1
+        if entry is None:
+            if command in self.NEUTRAL_COMMANDS:
+                return {'value': None}
+            raise RuntimeError(f"回放轨迹中没有命令: {command}")
+        if self.latency_scale > 0:
+            time.sleep(entry.get('duration', 0.0) * self.latency_scale)
+        # 返回副本，避免WebDriver解包响应时修改轨迹
+        return json.loads(json.dumps(entry['response']))
+
+    def close(self):
+        """与RemoteConnection接口保持一致（无连接需要关闭）"""
+
+
+class ReplayWebDriver(RemoteWebDriver):
+    """使用ReplayExecutor的WebDriver，可直接传给BiliLoginBot/AnimePageAccess/BilibiliTripleAction"""
+
+    def __init__(self, trace, mode='keyed', latency_scale=0.0):
+        """
+        :param trace: 轨迹字典或轨迹文件路径
+        :param mode: 回放模式，见ReplayExecutor
+        :param latency_scale: 按录制耗时的倍数休眠
+        """
+        if isinstance(trace, str):
+            trace = load_trace(trace)
+        self.replay_executor = ReplayExecutor(trace, mode=mode, latency_scale=latency_scale)
+        super().__init__(command_executor=self.replay_executor, options=webdriver.ChromeOptions())
+
+    def execute_cdp_cmd(self, cmd, cmd_args):
+        """与ChromiumDriver.execute_cdp_cmd相同的命令格式"""
+        return self.execute("executeCdpCommand", {"cmd": cmd, "params": cmd_args})["value"]
+
+
+def load_trace(trace_file):
+    """读取轨迹文件"""
+    with open(trace_file, 'r', encoding='utf-8') as file:
+        trace = json.load(file)
+    if trace.get('version') != TRACE_VERSION:
+        raise ValueError(f"不支持的轨迹版本: {trace.get('version')}")
+    return trace
@@ -0,0 +1,89 @@
+import logging
+import sqlite3
+import threading
+import time
+
+
+class RunLedger:
+    # 视为已完成的三连结果：1 本次完成，0 此前已三连
+    DONE_RESULTS = (0, 1)
+    # 投币少于所需（硬币不足时只点赞和收藏，或只投了剩余的零头）：不计为完成，硬币充足后重跑时继续处理
+    PARTIAL_RESULT = 2
+
+    def __init__(self, db_file="run_ledger.db"):
+        """
+        记录每个账号每集三连结果的本地账本，用于重跑时跳过已完成剧集
+        :param db_file: SQLite数据库文件路径
+        """
+        self.db_file = db_file
+        self.logger = logging.getLogger('run_ledger')
+        self._lock = threading.Lock()
+        # 允许工作线程共享同一连接，由锁保证串行访问
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS episode_outcomes (
+                account TEXT NOT NULL,
+                episode_url TEXT NOT NULL,
+                result INTEGER,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (account, episode_url)
+            )
+            """
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def episode_key(episode_url):
+        """去掉查询参数，避免同一剧集因来源参数不同被重复记录"""
+        return (episode_url or '').split('?', 1)[0]
+
+    def record(self, account, episode_url, result, partial=False):
+        """
+        记录剧集处理结果
+        :param account: 账号标识（如DedeUserID）
+        :param episode_url: 剧集URL
+        :param result: check_and_operate 的返回值 (1/0/-1)，未执行时为None
+        :param partial: 本集投币少于所需，成功时记为PARTIAL_RESULT而不是已完成
+        """
+        if partial and result == 1:
+            result = self.PARTIAL_RESULT
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO episode_outcomes (account, episode_url, result, updated_at) VALUES (?, ?, ?, ?)",
+                (account, self.episode_key(episode_url), result, time.time())
+            )
+            self._conn.commit()
+
+    def is_done(self, account, episode_url):
+        """剧集是否已完成三连"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM episode_outcomes WHERE account = ? AND episode_url = ?",
+                (account, self.episode_key(episode_url))
+            ).fetchone()
+        return row is not None and row[0] in self.DONE_RESULTS
+
+    def pending(self, account, episode_urls, episode_indices):
+        """
+        过滤出尚未完成的剧集索引（无需任何页面导航）
+        :param episode_urls: 全部剧集URL列表
+        :param episode_indices: 计划处理的剧集索引
+        :return: 未完成的剧集索引列表
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT episode_url FROM episode_outcomes WHERE account = ? AND result IN (0, 1)",
+                (account,)
+            ).fetchall()
+        done = {row[0] for row in rows}
+        valid_indices = [index for index in episode_indices if 0 <= index < len(episode_urls)]
+        pending = [index for index in valid_indices if self.episode_key(episode_urls[index]) not in done]
+        skipped = len(valid_indices) - len(pending)
+        if skipped:
+            self.logger.info(f"账号 {account} 已完成 {skipped} 集，本次跳过")
+        return pending
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,235 @@
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException, StaleElementReferenceException
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+
+
+class SelectorRegistry:
+    """
+    页面元素选择器注册表：每个逻辑元素对应按优先级排列的候选选择器
+    B站重新部署后CSS Module类名的哈希后缀会变化，因此每个元素都带有按类名稳定前缀匹配的候选项；
+    每个候选的命中率与耗时会持久化，失效的选择器自动降级，不再每次耗尽超时
+    """
+
+    # 逻辑元素 -> 候选选择器（声明顺序即初始优先级）
+    DEFAULT_CANDIDATES = {
+        'season_container': [
+            (By.CSS_SELECTOR, ".mediainfo_mediaInfoWrap__nCwhA"),
+            (By.CSS_SELECTOR, "[class*='mediainfo_mediaInfoWrap__']"),
+        ],
+        'episode_list': [
+            (By.CSS_SELECTOR, ".numberList_wrapper___SI4W"),
+            (By.CSS_SELECTOR, "[class*='numberList_wrapper__']"),
+        ],
+        'episode_item': [
+            (By.CSS_SELECTOR, ".numberListItem_number_list_item__T2VKO"),
+            (By.CSS_SELECTOR, "[class*='numberListItem_number_list_item__']"),
+        ],
+        'coin_dialog': [
+            (By.CSS_SELECTOR, ".dialogcoin_coin_operated__KhIb2"),
+            (By.CSS_SELECTOR, "[class*='dialogcoin_coin_operated__']"),
+        ],
+        'coin_confirm': [
+            (By.CSS_SELECTOR, ".dialogcoin_coin_btn__be9sU"),
+            (By.CSS_SELECTOR, "[class*='dialogcoin_coin_btn__']"),
+        ],
+        'coin_choice_1': [
+            (By.CSS_SELECTOR, "[class*='dialogcoin_coin_item__']:nth-child(1)"),
+        ],
+        'coin_choice_2': [
+            (By.CSS_SELECTOR, "[class*='dialogcoin_coin_item__']:nth-child(2)"),
+        ],
+        'favorite_dialog': [
+            (By.CSS_SELECTOR, ".DialogCollect_content__lBPfq"),
+            (By.CSS_SELECTOR, "[class*='DialogCollect_content__']"),
+        ],
+        'favorite_group_first': [
+            (By.CSS_SELECTOR, ".DialogCollect_groupList__msAqc li:first-child label"),
+            (By.CSS_SELECTOR, "[class*='DialogCollect_groupList__'] li:first-child label"),
+        ],
+        'favorite_confirm': [
+            (By.CSS_SELECTOR, ".DialogCollect_btn__VErcg"),
+            (By.CSS_SELECTOR, "[class*='DialogCollect_btn__']"),
+        ],
+        'coin_balance': [
+            (By.CSS_SELECTOR, ".coin-index-title i.coin-num"),
+            (By.CSS_SELECTOR, ".coin-num"),
+            (By.CSS_SELECTOR, ".coin-info .num"),
+            (By.XPATH, "//div[contains(@class, 'coin-index-title')]//i[contains(@class, 'coin-num')]"),
+            (By.XPATH, "//div[contains(text(), '硬币')]/following-sibling::div//i"),
+        ],
+    }
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, stats_file="selector_stats.json", candidates=None, flush_interval=60.0):
+        """
+        :param stats_file: 命中统计持久化文件
+        :param candidates: 可选，覆盖/追加逻辑元素的候选选择器
+        :param flush_interval: 运行期间定期写回统计的最短间隔（秒），None表示只在flush()时写入
+        """
+        self.stats_file = stats_file
+        self.flush_interval = flush_interval
+        self.logger = logging.getLogger('selector_registry')
+        self.candidates = {name: list(items) for name, items in self.DEFAULT_CANDIDATES.items()}
+        if candidates:
+            self.candidates.update({name: list(items) for name, items in candidates.items()})
+        self._lock = threading.Lock()
+        self._stats = self._load_stats()
+        self._dirty = False  # 内存中的统计是否有尚未写回的变化
+        self._flushed_at = time.monotonic()
+
+    @classmethod
+    def shared(cls):
+        """进程内共享的默认注册表（进程退出时写回统计）"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+                atexit.register(cls._shared.flush)
+            return cls._shared
+
+    # ------------------------------------------------------------------
+    # 统计与排序
+    # ------------------------------------------------------------------
+    def _load_stats(self):
+        try:
+            with open(self.stats_file, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_stats(self, content):
+        temp_file = self.stats_file + ".tmp"
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as file:
+                file.write(content)
+            os.replace(temp_file, self.stats_file)
+            return True
+        except OSError as e:
+            self.logger.warning(f"保存选择器统计失败: {str(e)}")
+            return False
+
+    def flush(self):
+        """将内存中的命中统计写回文件（无变化时不写入），运行结束时调用"""
+        with self._lock:
+            if not self._dirty:
+                return
+            content = json.dumps(self._stats, ensure_ascii=False, indent=2)
+            self._dirty = False
+            self._flushed_at = time.monotonic()
+        if not self._save_stats(content):
+            with self._lock:
+                self._dirty = True
+
+    @staticmethod
+    def _key(selector):
+        return f"{selector[0]}|{selector[1]}"
+
+    def _score(self, name, selector):
+        """返回 (命中率, 平均耗时)；无统计时命中率按0.5计"""
+        stat = self._stats.get(name, {}).get(self._key(selector))
+        if not stat:
+            return 0.5, 0.0
+        hits, misses = stat.get('hits', 0), stat.get('misses', 0)
+        # 拉普拉斯平滑，避免单次结果决定排序
+        hit_rate = (hits + 1) / (hits + misses + 2)
+        mean_latency = stat.get('latency', 0.0) / hits if hits else 0.0
+        return hit_rate, mean_latency
+
+    def ranked(self, name):
+        """按统计排序后的候选选择器 [(by, value)]：命中率高、耗时短者优先，相同时按声明顺序"""
+        candidates = self.candidates[name]
+
+        def sort_key(index):
+            hit_rate, mean_latency = self._score(name, candidates[index])
+            return -hit_rate, mean_latency, index
+
+        with self._lock:
+            order = sorted(range(len(candidates)), key=sort_key)
+        return [candidates[i] for i in order]
+
+    def ranked_css(self, name):
+        """排序后的CSS候选（供页面内脚本使用）"""
+        return [value for by, value in self.ranked(name) if by == By.CSS_SELECTOR]
+
+    def css_union(self, name):
+        """所有CSS候选组成的选择器组，页面内任一候选匹配即可"""
+        return ", ".join(self.ranked_css(name))
+
+    def record(self, name, selector, hit, latency=0.0):
+        """记录一次查找结果（只更新内存中的统计，由flush()或定期写回文件）"""
+        with self._lock:
+            stat = self._stats.setdefault(name, {}).setdefault(
+                self._key(selector), {'hits': 0, 'misses': 0, 'latency': 0.0}
+            )
+            if hit:
+                stat['hits'] += 1
+                stat['latency'] += latency
+            else:
+                stat['misses'] += 1
+            self._dirty = True
+            due = self.flush_interval is not None and time.monotonic() - self._flushed_at >= self.flush_interval
+        if due:
+            self.flush()
+
+    def record_css_match(self, name, matched_css, latency=0.0):
+        """
+        页面内脚本按排序依次尝试CSS候选后，记录命中项及其前面未命中的候选
+        :param matched_css: 命中的CSS选择器，None表示全部未命中
+        """
+        for css in self.ranked_css(name):
+            selector = (By.CSS_SELECTOR, css)
+            if css == matched_css:
+                self.record(name, selector, True, latency)
+                return
+            self.record(name, selector, False)
+
+    # ------------------------------------------------------------------
+    # 元素查找
+    # ------------------------------------------------------------------
+    def _first_match(self, driver, ranked, visible):
+        for selector in ranked:
+            elements = driver.find_elements(*selector)
+            for element in elements:
+                if not visible or element.is_displayed():
+                    return selector, element
+        return None
+
+    def find(self, driver, name, timeout=5, visible=False):
+        """
+        等待任一候选选择器匹配（同一次等待中轮询全部候选，失效的选择器不单独消耗超时）
+        :param name: 逻辑元素名称
+        :param timeout: 总超时时间（秒）
+        :param visible: 是否要求元素可见
+        :return: 匹配到的WebElement
+        :raises TimeoutException: 所有候选均未匹配
+        """
+        ranked = self.ranked(name)
+        start_time = time.time()
+        try:
+            selector, element = WebDriverWait(
+                driver, timeout, ignored_exceptions=(StaleElementReferenceException,)
+            ).until(
+                lambda d: self._first_match(d, ranked, visible)
+            )
+        except TimeoutException:
+            for candidate in ranked:
+                self.record(name, candidate, False)
+            self.logger.warning(f"元素 {name} 的所有候选选择器均未匹配")
+            raise
+
+        latency = time.time() - start_time
+        for candidate in ranked:
+            if candidate == selector:
+                break
+            self.record(name, candidate, False)
+        self.record(name, selector, True, latency)
+        if selector != ranked[0]:
+            self.logger.info(f"元素 {name} 由备用选择器 {selector[1]} 命中，已调整优先级")
+        return element
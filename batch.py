@@ -0,0 +1,265 @@
+"""
+无界面批量运行入口（不依赖tkinter，可在Linux服务器上运行）
+
+用法:
+    python batch.py jobs.json [--summary summary.json]
+
+任务文件格式见 jobs.example.json；运行结束后输出JSON格式的汇总（失败时包含error字段）。
+每个任务的字段（未填写时使用DEFAULT_JOB中的默认值）:
+    season_url         番剧地址（必填）
+    episodes           [起始集, 结束集]，从1开始且包含两端，省略时处理全部剧集
+    coin_floor         保留的最低硬币数
+    coins_per_episode  每集计划投币数量 (1/2)
+    coinless           硬币不足时是否继续处理剩余剧集（只点赞和收藏）
+    concurrency        并行浏览器数量，大于1时各浏览器共享同一投币计划
+
+退出码:
+    0  全部任务成功
+    1  部分任务失败或有剧集未处理
+    2  登录失败
+    3  获取硬币余额失败
+    4  任务文件无法读取或格式错误
+"""
+from BiliLoginBot import BiliLoginBot
+from AnimePageAccess import AnimePageAccess
+from EpisodeWorkerPool import EpisodeWorkerPool, CoinBudget
+from BiliHttpEngine import BiliHttpEngine
+from EpisodeIndexCache import EpisodeIndexCache
+from RunLedger import RunLedger
+from BrowserDaemon import BrowserDaemon
+from CoinPlanner import CoinPlanner
+from SelectorRegistry import SelectorRegistry
+import argparse
+import json
+import logging
+import sys
+import time
+
+logger = logging.getLogger('bilibili_bot')
+
+EXIT_OK = 0
+EXIT_JOB_FAILED = 1
+EXIT_LOGIN_FAILED = 2
+EXIT_COIN_FAILED = 3
+EXIT_BAD_JOB_FILE = 4
+
+DEFAULT_SETTINGS = {
+    "driver_path": None,
+    "cookie_file": "bili_cookies.pkl",
+    "coin_record_url": "https://account.bilibili.com/account/coin",
+    "episode_index_file": "episode_index.json",
+    "episode_index_ttl": 24 * 3600,
+    "ledger_file": "run_ledger.db",
+    "qrcode_screenshot": "login_qrcode.png",
+    "headless": True,
+    "lean": True,
+    "spa": False,                      # 页面内切换剧集，未在正式站点验证前默认关闭（见main.SPA_NAVIGATION）
+    # 流水线预加载只在浏览器三连时生效；启用HTTP接口时浏览器只是回退路径，预加载不会运行，因此默认关闭
+    "pipeline": False,
+    "prescan": True,
+    "use_http_engine": True,
+    "browser_daemon": False,           # 连接常驻浏览器（不存在时自动启动），运行结束后保持预热
+    "browser_daemon_port": 9222,
+    "browser_daemon_profile": "chrome_profile",
+}
+
+DEFAULT_JOB = {
+    "episodes": None,     # [起始集, 结束集]（从1开始，包含两端），None表示全部
+    "coin_floor": 4,      # 保留的最低硬币数
+    "coins_per_episode": 2,  # 每集计划投币数量 (1/2)
+    "coinless": False,    # 硬币不足时是否继续处理剩余剧集（只点赞和收藏）
+    "concurrency": 1,     # 并行浏览器数量
+}
+
+
+def load_job_file(path):
+    """
+    读取任务文件，补全默认配置
+    :raises OSError: 文件无法读取
+    :raises ValueError: 不是合法的JSON或缺少必需字段
+    """
+    with open(path, 'r', encoding='utf-8') as file:
+        data = json.load(file)
+    if not isinstance(data, dict) or not isinstance(data.get("jobs", []), list):
+        raise ValueError("任务文件应为包含jobs列表的JSON对象")
+    for job in data.get("jobs", []):
+        if not isinstance(job, dict) or not job.get("season_url"):
+            raise ValueError(f"任务缺少season_url: {job}")
+    settings = dict(DEFAULT_SETTINGS)
+    settings.update({key: value for key, value in data.items() if key != "jobs"})
+    jobs = []
+    for job in data.get("jobs", []):
+        merged = dict(DEFAULT_JOB)
+        merged.update(job)
+        jobs.append(merged)
+    return settings, jobs
+
+
+def episode_indices(job, total_episodes):
+    """将任务中的集数范围转换为剧集索引 (0-based)"""
+    if not job["episodes"]:
+        return list(range(total_episodes))
+    start, end = job["episodes"]
+    return list(range(max(start, 1) - 1, min(end, total_episodes)))
+
+
+def count_results(results):
+    counts = {"done": 0, "already_done": 0, "failed": 0, "skipped": 0}
+    for result in results:
+        if result == 1:
+            counts["done"] += 1
+        elif result == 0:
+            counts["already_done"] += 1
+        elif result == -1:
+            counts["failed"] += 1
+        else:
+            counts["skipped"] += 1
+    return counts
+
+
+def run_job(job, settings, login_bot, http_engine, ledger, account, budget):
+    """执行单个番剧任务，返回任务汇总"""
+    start_time = time.time()
+    summary = {"season_url": job["season_url"], "ok": False}
+
+    index_cache = EpisodeIndexCache(settings["episode_index_file"], ttl=settings["episode_index_ttl"])
+    anime_access = AnimePageAccess(login_bot.driver, index_cache=index_cache,
+                                   lean=settings["lean"], spa=settings["spa"], account=account,
+                                   pipeline=settings["pipeline"])
+    try:
+        if not anime_access.load_season_episodes(job["season_url"]):
+            summary["error"] = "获取剧集列表失败"
+            return summary
+
+        planned = episode_indices(job, len(anime_access.episode_urls))
+        pending = ledger.pending(account, anime_access.episode_urls, planned)
+        prescanned = []
+        if settings["prescan"]:
+            pending = anime_access.prescan_episodes(pending, http_engine=http_engine)
+            prescanned = list(anime_access.prescanned_done)
+            for episode_index in prescanned:
+                ledger.record(account, anime_access.episode_urls[episode_index], 0)
+        summary.update({"planned": len(planned), "pending": len(pending), "coins_before": budget.remaining})
+
+        budget.reserve = job["coin_floor"]
+        if job["concurrency"] > 1:
+            worker_pool = EpisodeWorkerPool(
+                settings["driver_path"], settings["cookie_file"], anime_access.episode_urls, budget,
+                workers=job["concurrency"], http_engine=http_engine, ledger=ledger, account=account,
+                lean=settings["lean"], spa=settings["spa"], coins_per_episode=job["coins_per_episode"],
+                coinless=job["coinless"], episode_status=anime_access.episode_status,
+                headless=settings["headless"]
+            )
+            # 已登录的浏览器交给第一个工作线程使用，后续任务继续使用
+            outcomes = worker_pool.run(pending, borrowed_bot=login_bot)
+        else:
+            outcomes = {}
+            planner = CoinPlanner(budget.remaining, pending, reserve=job["coin_floor"],
+                                  coins_per_episode=job["coins_per_episode"],
+                                  episode_status=anime_access.episode_status, coinless=job["coinless"])
+            summary["coin_plan"] = planner.summary()
+            while True:
+                plan = planner.pending()
+                if not plan:
+                    if planner.unaffordable:
+                        logger.info(f"硬币不足，剩余 {len(planner.unaffordable)} 集未处理")
+                    break
+                episode_index = plan[0]
+                next_index = plan[1] if len(plan) > 1 else None
+                anime_access.process_specific_episode(episode_index, triple_action=True,
+                                                      http_engine=http_engine, next_index=next_index,
+                                                      coins=planner.coins_for(episode_index))
+                triple_result = anime_access.last_triple_result
+                fully_coined = planner.record(episode_index, triple_result, anime_access.last_coins_spent)
+                # 投币少于所需的剧集不记为完成，硬币充足后重跑时继续处理
+                ledger.record(account, anime_access.episode_urls[episode_index], triple_result,
+                              partial=not fully_coined)
+                outcomes[episode_index] = triple_result
+            # 后续任务沿用按实际消耗更新后的余额
+            budget.balance = planner.remaining
+
+        # 预检确认已三连的剧集计为已完成；未处理的剧集（硬币不足、浏览器启动失败等）计为跳过
+        results = [outcomes.get(episode_index) for episode_index in pending]
+        summary.update(count_results([0] * len(prescanned) + results))
+        summary.update({
+            "ok": summary["failed"] == 0 and summary["skipped"] == 0,
+            "coins_after": budget.remaining,
+            "elapsed": round(time.time() - start_time, 2),
+        })
+        return summary
+    finally:
+        # 连接常驻浏览器时不遗留预加载标签页
+        anime_access.close_spare_tab()
+
+
+def run(job_file):
+    """执行任务文件中的全部任务，返回 (退出码, 汇总字典)"""
+    summary = {"ok": False, "jobs": []}
+    login_bot = None
+    try:
+        try:
+            settings, jobs = load_job_file(job_file)
+        except (OSError, ValueError) as e:
+            logger.error(f"读取任务文件失败: {str(e)}")
+            summary["error"] = f"读取任务文件失败: {str(e)}"
+            return EXIT_BAD_JOB_FILE, summary
+
+        debugger_address = None
+        if settings["browser_daemon"]:
+            daemon = BrowserDaemon(profile_dir=settings["browser_daemon_profile"],
+                                   port=settings["browser_daemon_port"], headless=settings["headless"])
+            if daemon.start():
+                debugger_address = daemon.debugger_address
+            else:
+                logger.warning("常驻浏览器不可用，改为启动新浏览器")
+        login_bot = BiliLoginBot(settings["driver_path"],
+                                 page_load_strategy="eager" if settings["lean"] else "normal",
+                                 headless=settings["headless"], debugger_address=debugger_address)
+        if not login_bot.login(settings["cookie_file"], qrcode_screenshot=settings["qrcode_screenshot"]):
+            summary["error"] = "登录失败"
+            return EXIT_LOGIN_FAILED, summary
+        if not login_bot.get_user_coin(settings["coin_record_url"], timeout=15, retries=2):
+            summary["error"] = "获取硬币余额失败"
+            return EXIT_COIN_FAILED, summary
+
+        account = login_bot.get_account_id() or "default"
+        http_engine = BiliHttpEngine(settings["cookie_file"]) if settings["use_http_engine"] else None
+        ledger = RunLedger(settings["ledger_file"])
+        # 所有任务共享同一账号的硬币预算
+        budget = CoinBudget(login_bot.coin)
+        summary["account"] = account
+
+        for job in jobs:
+            logger.info(f"开始任务: {job['season_url']}")
+            try:
+                summary["jobs"].append(run_job(job, settings, login_bot, http_engine, ledger, account, budget))
+            except Exception as e:
+                logger.exception(f"任务执行出错: {str(e)}")
+                summary["jobs"].append({"season_url": job.get("season_url"), "ok": False, "error": str(e)})
+
+        summary["ok"] = all(job_summary["ok"] for job_summary in summary["jobs"])
+        return (EXIT_OK if summary["ok"] else EXIT_JOB_FAILED), summary
+    finally:
+        SelectorRegistry.shared().flush()
+        if login_bot is not None:
+            login_bot.close_browser()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="B站番剧批量三连（无界面模式）")
+    parser.add_argument("job_file", help="JSON任务文件")
+    parser.add_argument("--summary", help="汇总输出文件，默认输出到标准输出")
+    args = parser.parse_args(argv)
+
+    exit_code, summary = run(args.job_file)
+    output = json.dumps(summary, ensure_ascii=False, indent=2)
+    if args.summary:
+        with open(args.summary, 'w', encoding='utf-8') as file:
+            file.write(output)
+    else:
+        print(output)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
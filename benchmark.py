@@ -0,0 +1,227 @@
+"""
+端到端性能基准：在本地模拟站点上运行完整流程，统计各阶段耗时与吞吐量
+
+用法:
+    python benchmark.py [--episodes 10] [--latency 0.05] [--throttle-rate 0.1] [--http] [--output result.json]
+    python benchmark.py --profile --budget navigate=3 --budget state=2
+    python benchmark.py --record trace.json            # 录制真实浏览器会话
+    python benchmark.py --replay trace.json --iterations 500   # 不启动Chrome，按轨迹回放
+
+输出JSON报告：登录/硬币/剧集列表等一次性阶段的耗时，每集各阶段 (http/navigate/triple) 的
+平均值、p50、p95，以及 episodes/second，用于发现热路径上的性能回退。
+启用 --profile 时附带WebDriver往返分析；任一剧集的阶段往返次数超出 --budget 时退出码为1。
+"""
+from BiliLoginBot import BiliLoginBot
+from AnimePageAccess import AnimePageAccess
+from BiliHttpEngine import BiliHttpEngine
+from MockBiliSite import MockBiliSite
+from RateLimiter import RateLimiter
+from SelectorRegistry import SelectorRegistry
+from DriverProfiler import DriverProfiler, percentile
+from ReplayDriver import CommandRecorder, ReplayWebDriver
+import argparse
+import contextlib
+import json
+import os
+import pickle
+import sys
+import tempfile
+import time
+
+# 不限速时使用的令牌桶参数（只测量热路径本身）
+UNPACED_SETTINGS = {
+    action: {'rate': 1000.0, 'burst': 1000, 'max_rate': 1000.0}
+    for action in ('like', 'coin', 'favorite')
+}
+
+
+def summarize(values):
+    return {
+        'count': len(values),
+        'mean': round(sum(values) / len(values), 4) if values else 0.0,
+        'p50': round(percentile(values, 0.5), 4),
+        'p95': round(percentile(values, 0.95), 4),
+        'max': round(max(values), 4) if values else 0.0,
+    }
+
+
+class StageTimer:
+    def __init__(self):
+        """记录一次性阶段的耗时"""
+        self.durations = {}
+
+    def measure(self, stage, func, *args, **kwargs):
+        start_time = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.durations[stage] = round(time.perf_counter() - start_time, 4)
+
+
+def parse_budgets(items):
+    """解析 --budget 阶段=次数 参数"""
+    budgets = {}
+    for item in items or []:
+        stage, _, limit = item.partition('=')
+        if not stage or not limit.isdigit():
+            raise argparse.ArgumentTypeError(f"无效的预算参数: {item}（格式: 阶段=次数）")
+        budgets[stage] = int(limit)
+    return budgets
+
+
+def run_benchmark(args):
+    """
+    启动模拟站点并运行完整流程
+    :return: 报告字典
+    """
+    work_dir = tempfile.mkdtemp(prefix="bili_bench_")
+    site = MockBiliSite(episodes=args.episodes, latency=args.latency, jitter=args.jitter,
+                        render_delay=args.render_delay, throttle_rate=args.throttle_rate,
+                        failure_rate=args.failure_rate, embed_state=args.embed_state, seed=args.seed)
+    site.start()
+
+    cookie_file = os.path.join(work_dir, "bench_cookies.pkl")
+    if not args.qr_login:
+        with open(cookie_file, 'wb') as file:
+            pickle.dump(site.fixture_cookies(), file)
+
+    # 统计与限流使用独立实例，不影响正式运行的数据
+    selectors = SelectorRegistry(stats_file=os.path.join(work_dir, "selector_stats.json"))
+    rate_limiter = RateLimiter() if args.paced else RateLimiter(UNPACED_SETTINGS)
+    timer = StageTimer()
+    report = {'config': vars(args), 'setup': timer.durations}
+    login_bot = None
+    http_engine = None
+    profiler = None
+    recorder = None
+    try:
+        # 回放模式使用录制的轨迹应答WebDriver命令，不启动Chrome
+        driver = ReplayWebDriver(args.replay, mode=args.replay_mode) if args.replay else None
+        login_bot = timer.measure(
+            'browser_start', BiliLoginBot, args.driver_path,
+            page_load_strategy="eager" if args.lean else "normal", selectors=selectors,
+            headless=not args.show, login_url=site.login_url, home_url=site.base_url, api_base=site.base_url,
+            driver=driver
+        )
+        if args.record:
+            recorder = CommandRecorder(login_bot.driver).start()
+        if args.profile:
+            profiler = DriverProfiler(login_bot.driver, budgets=args.budgets).install()
+        if not timer.measure('login', login_bot.login, cookie_file):
+            report['error'] = "登录失败"
+            return report
+        if not timer.measure('coin', login_bot.get_user_coin, site.coin_record_url, timeout=10, retries=1):
+            report['error'] = "获取硬币余额失败"
+            return report
+        account = login_bot.get_account_id() or "bench"
+
+        anime_access = AnimePageAccess(login_bot.driver, lean=args.lean, spa=args.spa, selectors=selectors,
+                                       rate_limiter=rate_limiter, account=account, pipeline=args.pipeline)
+        if not timer.measure('season', anime_access.load_season_episodes, site.season_url):
+            report['error'] = "获取剧集列表失败"
+            return report
+        if args.http:
+            http_engine = BiliHttpEngine(cookie_file, api_base=site.base_url, rate_limiter=rate_limiter)
+
+        episode_durations = []
+        stage_samples = {}
+        results = {}
+        run_start = time.perf_counter()
+        episode_indices = list(range(len(anime_access.episode_urls)))
+        if args.prescan:
+            episode_indices = timer.measure('prescan', anime_access.prescan_episodes, episode_indices,
+                                            http_engine=http_engine, api_base=site.base_url)
+            results['0'] = len(anime_access.prescanned_done)
+        episode_indices = episode_indices * args.iterations
+        for position, episode_index in enumerate(episode_indices):
+            next_index = episode_indices[position + 1] if position + 1 < len(episode_indices) else None
+            start_time = time.perf_counter()
+            with profiler.episode(episode_index) if profiler else contextlib.nullcontext():
+                anime_access.process_specific_episode(episode_index, triple_action=True, http_engine=http_engine,
+                                                      next_index=next_index)
+            episode_durations.append(time.perf_counter() - start_time)
+            for stage, seconds in anime_access.last_stage_durations.items():
+                stage_samples.setdefault(stage, []).append(seconds)
+            result_key = str(anime_access.last_triple_result)
+            results[result_key] = results.get(result_key, 0) + 1
+        run_elapsed = time.perf_counter() - run_start
+
+        report.update({
+            'episodes': len(episode_durations),
+            'elapsed': round(run_elapsed, 4),
+            'episodes_per_second': round(len(episode_durations) / run_elapsed, 4) if run_elapsed > 0 else 0.0,
+            'episode': summarize(episode_durations),
+            'stages': {stage: summarize(samples) for stage, samples in stage_samples.items()},
+            'results': results,
+            'requests': dict(sorted(site.request_counts.items())),
+        })
+        if driver is not None:
+            report['replay'] = {'served': driver.replay_executor.served, 'misses': driver.replay_executor.misses}
+        if profiler is not None:
+            report['profile'] = profiler.report()
+            if report['profile']['budget_violations']:
+                report['error'] = "WebDriver往返次数超出预算"
+        return report
+    finally:
+        selectors.flush()
+        if profiler is not None:
+            profiler.uninstall()
+        if recorder is not None:
+            recorder.stop()
+            recorder.save(args.record)
+        if http_engine is not None:
+            http_engine.close()
+        if login_bot is not None:
+            try:
+                login_bot.driver.quit()
+            except Exception:
+                pass
+        site.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="B站三连机器人端到端性能基准（本地模拟站点）")
+    parser.add_argument("--driver-path", default=None, help="ChromeDriver路径，默认由Selenium自动查找")
+    parser.add_argument("--episodes", type=int, default=10, help="模拟番剧的集数")
+    parser.add_argument("--latency", type=float, default=0.0, help="每个请求的固定延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="随机附加延迟上限（秒）")
+    parser.add_argument("--render-delay", type=float, default=0.05, help="工具栏客户端渲染延迟（秒）")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="操作接口返回412风控的概率")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="操作接口返回错误码的概率")
+    parser.add_argument("--seed", type=int, default=1, help="失败注入的随机数种子")
+    parser.add_argument("--embed-state", action="store_true", help="播放页内嵌__INITIAL_STATE__剧集数据")
+    parser.add_argument("--http", action="store_true", help="优先通过HTTP接口三连")
+    parser.add_argument("--no-lean", dest="lean", action="store_false", help="关闭精简导航")
+    parser.add_argument("--no-spa", dest="spa", action="store_false", help="关闭页面内切换剧集")
+    parser.add_argument("--pipeline", action="store_true", help="在第二个标签页预加载下一集")
+    parser.add_argument("--prescan", action="store_true", help="开始前批量预检三连状态，跳过已三连的剧集")
+    parser.add_argument("--paced", action="store_true", help="使用默认限流参数（默认不限速，只测热路径）")
+    parser.add_argument("--qr-login", action="store_true", help="不预置cookie，走模拟扫码登录流程")
+    parser.add_argument("--show", action="store_true", help="显示浏览器窗口")
+    parser.add_argument("--profile", action="store_true", help="记录每次WebDriver往返的命令、耗时与阶段")
+    parser.add_argument("--budget", action="append", metavar="STAGE=N",
+                        help="每集某阶段允许的最大往返次数（需配合--profile，可重复）")
+    parser.add_argument("--iterations", type=int, default=1, help="重复处理全部剧集的轮数")
+    parser.add_argument("--record", metavar="TRACE", help="录制WebDriver命令轨迹到文件")
+    parser.add_argument("--replay", metavar="TRACE", help="按录制的轨迹回放，不启动Chrome")
+    parser.add_argument("--replay-mode", choices=("keyed", "strict"), default="keyed",
+                        help="回放模式：keyed按命令匹配并循环使用（默认），strict严格按录制顺序")
+    parser.add_argument("--output", help="报告输出文件，默认输出到标准输出")
+    args = parser.parse_args(argv)
+    try:
+        args.budgets = parse_budgets(args.budget)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+
+    report = run_benchmark(args)
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(output)
+    else:
+        print(output)
+    return 1 if 'error' in report else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
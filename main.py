@@ -1,7 +1,19 @@
 from BiliLoginBot import BiliLoginBot
 from AnimePageAccess import AnimePageAccess
+from EpisodeWorkerPool import EpisodeWorkerPool, CoinBudget
+from BiliHttpEngine import BiliHttpEngine
+from EpisodeIndexCache import EpisodeIndexCache
+from RunLedger import RunLedger
+from CoinPlanner import CoinPlanner
+from AccountOrchestrator import AccountOrchestrator
+from BrowserDaemon import BrowserDaemon
+from SelectorRegistry import SelectorRegistry
+from GuiLogSink import RingBufferHandler
+from BotEvents import (EventChannel, ThroughputTracker, StatusChanged, CoinChanged, RunStarted,
+                       EpisodeStarted, EpisodeFinished, RunFinished)
 import os
 import logging
+import logging.handlers
 import tkinter as tk
 from tkinter import scrolledtext, messagebox
 import threading
@@ -15,10 +27,53 @@ COOKIE_FILE = "bili_cookies.pkl"
 
 # 定义番剧页面
 ANIME_URL = "https://www.bilibili.com/bangumi/play/ss28747?from_spmid=666.5.hotlist.0"  # 示例番剧页面
-PARENT_CONTAINER = "numberList_wrapper___SI4W"  # 图片中的类名
-CHILD_CONTAINER = "numberListItem_number_list_item__T2VKO"  # 图片中的类名
 COIN_RECORD_URL = "https://account.bilibili.com/account/coin"
 
+# 剧集列表本地索引（有效期内无需重新加载番剧页面）
+EPISODE_INDEX_FILE = "episode_index.json"
+EPISODE_INDEX_TTL = 24 * 3600
+
+# 日志配置：GUI缓冲容量、单次刷新的最大行数、日志区保留的最大行数、完整历史日志文件
+LOG_BUFFER_CAPACITY = 5000
+LOG_BATCH_SIZE = 500
+LOG_MAX_LINES = 2000
+LOG_FILE = "bili_bot.log"
+
+# 运行账本（记录每集结果，重跑时跳过已完成剧集）
+LEDGER_FILE = "run_ledger.db"
+
+# 精简导航：eager加载并屏蔽视频/图片/弹幕/统计资源，只等待三连工具栏
+LEAN_NAVIGATION = True
+# 页面内切换剧集（无需重新加载整个播放页，失败时自动回退）
+# 切换完成以旧工具栏节点被替换为准，尚未在正式站点上验证；若工具栏节点被复用，每集都会等满超时再回退，因此默认关闭
+SPA_NAVIGATION = False
+# 流水线导航：操作当前剧集时在另一个标签页预加载下一集
+# 仅在浏览器三连时生效；USE_HTTP_ENGINE开启时浏览器只在接口失败后回退使用，预加载不会运行，因此默认关闭
+PIPELINE_NAVIGATION = False
+# 批量预检：开始前并发查询全部剧集的三连状态，已三连的剧集不再加载页面
+PRESCAN_EPISODES = True
+
+# 常驻浏览器：连接持久化用户目录的Chrome（不存在时自动启动），运行结束后浏览器保持预热
+BROWSER_DAEMON = False
+BROWSER_DAEMON_PORT = 9222
+BROWSER_DAEMON_PROFILE = "chrome_profile"
+
+# 并行浏览器数量（大于1时启用多浏览器并行模式）
+WORKER_COUNT = 1
+# 保留的最低硬币数
+COIN_RESERVE = 4
+# 每集计划投币数量 (1/2)
+COINS_PER_EPISODE = 2
+# 硬币不足时是否继续处理剩余剧集（只点赞和收藏）
+LIKE_WITHOUT_COINS = False
+# 优先通过HTTP接口三连（失败时回退到浏览器操作）
+USE_HTTP_ENGINE = True
+
+# 多账号模式：账号名称列表（cookie文件为 ACCOUNT_COOKIE_DIR/<账号>.pkl），为空时使用单账号模式
+ACCOUNTS = []
+ACCOUNT_COOKIE_DIR = "accounts"
+ACCOUNT_LEDGER_DIR = "ledgers"
+
 class BiliBotGUI:
     def __init__(self, root):
         self.root = root
@@ -26,18 +81,23 @@ class BiliBotGUI:
         self.root.geometry("800x600")
         self.root.resizable(True, True)
         
-        # 设置日志队列
-        self.log_queue = []
+        # GUI日志处理器（在setup_logging中创建）
+        self.gui_handler = None
         self.running = False
         
+        # 工作线程 -> 界面 的事件通道，由Tk线程定时取出处理
+        self.events = EventChannel()
+        self.tracker = ThroughputTracker()
+        
         # 创建UI
         self.create_widgets()
         
         # 配置日志处理器
         self.setup_logging()
         
-        # 启动日志更新线程
+        # 启动日志与事件的定时刷新
         self.update_logs()
+        self.update_events()
     
     def create_widgets(self):
         # 标题
@@ -57,6 +117,24 @@ class BiliBotGUI:
         self.coin_var = tk.StringVar(value="0")
         tk.Label(status_frame, textvariable=self.coin_var, fg="green", font=("Arial", 10, "bold")).grid(row=0, column=3, sticky=tk.W)
         
+        tk.Label(status_frame, text="日志级别:", font=("Arial", 10)).grid(row=0, column=4, padx=(20, 0), sticky=tk.W)
+        self.log_level_var = tk.StringVar(value="INFO")
+        tk.OptionMenu(status_frame, self.log_level_var, "DEBUG", "INFO", "WARNING", "ERROR",
+                      command=self.change_log_level).grid(row=0, column=5, sticky=tk.W)
+        
+        # 吞吐量统计
+        tk.Label(status_frame, text="速度:", font=("Arial", 10)).grid(row=1, column=0, sticky=tk.W)
+        self.speed_var = tk.StringVar(value="-")
+        tk.Label(status_frame, textvariable=self.speed_var, font=("Arial", 10)).grid(row=1, column=1, sticky=tk.W)
+        
+        tk.Label(status_frame, text="平均耗时:", font=("Arial", 10)).grid(row=1, column=2, padx=(20, 0), sticky=tk.W)
+        self.mean_var = tk.StringVar(value="-")
+        tk.Label(status_frame, textvariable=self.mean_var, font=("Arial", 10)).grid(row=1, column=3, sticky=tk.W)
+        
+        tk.Label(status_frame, text="预计剩余:", font=("Arial", 10)).grid(row=1, column=4, padx=(20, 0), sticky=tk.W)
+        self.eta_var = tk.StringVar(value="-")
+        tk.Label(status_frame, textvariable=self.eta_var, font=("Arial", 10)).grid(row=1, column=5, sticky=tk.W)
+        
         # 日志区域
         log_frame = tk.LabelFrame(self.root, text="操作日志")
         log_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
@@ -78,16 +156,6 @@ class BiliBotGUI:
         tk.Button(button_frame, text="退出", command=self.root.destroy, width=15, height=2).pack(side=tk.RIGHT, padx=5)
     
     def setup_logging(self):
-        # 创建自定义日志处理器
-        class QueueHandler(logging.Handler):
-            def __init__(self, log_queue):
-                super().__init__()
-                self.log_queue = log_queue
-            
-            def emit(self, record):
-                msg = self.format(record)
-                self.log_queue.append(msg)
-        
         # 清除现有处理器
         for handler in logger.handlers[:]:
             logger.removeHandler(handler)
@@ -98,26 +166,74 @@ class BiliBotGUI:
         # 添加控制台处理器
         console_handler = logging.StreamHandler()
         console_handler.setFormatter(formatter)
+        console_handler.setLevel(logging.INFO)
         logger.addHandler(console_handler)
         
-        # 添加GUI处理器
-        gui_handler = QueueHandler(self.log_queue)
-        gui_handler.setFormatter(formatter)
-        logger.addHandler(gui_handler)
+        # 添加轮转文件处理器（保存完整历史）
+        file_handler = logging.handlers.RotatingFileHandler(
+            LOG_FILE, maxBytes=5 * 1024 * 1024, backupCount=5, encoding="utf-8"
+        )
+        file_handler.setFormatter(formatter)
+        logger.addHandler(file_handler)
+        
+        # 添加GUI处理器（有界缓冲，按级别过滤后再格式化）
+        self.gui_handler = RingBufferHandler(capacity=LOG_BUFFER_CAPACITY, level=logging.INFO)
+        self.gui_handler.setFormatter(formatter)
+        logger.addHandler(self.gui_handler)
         
-        logger.setLevel(logging.INFO)
+        logger.setLevel(logging.DEBUG)
+    
+    def change_log_level(self, level_name):
+        """调整GUI日志区显示的最低级别"""
+        self.gui_handler.setLevel(getattr(logging, level_name))
     
     def update_logs(self):
-        if self.log_queue:
+        lines = self.gui_handler.drain(LOG_BATCH_SIZE)
+        if lines:
             self.log_area.config(state=tk.NORMAL)
-            while self.log_queue:
-                msg = self.log_queue.pop(0)
-                self.log_area.insert(tk.END, msg + "\n")
+            # 批量插入
+            self.log_area.insert(tk.END, "\n".join(lines) + "\n")
+            # 限制日志区行数，删除最早的行
+            line_count = int(self.log_area.index("end-1c").split(".")[0])
+            if line_count > LOG_MAX_LINES:
+                self.log_area.delete("1.0", f"{line_count - LOG_MAX_LINES + 1}.0")
             self.log_area.config(state=tk.DISABLED)
             self.log_area.yview(tk.END)
         
         self.root.after(100, self.update_logs)
     
+    def update_events(self):
+        """在Tk线程中处理工作线程发布的事件"""
+        for event in self.events.drain():
+            if isinstance(event, StatusChanged):
+                self.status_var.set(event.text)
+            elif isinstance(event, CoinChanged):
+                self.coin_var.set(str(event.balance))
+            elif isinstance(event, (RunStarted, EpisodeFinished)):
+                self.tracker.on_event(event)
+                self.refresh_throughput()
+            elif isinstance(event, EpisodeStarted):
+                self.status_var.set(f"正在处理第 {event.episode_index+1} 集")
+            elif isinstance(event, RunFinished):
+                if event.status:
+                    self.status_var.set(event.status)
+                self.start_button.config(state=tk.NORMAL)
+                self.stop_button.config(state=tk.DISABLED)
+        
+        self.root.after(100, self.update_events)
+    
+    def refresh_throughput(self):
+        """刷新速度、平均耗时与预计剩余时间"""
+        if not self.tracker.finished:
+            self.speed_var.set("-")
+            self.mean_var.set("-")
+            self.eta_var.set("-")
+            return
+        self.speed_var.set(f"{self.tracker.episodes_per_minute:.2f} 集/分钟")
+        self.mean_var.set(f"{self.tracker.mean_seconds_per_episode:.1f} 秒/集")
+        eta = self.tracker.eta_seconds
+        self.eta_var.set("-" if eta is None else f"{int(eta // 60)}分{int(eta % 60)}秒")
+    
     def start_bot(self):
         if not self.running:
             self.running = True
@@ -142,108 +258,153 @@ class BiliBotGUI:
             # 替换为你的ChromeDriver实际路径
             DRIVER_PATH = "C:/Program Files/Google/Chrome/Application/chromeDriver/chromedriver-win64/chromedriver.exe"
             
-            # 创建登录机器人实例
-            login_bot = BiliLoginBot(DRIVER_PATH)
+            if ACCOUNTS:
+                self.run_accounts(DRIVER_PATH)
+                return
             
-            # 检查cookie文件是否存在
-            if os.path.exists(COOKIE_FILE):
-                logger.info("检测到cookie文件，尝试加载登录状态...")
-                
-                # 步骤1: 加载保存的cookies
-                if login_bot.load_cookies(COOKIE_FILE):
-                    # 步骤2: 验证登录状态
-                    if login_bot.is_logged_in():
-                        logger.info("Cookie登录成功！跳过扫码流程")
-                    else:
-                        logger.warning("Cookie登录失败，需要重新扫码登录")
-                        # 执行正常扫码流程
-                        if login_bot.open_login_page():
-                            logger.info("请使用手机B站APP扫描二维码")
-                            if login_bot.wait_for_qrcode_scan():
-                                logger.info("扫码成功！请在手机上选择登录选项并确认")
-                                if login_bot.wait_for_login_confirmation():
-                                    login_bot.save_cookies(COOKIE_FILE)
-                                else:
-                                    logger.error("用户未完成确认操作")
-                                    login_bot.close_browser()
-                                    return
+            # 创建登录机器人实例
+            debugger_address = None
+            if BROWSER_DAEMON:
+                daemon = BrowserDaemon(profile_dir=BROWSER_DAEMON_PROFILE, port=BROWSER_DAEMON_PORT)
+                if daemon.start():
+                    debugger_address = daemon.debugger_address
                 else:
-                    logger.error("加载cookie失败，需要重新扫码登录")
-                    # 执行正常扫码流程
-                    if login_bot.open_login_page():
-                        logger.info("请使用手机B站APP扫描二维码")
-                        if login_bot.wait_for_qrcode_scan():
-                            logger.info("扫码成功！请在手机上选择登录选项并确认")
-                            if login_bot.wait_for_login_confirmation():
-                                login_bot.save_cookies(COOKIE_FILE)
-                            else:
-                                logger.error("用户未完成确认操作")
-                                login_bot.close_browser()
-                                return
-            else:
-                logger.info("未找到cookie文件，需要扫码登录")
-                # 执行正常扫码流程
-                if login_bot.open_login_page():
-                    logger.info("请使用手机B站APP扫描二维码")
-                    if login_bot.wait_for_qrcode_scan():
-                        logger.info("扫码成功！请在手机上选择登录选项并确认")
-                        if login_bot.wait_for_login_confirmation():
-                            login_bot.save_cookies(COOKIE_FILE)
-                        else:
-                            logger.error("用户未完成确认操作")
-                            login_bot.close_browser()
-                            return
+                    logger.warning("常驻浏览器不可用，改为启动新浏览器")
+            login_bot = BiliLoginBot(DRIVER_PATH, page_load_strategy="eager" if LEAN_NAVIGATION else "normal",
+                                     debugger_address=debugger_address)
+            
+            # 步骤1-2: 登录（cookie快速校验 / 加载cookie / 扫码）
+            if not login_bot.login(COOKIE_FILE):
+                logger.error("登录失败")
+                login_bot.close_browser()
+                return
             
             # 步骤3: 获取用户硬币信息
             if login_bot.get_user_coin(COIN_RECORD_URL, timeout=15,retries=2):
                 testCoin = login_bot.coin
-                self.coin_var.set(str(login_bot.coin))
+                self.events.publish(CoinChanged(login_bot.coin))
                 logger.info(f"用户硬币值： {login_bot.coin}")
             else:
                 logger.error("获取用户硬币信息失败")
                 login_bot.close_browser()
                 return
             
-            # 步骤5: 访问番剧页面
-            anime_access = AnimePageAccess(login_bot.driver)
-            if anime_access.navigate_and_verify_page(ANIME_URL):
-                logger.info("成功进入番剧页面")
-                episode_bool = anime_access.get_all_episodes_urls(
-                    parent_class=PARENT_CONTAINER,  # 图片中的父容器类名
-                    child_class=CHILD_CONTAINER       # 图片中的子容器类名
-                )
+            # 步骤4: 创建HTTP三连引擎（复用保存的cookie）
+            http_engine = BiliHttpEngine(COOKIE_FILE) if USE_HTTP_ENGINE and os.path.exists(COOKIE_FILE) else None
+            
+            # 步骤5: 访问番剧页面（三连节奏按账号由共享限流器控制）
+            account = login_bot.get_account_id() or "default"
+            index_cache = EpisodeIndexCache(EPISODE_INDEX_FILE, ttl=EPISODE_INDEX_TTL)
+            anime_access = AnimePageAccess(login_bot.driver, index_cache=index_cache,
+                                           lean=LEAN_NAVIGATION, spa=SPA_NAVIGATION, account=account,
+                                           pipeline=PIPELINE_NAVIGATION)
+            # 剧集列表的容器类名由SelectorRegistry统一维护
+            episode_bool = anime_access.load_season_episodes(ANIME_URL)
+            if episode_bool:
+                logger.info("成功获取番剧剧集列表")
+                
+                # 跳过账本中已完成的剧集，中断后重跑从未完成处继续
+                ledger = RunLedger(LEDGER_FILE)
+                episode_range = ledger.pending(account, anime_access.episode_urls, range(20, 35))  # 意思是从第21集到第35集
+                if PRESCAN_EPISODES:
+                    episode_range = anime_access.prescan_episodes(episode_range, http_engine=http_engine)
+                    for episode_index in anime_access.prescanned_done:
+                        ledger.record(account, anime_access.episode_urls[episode_index], 0)
+                self.events.publish(RunStarted(len(episode_range)))
+                if episode_bool and WORKER_COUNT > 1:
+                    # 多浏览器并行模式：共享登录cookie与投币计划
+                    budget = CoinBudget(testCoin, reserve=COIN_RESERVE, cost_per_episode=COINS_PER_EPISODE)
+                    worker_pool = EpisodeWorkerPool(
+                        DRIVER_PATH, COOKIE_FILE, anime_access.episode_urls, budget,
+                        workers=WORKER_COUNT, http_engine=http_engine,
+                        ledger=ledger, account=account, lean=LEAN_NAVIGATION, spa=SPA_NAVIGATION,
+                        event_channel=self.events, coins_per_episode=COINS_PER_EPISODE,
+                        coinless=LIKE_WITHOUT_COINS, episode_status=anime_access.episode_status
+                    )
+                    # 当前已登录的浏览器作为第一个工作线程的浏览器，运行结束后仍由本线程关闭
+                    worker_pool.run(episode_range, should_continue=lambda: self.running, borrowed_bot=login_bot)
+                    self.events.publish(CoinChanged(budget.remaining))
+                    episode_range = []
+
+                # 按实时余额规划每集投币数，每集结束后按实际消耗调整后续计划
+                planner = CoinPlanner(testCoin, episode_range, reserve=COIN_RESERVE,
+                                      coins_per_episode=COINS_PER_EPISODE,
+                                      episode_status=anime_access.episode_status, coinless=LIKE_WITHOUT_COINS)
+                if episode_range:
+                    logger.info(f"投币计划: {planner.summary()}")
                 
                 # 循环执行操作
-                for episode_index in range(20, 35):  # 意思是从第21集到第29集
+                while True:
                     if not self.running:
                         logger.info("用户停止操作")
                         break
                     
-                    if testCoin <= 4:
-                        logger.info("硬币不足，停止操作")
+                    plan = planner.pending()
+                    if not plan:
+                        if planner.unaffordable:
+                            logger.info(f"硬币不足，剩余 {len(planner.unaffordable)} 集未处理")
                         break
                     
-                    if episode_bool:
-                        anime_access.process_specific_episode(episode_index, delay=1.0, triple_action=True)
-                    
-                    testCoin -= 2  # 假设每次操作消耗2个硬币
-                    self.coin_var.set(str(testCoin))
-                    time.sleep(1)  # 添加短暂延迟
+                    episode_index = plan[0]
+                    next_index = plan[1] if len(plan) > 1 else None
+                    self.events.publish(EpisodeStarted(episode_index))
+                    episode_start = time.time()
+                    anime_access.process_specific_episode(episode_index, triple_action=True,
+                                                          http_engine=http_engine, next_index=next_index,
+                                                          coins=planner.coins_for(episode_index))
+                    fully_coined = planner.record(episode_index, anime_access.last_triple_result,
+                                                  anime_access.last_coins_spent)
+                    # 投币少于所需的剧集不记为完成，硬币充足后重跑时继续处理
+                    ledger.record(account, anime_access.episode_urls[episode_index],
+                                  anime_access.last_triple_result, partial=not fully_coined)
+                    self.events.publish(EpisodeFinished(
+                        episode_index, anime_access.last_triple_result,
+                        time.time() - episode_start, anime_access.last_stage_durations
+                    ))
+                    self.events.publish(CoinChanged(planner.remaining))
             
             logger.info("程序执行完成")
-            self.status_var.set("执行完成")
+            self.events.publish(StatusChanged("执行完成"))
             
         except Exception as e:
             logger.exception(f"程序运行出错: {str(e)}")
-            self.status_var.set(f"错误: {str(e)}")
+            self.events.publish(StatusChanged(f"错误: {str(e)}"))
         finally:
             self.running = False
-            self.start_button.config(state=tk.NORMAL)
-            self.stop_button.config(state=tk.DISABLED)
+            self.events.publish(RunFinished(None))
+            # 写回本次运行的选择器命中统计
+            SelectorRegistry.shared().flush()
+            # 连接常驻浏览器时不遗留预加载标签页
+            if 'anime_access' in locals():
+                anime_access.close_spare_tab()
             # 确保浏览器被关闭
             if 'login_bot' in locals():
                 login_bot.close_browser()
 
+    def run_accounts(self, driver_path):
+        """多账号模式：各账号独立浏览器与账本，按硬币余额分配剧集并行执行"""
+        orchestrator = AccountOrchestrator(
+            driver_path, ACCOUNTS, cookie_dir=ACCOUNT_COOKIE_DIR, ledger_dir=ACCOUNT_LEDGER_DIR,
+            coin_record_url=COIN_RECORD_URL, reserve=COIN_RESERVE, workers_per_account=WORKER_COUNT,
+            use_http_engine=USE_HTTP_ENGINE, lean=LEAN_NAVIGATION, spa=SPA_NAVIGATION,
+            event_channel=self.events, index_cache=EpisodeIndexCache(EPISODE_INDEX_FILE, ttl=EPISODE_INDEX_TTL),
+            coins_per_episode=COINS_PER_EPISODE, coinless=LIKE_WITHOUT_COINS
+        )
+        try:
+            if not orchestrator.prepare(ANIME_URL):
+                logger.error("没有可用的账号")
+                return
+            self.events.publish(CoinChanged(orchestrator.total_coins()))
+            
+            assignments = orchestrator.schedule(range(20, 35))  # 意思是从第21集到第35集
+            self.events.publish(RunStarted(sum(len(indices) for indices in assignments.values())))
+            orchestrator.run(should_continue=lambda: self.running)
+            logger.info("多账号执行完成")
+            self.events.publish(StatusChanged("执行完成"))
+        finally:
+            orchestrator.close()
+            SelectorRegistry.shared().flush()
+
 if __name__ == "__main__":
     root = tk.Tk()
     app = BiliBotGUI(root)
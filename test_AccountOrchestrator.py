@@ -0,0 +1,56 @@
+import os
+import tempfile
+import unittest
+
+from AccountOrchestrator import AccountOrchestrator
+from EpisodeWorkerPool import CoinBudget
+from RunLedger import RunLedger
+
+
+class ScheduleTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+
+    def orchestrator(self, balances, coinless=False):
+        """创建已就绪的账号（不启动浏览器）：账号名称 -> 硬币余额"""
+        orchestrator = AccountOrchestrator(
+            None, list(balances), cookie_dir=self.temp_dir.name,
+            ledger_dir=os.path.join(self.temp_dir.name, "ledgers"), reserve=4, coinless=coinless
+        )
+        orchestrator.episode_urls = [f"https://www.bilibili.com/bangumi/play/ep{100 + index}" for index in range(6)]
+        for session in orchestrator.sessions:
+            session.budget = CoinBudget(balances[session.name], reserve=4)
+            session.ledger = RunLedger(session.ledger_file)
+            self.addCleanup(session.ledger.close)
+        return orchestrator
+
+    def test_episodes_done_in_any_ledger_are_skipped(self):
+        orchestrator = self.orchestrator({'alice': 100, 'bob': 100})
+        bob = orchestrator.sessions[1]
+        bob.ledger.record(bob.account_id, orchestrator.episode_urls[1], 1)
+        bob.ledger.record(bob.account_id, orchestrator.episode_urls[2], -1)
+        assigned = orchestrator.schedule([0, 1, 2, 3])
+        self.assertEqual(sorted(assigned['alice'] + assigned['bob']), [0, 2, 3])
+
+    def test_assignment_follows_remaining_capacity(self):
+        # alice 可处理 3 集，bob 可处理 1 集
+        orchestrator = self.orchestrator({'alice': 10, 'bob': 6})
+        assigned = orchestrator.schedule([0, 1, 2, 3, 4, 5])
+        self.assertEqual(len(assigned['alice']), 3)
+        self.assertEqual(len(assigned['bob']), 1)
+        self.assertEqual(sorted(assigned['alice'] + assigned['bob']), [0, 1, 2, 3])
+
+    def test_no_capacity_assigns_nothing(self):
+        orchestrator = self.orchestrator({'alice': 4, 'bob': 5})
+        self.assertEqual(orchestrator.schedule([0, 1, 2]), {'alice': [], 'bob': []})
+
+    def test_coinless_assigns_without_capacity(self):
+        orchestrator = self.orchestrator({'alice': 4, 'bob': 5}, coinless=True)
+        assigned = orchestrator.schedule([0, 1, 2, 3])
+        self.assertEqual(sorted(assigned['alice'] + assigned['bob']), [0, 1, 2, 3])
+        self.assertEqual(len(assigned['alice']), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
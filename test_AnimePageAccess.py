@@ -0,0 +1,124 @@
+import unittest
+
+from AnimePageAccess import AnimePageAccess
+from BiliHttpEngine import BiliHttpEngine
+
+
+class FakeSwitchTo:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def window(self, handle):
+        assert handle in self.driver.windows
+        self.driver.current_window_handle = handle
+
+
+class FakeTabDriver:
+    """按窗口名称复用标签页的浏览器替身（与window.open的行为一致）"""
+
+    def __init__(self, window_names=None):
+        self.windows = {'main': ''}
+        for index, name in enumerate(window_names or []):
+            self.windows[f"old_{index}"] = name
+        self.current_window_handle = 'main'
+        self.switch_to = FakeSwitchTo(self)
+        self.opened = 0
+        self.events = []  # (事件, 窗口句柄, 参数)
+
+    @property
+    def window_handles(self):
+        return list(self.windows)
+
+    def execute_script(self, script, *args):
+        if script == AnimePageAccess.PREFETCH_SCRIPT:
+            url, name = args
+            if name not in self.windows.values():
+                self.opened += 1
+                self.windows[f"tab_{self.opened}"] = name
+            handle = next(handle for handle, window_name in self.windows.items() if window_name == name)
+            self.events.append(('load', handle, url))
+            return True
+        if script.startswith("window.name"):
+            self.windows[self.current_window_handle] = args[0]
+            return None
+        raise AssertionError(script)
+
+    def close(self):
+        del self.windows[self.current_window_handle]
+
+    def execute_cdp_cmd(self, cmd, cmd_args):
+        self.events.append((cmd, self.current_window_handle, None))
+        return {}
+
+
+class PrefetchTabTest(unittest.TestCase):
+    def test_tab_names_are_unique_per_instance(self):
+        driver = FakeTabDriver()
+        self.assertNotEqual(AnimePageAccess(driver).tab_names, AnimePageAccess(driver).tab_names)
+
+    def test_prefetch_opens_new_tab_in_reused_browser(self):
+        # 常驻浏览器中仍保留上一次运行命名的标签页
+        previous = AnimePageAccess(FakeTabDriver())
+        driver = FakeTabDriver(window_names=previous.tab_names)
+        anime_access = AnimePageAccess(driver, pipeline=True)
+        self.assertTrue(anime_access.prefetch_episode("https://www.bilibili.com/bangumi/play/ep2"))
+        self.assertTrue(anime_access.pipeline)
+        self.assertEqual(driver.opened, 1)
+
+    def test_lean_blocking_is_enabled_before_prefetch_loads(self):
+        driver = FakeTabDriver()
+        anime_access = AnimePageAccess(driver, lean=True, pipeline=True)
+        episode_url = "https://www.bilibili.com/bangumi/play/ep2"
+        self.assertTrue(anime_access.prefetch_episode(episode_url))
+        self.assertEqual(driver.events, [
+            ('load', 'tab_1', 'about:blank'),
+            ('Network.enable', 'tab_1', None),
+            ('Network.setBlockedURLs', 'tab_1', None),
+            ('load', 'tab_1', episode_url),
+        ])
+        self.assertEqual(driver.current_window_handle, 'main')
+
+        # 复用已启用屏蔽的标签页时直接加载
+        driver.events = []
+        anime_access.prefetch_episode("https://www.bilibili.com/bangumi/play/ep3")
+        self.assertEqual(driver.events, [('load', 'tab_1', "https://www.bilibili.com/bangumi/play/ep3")])
+
+    def test_close_spare_tab(self):
+        driver = FakeTabDriver()
+        anime_access = AnimePageAccess(driver, pipeline=True)
+        self.assertFalse(anime_access.close_spare_tab())
+        anime_access.prefetch_episode("https://www.bilibili.com/bangumi/play/ep2")
+        self.assertEqual(len(driver.window_handles), 2)
+
+        self.assertTrue(anime_access.close_spare_tab())
+        self.assertEqual(driver.window_handles, ['main'])
+        self.assertEqual(driver.current_window_handle, 'main')
+        self.assertIsNone(anime_access._prefetched)
+
+
+class FlakyEngine:
+    """第2集aid查询抛异常、第3集状态查询抛异常的接口替身"""
+    parse_ep_id = staticmethod(BiliHttpEngine.parse_ep_id)
+
+    def get_episode_aid(self, ep_id):
+        if ep_id == 2:
+            raise ConnectionResetError("reset")
+        return ep_id * 10
+
+    def get_relation(self, aid):
+        if aid == 30:
+            raise ConnectionResetError("reset")
+        return {'like': True, 'coin': 2, 'favorite': True}
+
+
+class PrescanTest(unittest.TestCase):
+    def test_errors_only_affect_their_episode(self):
+        anime_access = AnimePageAccess(FakeTabDriver())
+        anime_access.episode_urls = [f"https://www.bilibili.com/bangumi/play/ep{ep_id}" for ep_id in (1, 2, 3, 4)]
+        pending = anime_access.prescan_episodes([0, 1, 2, 3], http_engine=FlakyEngine())
+        self.assertEqual(pending, [1, 2])
+        self.assertEqual(anime_access.prescanned_done, [0, 3])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,184 @@
+import json
+import os
+import pickle
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from BiliHttpEngine import BiliHttpEngine
+
+EP_ID = 1001
+REMOVED_EP_ID = 1002
+AID = 5001
+FOLDER_ID = 77
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """本地替身接口：只实现引擎用到的几个接口"""
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, payload, status=200):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        if self.server.site['close_after_reply']:
+            # 不发送 Connection: close，模拟服务器静默关闭空闲长连接
+            self.close_connection = True
+
+    def _drop(self):
+        """收到请求后不返回任何响应直接断开"""
+        self.close_connection = True
+
+    def _blocked(self):
+        body = b"<html><body>412 Precondition Failed</body></html>"
+        self.send_response(412)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        site = self.server.site
+        parts = urlsplit(self.path)
+        query = parse_qs(parts.query)
+        if site['drop_gets'] > 0:
+            site['drop_gets'] -= 1
+            return self._drop()
+        if site['blocked']:
+            return self._blocked()
+        if parts.path == '/x/web-interface/nav':
+            return self._reply({'code': 0, 'data': {'isLogin': 'SESSDATA' in self.headers.get('Cookie', '')}})
+        if parts.path == '/pgc/view/web/season' and query.get('ep_id') == [str(EP_ID)]:
+            return self._reply({'code': 0, 'result': {'episodes': [{'id': EP_ID, 'aid': AID}]}})
+        if parts.path == '/pgc/view/web/season' and query.get('ep_id') == [str(REMOVED_EP_ID)]:
+            # 下架剧集：code为0但result为null
+            return self._reply({'code': 0, 'result': None})
+        if parts.path == '/x/web-interface/archive/relation' and query.get('aid') == [str(AID)]:
+            return self._reply({'code': 0, 'data': dict(site['relation'])})
+        if parts.path == '/x/v3/fav/folder/created/list-all':
+            return self._reply({'code': 0, 'data': {'list': [{'id': FOLDER_ID}]}})
+        self._reply({'code': -404, 'message': 'not found'}, status=404)
+
+    def do_POST(self):
+        site = self.server.site
+        path = urlsplit(self.path).path
+        length = int(self.headers.get('Content-Length', 0))
+        form = {key: values[0] for key, values in parse_qs(self.rfile.read(length).decode('utf-8')).items()}
+        site['posts'].append((path, form))
+        if site['drop_posts']:
+            return self._drop()
+        if site['blocked']:
+            return self._blocked()
+        if form.get('csrf') != 'test_csrf':
+            return self._reply({'code': -111, 'message': 'csrf校验失败'})
+        relation = site['relation']
+        if path == '/x/web-interface/archive/like':
+            if relation['like']:
+                return self._reply({'code': 65006, 'message': '已赞过'})
+            relation['like'] = True
+        elif path == '/x/web-interface/coin/add':
+            relation['coin'] += int(form['multiply'])
+        elif path == '/x/v3/fav/resource/deal':
+            if form.get('add_media_ids') != str(FOLDER_ID):
+                return self._reply({'code': -400, 'message': '收藏夹不存在'})
+            relation['favorite'] = True
+        else:
+            return self._reply({'code': -404, 'message': 'not found'}, status=404)
+        self._reply({'code': 0, 'message': '0'})
+
+
+class BiliHttpEngineTest(unittest.TestCase):
+    mid_counter = 0
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+        self.server.daemon_threads = True
+        self.server.site = {'relation': {'like': False, 'coin': 0, 'favorite': False}, 'posts': [], 'blocked': False,
+                            'close_after_reply': False, 'drop_gets': 0, 'drop_posts': False}
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+
+        # 每个用例使用不同的账号，避免操作节奏在用例之间相互影响
+        BiliHttpEngineTest.mid_counter += 1
+        self.temp_dir = tempfile.TemporaryDirectory()
+        cookie_file = os.path.join(self.temp_dir.name, "bili_cookies.pkl")
+        with open(cookie_file, 'wb') as file:
+            pickle.dump([
+                {'name': 'SESSDATA', 'value': 'test_session'},
+                {'name': 'bili_jct', 'value': 'test_csrf'},
+                {'name': 'DedeUserID', 'value': f"test_{BiliHttpEngineTest.mid_counter}"},
+            ], file)
+        self.engine = BiliHttpEngine(cookie_file, api_base=f"http://127.0.0.1:{self.server.server_port}")
+        self.episode_url = f"https://www.bilibili.com/bangumi/play/ep{EP_ID}"
+
+    def tearDown(self):
+        self.engine.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.temp_dir.cleanup()
+
+    def test_nav_and_relation(self):
+        self.assertTrue(self.engine.is_logged_in())
+        self.assertEqual(self.engine.get_episode_aid(EP_ID), AID)
+        self.assertEqual(self.engine.get_relation(AID), {'like': False, 'coin': 0, 'favorite': False})
+
+    def test_triple_then_already_done(self):
+        self.assertEqual(self.engine.check_and_operate(self.episode_url), 1)
+        self.assertEqual(self.server.site['relation'], {'like': True, 'coin': 2, 'favorite': True})
+        self.assertEqual([path for path, _ in self.server.site['posts']], [
+            '/x/web-interface/archive/like', '/x/web-interface/coin/add', '/x/v3/fav/resource/deal',
+        ])
+
+        self.assertEqual(self.engine.check_and_operate(self.episode_url), 0)
+        self.assertEqual(len(self.server.site['posts']), 3)
+
+    def test_individual_actions(self):
+        self.assertTrue(self.engine.like(AID, self.episode_url))
+        self.assertTrue(self.engine.like(AID, self.episode_url))  # 65006 已点赞
+        self.assertTrue(self.engine.add_coin(AID, self.episode_url, multiply=1))
+        self.assertTrue(self.engine.add_favorite(AID, self.episode_url))
+        self.assertEqual(self.server.site['relation'], {'like': True, 'coin': 1, 'favorite': True})
+
+    def test_blocked_request_maps_to_412(self):
+        self.server.site['blocked'] = True
+        self.assertEqual(self.engine._request('GET', '/x/web-interface/nav')['code'], -412)
+        self.assertFalse(self.engine.like(AID, self.episode_url))
+
+    def test_stale_pooled_connection_is_replaced(self):
+        self.server.site['close_after_reply'] = True
+        self.assertTrue(self.engine.is_logged_in())
+        time.sleep(0.1)  # 等待服务器关闭空闲连接
+        self.assertTrue(self.engine.like(AID, self.episode_url))
+        self.assertEqual(len(self.server.site['posts']), 1)
+
+    def test_get_retried_when_reused_connection_drops(self):
+        self.assertTrue(self.engine.is_logged_in())
+        self.server.site['drop_gets'] = 1
+        self.assertTrue(self.engine.is_logged_in())
+        self.assertEqual(self.server.site['drop_gets'], 0)
+
+    def test_sent_post_is_not_retried(self):
+        self.assertTrue(self.engine.is_logged_in())
+        self.server.site['drop_posts'] = True
+        self.assertFalse(self.engine.like(AID, self.episode_url))
+        self.assertEqual(len(self.server.site['posts']), 1)
+
+    def test_unknown_episode(self):
+        self.assertEqual(self.engine.check_and_operate("https://www.bilibili.com/bangumi/play/ep9999"), -1)
+        self.assertEqual(self.engine.check_and_operate("https://www.bilibili.com/bangumi/play/ss1"), -1)
+
+    def test_null_season_result(self):
+        self.assertIsNone(self.engine.get_episode_aid(REMOVED_EP_ID))
+        self.assertEqual(self.engine.get_episode_aid(EP_ID), AID)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+
+from BiliLoginBot import BiliLoginBot
+
+
+class FakeDriver:
+    """快速登录后的浏览器：停留在data:,页面，读不到B站cookie"""
+
+    def __init__(self):
+        self.quit_calls = 0
+        self.visited = []
+
+    def quit(self):
+        self.quit_calls += 1
+
+    def get(self, url):
+        self.visited.append(url)
+        raise AssertionError(f"不应加载页面: {url}")
+
+    def get_cookies(self):
+        return []
+
+    def get_cookie(self, name):
+        return None
+
+
+class BiliLoginBotInjectedDriverTest(unittest.TestCase):
+    def test_injected_driver_needs_no_service(self):
+        driver = FakeDriver()
+        login_bot = BiliLoginBot(driver=driver)
+        self.assertIs(login_bot.driver, driver)
+        self.assertIsNone(login_bot.service)
+        self.assertIsNone(login_bot.options)
+        self.assertTrue(login_bot.close_browser())
+        self.assertEqual(driver.quit_calls, 1)
+
+    def test_injected_driver_with_debugger_address_is_kept_open(self):
+        driver = FakeDriver()
+        login_bot = BiliLoginBot(driver=driver, debugger_address="127.0.0.1:9222")
+        self.assertTrue(login_bot.close_browser())
+        self.assertEqual(driver.quit_calls, 0)
+
+
+class BiliLoginBotNavInfoTest(unittest.TestCase):
+    def setUp(self):
+        self.driver = FakeDriver()
+        self.login_bot = BiliLoginBot(driver=self.driver)
+        # verify_session 已获取的账号信息
+        self.login_bot.nav_info = {'isLogin': True, 'mid': 12345, 'uname': 'tester', 'money': 37.5}
+
+    def test_coin_balance_reuses_session_nav_info(self):
+        self.assertTrue(self.login_bot.get_user_coin(timeout=1, retries=1))
+        self.assertEqual(self.login_bot.coin, 37.5)
+        self.assertEqual(self.driver.visited, [])
+
+    def test_account_id_from_nav_info(self):
+        self.assertEqual(self.login_bot.get_account_id(), "12345")
+        self.login_bot.nav_info = None
+        self.assertIsNone(self.login_bot.get_account_id())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+from unittest import mock
+
+from BotEvents import EpisodeFinished, EventChannel, RunStarted, StatusChanged, ThroughputTracker
+
+
+class EventChannelTest(unittest.TestCase):
+    def test_drain(self):
+        channel = EventChannel()
+        for i in range(3):
+            channel.publish(StatusChanged(str(i)))
+        self.assertEqual(channel.drain(max_events=2), [StatusChanged('0'), StatusChanged('1')])
+        self.assertEqual(channel.drain(), [StatusChanged('2')])
+        self.assertEqual(channel.drain(), [])
+
+
+class ThroughputTrackerTest(unittest.TestCase):
+    def test_statistics(self):
+        with mock.patch('BotEvents.time.time', return_value=1000.0):
+            tracker = ThroughputTracker()
+            tracker.on_event(RunStarted(10))
+        tracker.on_event(EpisodeFinished(0, 1, 4.0, {'navigate': 1.0, 'triple': 3.0}))
+        tracker.on_event(EpisodeFinished(1, 0, 2.0, {'navigate': 1.0}))
+
+        self.assertEqual(tracker.finished, 2)
+        self.assertAlmostEqual(tracker.mean_seconds_per_episode, 3.0)
+        self.assertEqual(tracker.mean_stage_seconds(), {'navigate': 1.0, 'triple': 1.5})
+        with mock.patch('BotEvents.time.time', return_value=1060.0):
+            self.assertAlmostEqual(tracker.episodes_per_minute, 2.0)
+            self.assertAlmostEqual(tracker.eta_seconds, 240.0)
+
+    def test_no_data(self):
+        tracker = ThroughputTracker()
+        self.assertEqual(tracker.mean_seconds_per_episode, 0.0)
+        self.assertEqual(tracker.mean_stage_seconds(), {})
+        self.assertIsNone(tracker.eta_seconds)
+
+
+if __name__ == "__main__":
+    unittest.main()
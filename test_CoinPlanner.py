@@ -0,0 +1,81 @@
+import unittest
+
+from CoinPlanner import CoinPlanner
+
+
+class CoinPlannerTest(unittest.TestCase):
+    def test_plan_skips_coined_and_spends_remainder(self):
+        planner = CoinPlanner(9.5, [3, 4, 5, 6, 7], reserve=4, episode_status={4: {'coin': 2}})
+        self.assertEqual(planner.allocations, {3: 2, 4: 0, 5: 2, 6: 1})
+        self.assertEqual(planner.unaffordable, [7])
+        self.assertEqual(planner.pending(), [3, 4, 5, 6])
+
+    def test_coinless_keeps_unaffordable_episodes(self):
+        planner = CoinPlanner(9.5, [3, 4, 5, 6, 7], reserve=4, coinless=True)
+        self.assertEqual(planner.allocations, {3: 2, 4: 2, 5: 1, 6: 0, 7: 0})
+        self.assertEqual(planner.summary(), {
+            'balance': 9.5, 'coined': 3, 'like_and_favorite_only': 2, 'unaffordable': 0, 'planned_coins': 5,
+        })
+
+    def test_record_replans_with_actual_spend(self):
+        planner = CoinPlanner(10, [0, 1, 2], reserve=4)
+        self.assertEqual(planner.allocations, {0: 2, 1: 2, 2: 2})
+        planner.record(0, 0, 0)
+        self.assertEqual(planner.remaining, 10)
+        self.assertEqual(planner.pending(), [1, 2])
+        self.assertEqual(planner.coins_for(0), 0)
+        planner.record(1, 1, 2)
+        self.assertEqual(planner.remaining, 8)
+        self.assertEqual(planner.coins_for(2), 2)
+
+    def test_reserve_then_refund_difference(self):
+        planner = CoinPlanner(9, [0, 1, 2], reserve=4)
+        self.assertEqual(planner.reserve_coins(0), 2)
+        self.assertEqual(planner.reserve_coins(1), 2)
+        self.assertEqual(planner.remaining, 5)
+        # 剩余余额只够第3集投1枚，两个进行中的剧集不会被重复分配
+        self.assertEqual(planner.pending(), [2])
+        self.assertEqual(planner.coins_for(2), 1)
+        self.assertIsNone(planner.reserve_coins(5))
+
+        planner.record(0, 0, 0)
+        self.assertEqual(planner.remaining, 7)
+        self.assertEqual(planner.coins_for(2), 2)
+        planner.record(1, 1, 2)
+        self.assertEqual(planner.remaining, 7)
+        self.assertEqual(planner.reserved, {})
+
+    def test_claim_picks_up_episode_freed_by_refund(self):
+        planner = CoinPlanner(8, [0, 1, 2], reserve=4)
+        self.assertEqual(planner.claim_next(), (0, 2))
+        self.assertEqual(planner.claim_next(), (1, 2))
+        self.assertEqual(planner.unaffordable, [2])
+        # 第1集已三连，退还的硬币使第3集可以处理
+        self.assertTrue(planner.record(0, 0, 0))
+        self.assertEqual(planner.claim_next(), (2, 2))
+        planner.record(1, 1, 2)
+        planner.record(2, 1, 2)
+        self.assertIsNone(planner.claim_next())
+        self.assertIsNone(CoinPlanner(8, [0], reserve=4).claim_next(should_stop=lambda: True))
+
+    def test_record_reports_short_coined_episode(self):
+        planner = CoinPlanner(5, [0, 1], reserve=4, coinless=True)
+        self.assertEqual(planner.allocations, {0: 1, 1: 0})
+        self.assertFalse(planner.record(0, 1, 1))
+        self.assertFalse(planner.record(1, 1, 0))
+        self.assertTrue(CoinPlanner(100, [0], coins_per_episode=1).record(0, 1, 1))
+
+    def test_coins_per_episode_is_clamped(self):
+        self.assertEqual(CoinPlanner(100, [0], coins_per_episode=5).coins_for(0), 2)
+        planner = CoinPlanner(100, [0, 1], coins_per_episode=1)
+        self.assertEqual(planner.allocations, {0: 1, 1: 1})
+
+    def test_sync_balance(self):
+        planner = CoinPlanner(4, [0, 1], reserve=4)
+        self.assertEqual(planner.pending(), [])
+        planner.sync_balance(7)
+        self.assertEqual(planner.allocations, {0: 2, 1: 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
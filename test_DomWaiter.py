@@ -0,0 +1,42 @@
+import unittest
+
+from DomWaiter import DomWaiter
+
+
+class FakeDriver:
+    def __init__(self):
+        self.script_timeout = None
+        self.timeout_calls = 0
+
+    def set_script_timeout(self, timeout):
+        self.script_timeout = timeout
+        self.timeout_calls += 1
+
+    def execute_async_script(self, script, timeout_ms):
+        # 与浏览器一致：等待时间超过驱动的脚本超时即报错
+        if timeout_ms / 1000 >= self.script_timeout:
+            raise TimeoutError("script timeout")
+        return True
+
+
+class DomWaiterTest(unittest.TestCase):
+    def test_script_timeout_is_tracked_per_driver(self):
+        driver = FakeDriver()
+        page_waiter = DomWaiter(driver)
+        self.assertTrue(page_waiter.until("exists('.toolbar')", 10))
+        # 每集新建的三连等待器不会把驱动的超时调低
+        self.assertTrue(DomWaiter(driver).until("exists('.like')", 5))
+        self.assertTrue(page_waiter.until("exists('.toolbar')", 8))
+        self.assertEqual(driver.script_timeout, 12)
+        self.assertEqual(driver.timeout_calls, 1)
+
+    def test_longer_wait_raises_timeout(self):
+        driver = FakeDriver()
+        DomWaiter(driver).until("true", 3)
+        DomWaiter(driver).until("true", 6)
+        self.assertEqual(driver.script_timeout, 8)
+        self.assertEqual(driver.timeout_calls, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import threading
+import time
+import unittest
+
+from DriverProfiler import DriverProfiler, percentile
+
+
+class FakeDriver:
+    def execute(self, driver_command, params=None):
+        return {'value': None}
+
+
+def handle_like(driver):
+    driver.execute('executeScript')
+    time.sleep(0.001)
+
+
+class DriverProfilerTest(unittest.TestCase):
+    def setUp(self):
+        self.driver = FakeDriver()
+        self.profiler = DriverProfiler(self.driver, budgets={'like': 1}).install()
+        self.addCleanup(self.profiler.uninstall)
+
+    def sleep_in_thread(self, register=False):
+        def target():
+            if register:
+                self.profiler.add_thread()
+            time.sleep(0.001)
+        thread = threading.Thread(target=target)
+        thread.start()
+        thread.join()
+
+    def test_records_commands_and_sleeps_by_stage(self):
+        with self.profiler.episode(3):
+            handle_like(self.driver)
+            handle_like(self.driver)
+        report = self.profiler.report()
+        self.assertEqual(report['round_trips'], 2)
+        self.assertEqual(report['by_stage']['like']['count'], 2)
+        self.assertEqual(report['sleeps']['handle_like']['count'], 2)
+        self.assertEqual(report['round_trips_per_episode']['episodes'], {'3': {'like': 2}})
+        self.assertEqual(self.profiler.budget_violations(),
+                         [{'episode': 3, 'stage': 'like', 'round_trips': 2, 'budget': 1}])
+
+    def test_other_threads_are_ignored(self):
+        self.sleep_in_thread()
+        self.assertEqual(self.profiler.records, [])
+
+    def test_added_thread_is_recorded(self):
+        self.sleep_in_thread(register=True)
+        self.assertEqual([record.kind for record in self.profiler.records], ['sleep'])
+
+    def test_uninstall_restores_patches(self):
+        self.profiler.uninstall()
+        time.sleep(0.001)
+        self.assertEqual(self.profiler.records, [])
+        self.assertNotIn('execute', self.driver.__dict__)
+
+
+class PercentileTest(unittest.TestCase):
+    def test_nearest_rank(self):
+        self.assertEqual(percentile(range(1, 21), 0.95), 19)
+        self.assertEqual(percentile(range(1, 11), 0.5), 5)
+        self.assertEqual(percentile(range(1, 9), 0.5), 4)
+        self.assertEqual(percentile(range(1, 91), 0.7), 63)
+        self.assertEqual(percentile([3.0], 0.95), 3.0)
+        self.assertEqual(percentile([], 0.5), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import os
+import tempfile
+import time
+import unittest
+
+from EpisodeIndexCache import EpisodeIndexCache
+
+
+class EpisodeIndexCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_file = os.path.join(self.temp_dir.name, "episode_index.json")
+        self.episodes = [
+            {'url': "https://www.bilibili.com/bangumi/play/ep1", 'ep_id': 1, 'title': "第1话"},
+            {'url': "https://www.bilibili.com/bangumi/play/ep2", 'ep_id': 2, 'title': "第2话"},
+        ]
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_parse_season_id(self):
+        self.assertEqual(EpisodeIndexCache.parse_season_id("https://www.bilibili.com/bangumi/play/ss28747?x=1"), "ss28747")
+        self.assertIsNone(EpisodeIndexCache.parse_season_id("https://www.bilibili.com/bangumi/play/ep1"))
+        self.assertIsNone(EpisodeIndexCache.parse_season_id(None))
+
+    def test_put_persists_across_instances(self):
+        EpisodeIndexCache(self.cache_file).put("ss1", self.episodes)
+        self.assertEqual(EpisodeIndexCache(self.cache_file).get("ss1"), self.episodes)
+
+    def test_expired_entry_returns_none(self):
+        cache = EpisodeIndexCache(self.cache_file, ttl=60)
+        cache.put("ss1", self.episodes)
+        cache._data["ss1"]['updated_at'] = time.time() - 120
+        self.assertIsNone(cache.get("ss1"))
+
+    def test_invalidate(self):
+        cache = EpisodeIndexCache(self.cache_file)
+        cache.put("ss1", self.episodes)
+        cache.put("ss2", self.episodes)
+        cache.invalidate("ss1")
+        self.assertIsNone(cache.get("ss1"))
+        self.assertEqual(cache.get("ss2"), self.episodes)
+        cache.invalidate()
+        self.assertIsNone(EpisodeIndexCache(self.cache_file).get("ss2"))
+
+    def test_corrupt_file_starts_empty(self):
+        with open(self.cache_file, 'w', encoding='utf-8') as file:
+            file.write("{not json")
+        self.assertIsNone(EpisodeIndexCache(self.cache_file).get("ss1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
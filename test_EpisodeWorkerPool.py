@@ -0,0 +1,105 @@
+import threading
+import unittest
+from unittest import mock
+
+import EpisodeWorkerPool as worker_pool_module
+from EpisodeWorkerPool import EpisodeWorkerPool, CoinBudget
+
+
+class FakeLoginBot:
+    def __init__(self):
+        self.driver = mock.Mock()
+
+
+class FakeAnimePageAccess:
+    """按计划投币数返回结果的剧集处理替身：already_done中的剧集视为已三连，不消耗硬币"""
+    already_done = set()
+    calls = []
+    lock = threading.Lock()
+
+    def __init__(self, driver, **kwargs):
+        self.episode_urls = []
+        self.last_triple_result = None
+        self.last_coins_spent = 0
+        self.last_stage_durations = {}
+
+    def process_specific_episode(self, episode_index, triple_action=False, http_engine=None, coins=2):
+        with self.lock:
+            self.calls.append((episode_index, coins))
+        done = episode_index in self.already_done
+        self.last_triple_result = 0 if done else 1
+        self.last_coins_spent = 0 if done else coins
+
+
+class EpisodeWorkerPoolTest(unittest.TestCase):
+    def setUp(self):
+        FakeAnimePageAccess.calls = []
+        FakeAnimePageAccess.already_done = set()
+        patcher = mock.patch.object(worker_pool_module, 'AnimePageAccess', FakeAnimePageAccess)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_pool(self, balance, episode_indices, **kwargs):
+        budget = CoinBudget(balance, reserve=4)
+        self.ledger = mock.Mock()
+        worker_pool = EpisodeWorkerPool(None, None, [f"ep{index}" for index in range(10)], budget,
+                                        workers=2, ledger=self.ledger, account="1", **kwargs)
+        results = worker_pool.run(episode_indices, login_bots=[FakeLoginBot(), FakeLoginBot()])
+        return budget, results, dict(FakeAnimePageAccess.calls)
+
+    def test_coins_per_episode_is_honoured(self):
+        budget, results, calls = self.run_pool(10, [0, 1, 2], coins_per_episode=1)
+        self.assertEqual(calls, {0: 1, 1: 1, 2: 1})
+        self.assertEqual(budget.remaining, 7)
+        self.assertEqual(results, {0: 1, 1: 1, 2: 1})
+
+    def test_unaffordable_episodes_are_skipped(self):
+        budget, results, calls = self.run_pool(9, [0, 1, 2, 3])
+        self.assertEqual(sorted(calls.values()), [1, 2, 2])
+        self.assertEqual(budget.remaining, 4)
+        self.assertNotIn(3, results)
+
+    def test_coinless_processes_remaining_episodes(self):
+        budget, results, calls = self.run_pool(6, [0, 1, 2], coinless=True)
+        self.assertEqual(sorted(calls.values()), [0, 0, 2])
+        self.assertEqual(budget.remaining, 4)
+        self.assertEqual(len(results), 3)
+
+    def test_coinless_episodes_are_recorded_as_partial(self):
+        self.run_pool(6, [0, 1, 2], coinless=True)
+        partial = {call.args[1]: call.kwargs['partial'] for call in self.ledger.record.call_args_list}
+        self.assertEqual(partial, {"ep0": False, "ep1": True, "ep2": True})
+
+    def test_refund_lets_unaffordable_episode_run(self):
+        # 第1集已三连，退还的2枚硬币足够处理开始时余额不足的第3集
+        FakeAnimePageAccess.already_done = {0}
+        budget, results, calls = self.run_pool(8, [0, 1, 2])
+        self.assertEqual(results, {0: 0, 1: 1, 2: 1})
+        self.assertEqual(calls, {0: 2, 1: 2, 2: 2})
+        self.assertEqual(budget.remaining, 4)
+
+    def test_nothing_pending_starts_no_browser(self):
+        login_bot = FakeLoginBot()
+        with mock.patch.object(worker_pool_module, 'BiliLoginBot') as bot_class:
+            worker_pool = EpisodeWorkerPool(None, None, ["ep0"], CoinBudget(10), workers=2)
+            self.assertEqual(worker_pool.run([], login_bots=[login_bot]), {})
+        bot_class.assert_not_called()
+        login_bot.driver.quit.assert_called_once()
+
+    def test_borrowed_bot_is_used_and_kept_open(self):
+        borrowed_bot = FakeLoginBot()
+        with mock.patch.object(worker_pool_module, 'BiliLoginBot') as bot_class:
+            worker_pool = EpisodeWorkerPool(None, None, ["ep0"], CoinBudget(10), workers=2)
+            self.assertEqual(worker_pool.run([0], borrowed_bot=borrowed_bot), {0: 1})
+        bot_class.assert_not_called()
+        borrowed_bot.driver.quit.assert_not_called()
+
+    def test_unspent_reservation_is_refunded(self):
+        FakeAnimePageAccess.already_done = {0}
+        budget, results, calls = self.run_pool(10, [0, 1])
+        self.assertEqual(budget.remaining, 8)
+        self.assertEqual(results, {0: 0, 1: 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
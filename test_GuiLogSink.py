@@ -0,0 +1,50 @@
+import logging
+import unittest
+
+from GuiLogSink import RingBufferHandler
+
+
+class RingBufferHandlerTest(unittest.TestCase):
+    def setUp(self):
+        self.logger = logging.getLogger('test_gui_log_sink')
+        self.logger.propagate = False
+        self.logger.setLevel(logging.DEBUG)
+
+    def attach(self, handler):
+        handler.setFormatter(logging.Formatter('%(levelname)s %(message)s'))
+        self.logger.addHandler(handler)
+        self.addCleanup(self.logger.removeHandler, handler)
+        return handler
+
+    def test_drain_formats_in_order(self):
+        handler = self.attach(RingBufferHandler(capacity=10))
+        self.logger.info("一")
+        self.logger.debug("忽略")
+        self.logger.warning("二")
+        self.assertEqual(handler.drain(), ["INFO 一", "WARNING 二"])
+        self.assertEqual(handler.drain(), [])
+
+    def test_capacity_drops_oldest(self):
+        handler = self.attach(RingBufferHandler(capacity=3))
+        for i in range(5):
+            self.logger.info(str(i))
+        self.assertEqual(handler.dropped, 2)
+        self.assertEqual(handler.drain(), ["INFO 2", "INFO 3", "INFO 4"])
+
+    def test_drain_max_records(self):
+        handler = self.attach(RingBufferHandler(capacity=10))
+        for i in range(4):
+            self.logger.info(str(i))
+        self.assertEqual(handler.drain(max_records=3), ["INFO 0", "INFO 1", "INFO 2"])
+        self.assertEqual(handler.drain(), ["INFO 3"])
+
+    def test_level_raised_after_enqueue(self):
+        handler = self.attach(RingBufferHandler(capacity=10, level=logging.INFO))
+        self.logger.info("信息")
+        self.logger.error("错误")
+        handler.setLevel(logging.WARNING)
+        self.assertEqual(handler.drain(), ["ERROR 错误"])
+
+
+if __name__ == "__main__":
+    unittest.main()
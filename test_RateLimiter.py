@@ -0,0 +1,79 @@
+import unittest
+from unittest import mock
+
+from RateLimiter import AdaptiveTokenBucket, RateLimiter
+
+
+class AdaptiveTokenBucketTest(unittest.TestCase):
+    def setUp(self):
+        self.now = 100.0
+        patcher = mock.patch('RateLimiter.time.monotonic', side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_burst_then_queue(self):
+        bucket = AdaptiveTokenBucket(rate=2.0, burst=2)
+        self.assertEqual(bucket.reserve(), 0.0)
+        self.assertEqual(bucket.reserve(), 0.0)
+        self.assertAlmostEqual(bucket.reserve(), 0.5)
+        self.assertAlmostEqual(bucket.reserve(), 1.0)
+        self.now += 1.5
+        self.assertEqual(bucket.reserve(), 0.0)
+        self.assertAlmostEqual(bucket.reserve(), 0.5)
+
+    def test_success_increases_rate_up_to_max(self):
+        bucket = AdaptiveTokenBucket(rate=1.0, max_rate=1.15, increase=0.1)
+        bucket.on_success()
+        self.assertAlmostEqual(bucket.rate, 1.1)
+        bucket.on_success()
+        self.assertAlmostEqual(bucket.rate, 1.15)
+
+    def test_throttle_backoff(self):
+        bucket = AdaptiveTokenBucket(rate=1.0, min_rate=0.3, base_cooldown=2.0, max_cooldown=5.0)
+        self.assertEqual(bucket.on_throttle(), 2.0)
+        self.assertAlmostEqual(bucket.rate, 0.5)
+        self.assertAlmostEqual(bucket.reserve(), 2.0)
+        self.assertEqual(bucket.on_throttle(), 4.0)
+        self.assertAlmostEqual(bucket.rate, 0.3)
+        self.assertEqual(bucket.on_throttle(), 5.0)
+        bucket.on_success()
+        self.assertEqual(bucket.failures, 0)
+
+    def test_single_failures_do_not_back_off(self):
+        bucket = AdaptiveTokenBucket(rate=1.0, burst=1, failure_threshold=3)
+        self.assertEqual(bucket.on_failure(), 0.0)
+        self.assertEqual(bucket.on_failure(), 0.0)
+        bucket.on_success()
+        self.assertEqual(bucket.on_failure(), 0.0)
+        self.assertEqual(bucket.failed_checks, 1)
+        self.assertAlmostEqual(bucket.rate, 1.1)
+        self.assertEqual(bucket.failures, 0)
+        self.assertEqual(bucket.reserve(), 0.0)
+
+    def test_consecutive_failures_back_off(self):
+        bucket = AdaptiveTokenBucket(rate=1.0, burst=1, base_cooldown=2.0, failure_threshold=3)
+        bucket.on_failure()
+        bucket.on_failure()
+        self.assertEqual(bucket.on_failure(), 2.0)
+        self.assertAlmostEqual(bucket.rate, 0.5)
+        self.assertEqual(bucket.failed_checks, 0)
+        self.assertAlmostEqual(bucket.reserve(), 2.0)
+
+
+class RateLimiterTest(unittest.TestCase):
+    def test_buckets_per_account_and_action(self):
+        limiter = RateLimiter(settings={'coin': {'rate': 0.25}})
+        self.assertIs(limiter.bucket("u1", 'coin'), limiter.bucket("u1", 'coin'))
+        self.assertIsNot(limiter.bucket("u1", 'coin'), limiter.bucket("u2", 'coin'))
+        self.assertIs(limiter.bucket(None, 'like'), limiter.bucket('default', 'like'))
+        self.assertEqual(limiter.bucket("u1", 'coin').rate, 0.25)
+        self.assertEqual(limiter.bucket("u1", 'coin').burst, 1)
+        limiter.on_throttle("u1", 'like')
+        self.assertEqual(limiter.rates()[("u1", 'like')], 0.5)
+
+    def test_shared(self):
+        self.assertIs(RateLimiter.shared(), RateLimiter.shared())
+
+
+if __name__ == "__main__":
+    unittest.main()
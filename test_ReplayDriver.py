@@ -0,0 +1,77 @@
+import unittest
+
+from ReplayDriver import ReplayExecutor, TRACE_VERSION
+
+
+def entry(command, params, value):
+    return {'command': command, 'params': params, 'response': {'value': value}, 'duration': 0.01}
+
+
+LIKE_SCRIPT = "return document.querySelector('.like').className;"
+STATE_SCRIPT = "return arguments[0];"
+
+TRACE = {
+    'version': TRACE_VERSION,
+    'capabilities': {'browserName': 'chrome'},
+    'commands': [
+        entry('get', {'url': 'https://www.bilibili.com/bangumi/play/ep1'}, None),
+        entry('executeScript', {'script': LIKE_SCRIPT, 'args': []}, 'like'),
+        entry('executeScript', {'script': STATE_SCRIPT, 'args': [1]}, 'first'),
+        entry('executeScript', {'script': STATE_SCRIPT, 'args': [1]}, 'second'),
+        entry('getTitle', {}, 'ep1'),
+    ],
+}
+
+
+class ReplayExecutorTest(unittest.TestCase):
+    def test_strict_order(self):
+        executor = ReplayExecutor(TRACE, mode='strict')
+        self.assertIsNone(executor.execute('get', {'url': 'https://www.bilibili.com/bangumi/play/ep1'})['value'])
+        with self.assertRaises(RuntimeError):
+            executor.execute('getTitle', {'sessionId': 'abc'})
+
+    def test_strict_end_of_trace(self):
+        executor = ReplayExecutor({'commands': TRACE['commands'][:1]}, mode='strict')
+        executor.execute('get', {})
+        with self.assertRaises(RuntimeError):
+            executor.execute('getTitle', {})
+        self.assertEqual(executor.execute('quit', {}), {'value': None})
+
+    def test_keyed_exact_then_loose_then_command(self):
+        executor = ReplayExecutor(TRACE)
+        # 会话ID不参与匹配
+        self.assertEqual(executor.execute('executeScript', {'sessionId': 'abc', 'script': LIKE_SCRIPT,
+                                                            'args': []})['value'], 'like')
+        self.assertEqual(executor.misses, 0)
+        # 脚本参数不同：按脚本源码匹配
+        self.assertEqual(executor.execute('executeScript', {'script': LIKE_SCRIPT, 'args': [5]})['value'], 'like')
+        # 地址不同：按命令名匹配
+        self.assertIsNone(executor.execute('get', {'url': 'https://www.bilibili.com/bangumi/play/ep2'})['value'])
+        self.assertEqual(executor.misses, 2)
+        with self.assertRaises(RuntimeError):
+            executor.execute('getCurrentUrl', {})
+
+    def test_responses_cycle(self):
+        executor = ReplayExecutor(TRACE)
+        params = {'script': STATE_SCRIPT, 'args': [1]}
+        values = [executor.execute('executeScript', dict(params))['value'] for _ in range(3)]
+        self.assertEqual(values, ['first', 'second', 'first'])
+
+    def test_response_is_a_copy(self):
+        executor = ReplayExecutor(TRACE)
+        executor.execute('getTitle', {})['value'] = 'changed'
+        self.assertEqual(executor.execute('getTitle', {})['value'], 'ep1')
+
+    def test_neutral_commands(self):
+        executor = ReplayExecutor(TRACE)
+        for command in ('quit', 'close', 'setTimeouts', 'deleteSession'):
+            self.assertEqual(executor.execute(command, {}), {'value': None})
+        self.assertEqual(executor.execute('newSession', {})['value']['capabilities'], {'browserName': 'chrome'})
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            ReplayExecutor(TRACE, mode='random')
+
+
+if __name__ == "__main__":
+    unittest.main()
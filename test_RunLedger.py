@@ -0,0 +1,53 @@
+import os
+import tempfile
+import unittest
+
+from RunLedger import RunLedger
+
+
+class RunLedgerTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.ledger = RunLedger(os.path.join(self.temp_dir.name, "run_ledger.db"))
+        self.urls = [f"https://www.bilibili.com/bangumi/play/ep{i}" for i in range(5)]
+
+    def tearDown(self):
+        self.ledger.close()
+        self.temp_dir.cleanup()
+
+    def test_done_results(self):
+        self.ledger.record("u1", self.urls[0], 1)
+        self.ledger.record("u1", self.urls[1], 0)
+        self.ledger.record("u1", self.urls[2], -1)
+        self.ledger.record("u1", self.urls[3], None)
+        self.assertTrue(self.ledger.is_done("u1", self.urls[0]))
+        self.assertTrue(self.ledger.is_done("u1", self.urls[1]))
+        self.assertFalse(self.ledger.is_done("u1", self.urls[2]))
+        self.assertFalse(self.ledger.is_done("u1", self.urls[3]))
+        self.assertFalse(self.ledger.is_done("u1", self.urls[4]))
+
+    def test_partial_result_stays_pending(self):
+        self.ledger.record("u1", self.urls[0], 1, partial=True)
+        self.ledger.record("u1", self.urls[1], 0, partial=True)
+        self.assertFalse(self.ledger.is_done("u1", self.urls[0]))
+        self.assertTrue(self.ledger.is_done("u1", self.urls[1]))
+        self.assertEqual(self.ledger.pending("u1", self.urls, [0, 1]), [0])
+
+    def test_query_string_is_ignored(self):
+        self.ledger.record("u1", self.urls[0] + "?from=search", 1)
+        self.assertTrue(self.ledger.is_done("u1", self.urls[0]))
+
+    def test_latest_result_wins(self):
+        self.ledger.record("u1", self.urls[0], 1)
+        self.ledger.record("u1", self.urls[0], -1)
+        self.assertFalse(self.ledger.is_done("u1", self.urls[0]))
+
+    def test_pending_is_per_account(self):
+        self.ledger.record("u1", self.urls[1], 1)
+        self.ledger.record("u2", self.urls[2], 0)
+        self.assertEqual(self.ledger.pending("u1", self.urls, [0, 1, 2, 7]), [0, 2])
+        self.assertEqual(self.ledger.pending("u2", self.urls, [0, 1, 2]), [0, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import json
+import os
+import tempfile
+import unittest
+
+from selenium.webdriver.common.by import By
+
+from SelectorRegistry import SelectorRegistry
+
+PRIMARY = (By.CSS_SELECTOR, ".coin-index-title i.coin-num")
+FALLBACK = (By.CSS_SELECTOR, ".coin-num")
+
+
+class SelectorRegistryTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.stats_file = os.path.join(self.temp_dir.name, "selector_stats.json")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_record_stays_in_memory_until_flush(self):
+        registry = SelectorRegistry(self.stats_file, flush_interval=None)
+        registry.record('coin_balance', FALLBACK, True, 0.2)
+        self.assertFalse(os.path.exists(self.stats_file))
+
+        registry.flush()
+        with open(self.stats_file, 'r', encoding='utf-8') as file:
+            stats = json.load(file)
+        self.assertEqual(stats['coin_balance'][f"{By.CSS_SELECTOR}|.coin-num"], {'hits': 1, 'misses': 0, 'latency': 0.2})
+
+        # 没有新的统计时不重复写入
+        os.remove(self.stats_file)
+        registry.flush()
+        self.assertFalse(os.path.exists(self.stats_file))
+
+    def test_flush_interval(self):
+        registry = SelectorRegistry(self.stats_file, flush_interval=0)
+        registry.record('coin_balance', PRIMARY, False)
+        self.assertTrue(os.path.exists(self.stats_file))
+
+    def test_ranking_persists_across_instances(self):
+        registry = SelectorRegistry(self.stats_file, flush_interval=None)
+        self.assertEqual(registry.ranked('coin_balance')[0], PRIMARY)
+        for _ in range(3):
+            registry.record_css_match('coin_balance', ".coin-num", 0.1)
+        self.assertEqual(registry.ranked('coin_balance')[0], FALLBACK)
+        self.assertEqual(registry.ranked('coin_balance')[-1], PRIMARY)
+        registry.flush()
+        self.assertEqual(SelectorRegistry(self.stats_file).ranked('coin_balance')[0], FALLBACK)
+
+    def test_css_union_skips_xpath(self):
+        registry = SelectorRegistry(self.stats_file)
+        self.assertNotIn('//', registry.css_union('coin_balance'))
+        self.assertEqual(registry.ranked_css('coin_confirm'),
+                         [".dialogcoin_coin_btn__be9sU", "[class*='dialogcoin_coin_btn__']"])
+
+
+if __name__ == "__main__":
+    unittest.main()
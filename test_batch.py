@@ -0,0 +1,68 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import batch
+
+
+class BatchJobFileTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.job_file = os.path.join(self.temp_dir.name, "jobs.json")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, content):
+        with open(self.job_file, 'w', encoding='utf-8') as file:
+            file.write(content if isinstance(content, str) else json.dumps(content))
+
+    def test_defaults_are_filled_in(self):
+        self.write({"headless": False, "jobs": [{"season_url": "https://www.bilibili.com/bangumi/play/ss1",
+                                                 "episodes": [2, 3]}]})
+        settings, jobs = batch.load_job_file(self.job_file)
+        self.assertFalse(settings["headless"])
+        self.assertEqual(settings["ledger_file"], batch.DEFAULT_SETTINGS["ledger_file"])
+        self.assertEqual(jobs[0]["coin_floor"], batch.DEFAULT_JOB["coin_floor"])
+        self.assertEqual(batch.episode_indices(jobs[0], 10), [1, 2])
+
+    def test_bad_job_file_is_reported(self):
+        for content in (None, "{not json", [], {"jobs": [{"episodes": [1, 2]}]}):
+            if content is not None:
+                self.write(content)
+            exit_code, summary = batch.run(self.job_file)
+            self.assertEqual(exit_code, batch.EXIT_BAD_JOB_FILE)
+            self.assertFalse(summary["ok"])
+            self.assertIn("error", summary)
+
+    def test_count_results(self):
+        self.assertEqual(batch.count_results([1, 1, 0, -1, None]),
+                         {"done": 2, "already_done": 1, "failed": 1, "skipped": 1})
+
+
+class RunJobTest(unittest.TestCase):
+    def test_unprocessed_episodes_fail_the_job(self):
+        anime_access = mock.Mock(episode_urls=[f"ep{index}" for index in range(5)], episode_status={})
+        anime_access.load_season_episodes.return_value = True
+        ledger = mock.Mock()
+        ledger.pending.side_effect = lambda account, urls, indices: list(indices)
+        settings = dict(batch.DEFAULT_SETTINGS, prescan=False)
+        job = dict(batch.DEFAULT_JOB, season_url="https://www.bilibili.com/bangumi/play/ss1", concurrency=2)
+        login_bot = mock.Mock()
+
+        with mock.patch.object(batch, 'AnimePageAccess', return_value=anime_access), \
+                mock.patch.object(batch, 'EpisodeWorkerPool') as pool_class:
+            # 工作线程浏览器启动失败：一集也没有处理
+            pool_class.return_value.run.return_value = {}
+            summary = batch.run_job(job, settings, login_bot, None, ledger, "1", batch.CoinBudget(100))
+
+        self.assertFalse(summary["ok"])
+        self.assertEqual(summary["skipped"], 5)
+        self.assertTrue(pool_class.call_args.kwargs["headless"])
+        pool_class.return_value.run.assert_called_once_with(list(range(5)), borrowed_bot=login_bot)
+
+
+if __name__ == "__main__":
+    unittest.main()